@@ -0,0 +1,81 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from ._compat import text_type
+
+
+def content_hash(text):
+    """Return stable digest of template/rule text, used as cache key"""
+    if isinstance(text, text_type):
+        text = text.encode('utf-8')
+    return hashlib.sha256(text).hexdigest()
+
+
+class LRUCache(object):
+    """Thread safe least recently used cache with hit/miss counters.
+
+    Values are shared between callers, so anything stored here must be
+    treated as read only.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            if self.maxsize <= 0:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key, factory):
+        """Return cached value or store result of factory()"""
+        value = self.get(key, self)
+        if value is self:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
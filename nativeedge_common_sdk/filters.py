@@ -1,12 +1,15 @@
 # Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
 
 from jinja2 import Environment
-import xmltodict
+from xml.sax.saxutils import escape as xml_escape, quoteattr as xml_quoteattr
 from six import string_types, ensure_text
-from copy import deepcopy
 import re
+import codecs
 
 from ._compat import text_type
+from .caching import LRUCache, content_hash
+from .keywords import KeywordsRegistry
+from .query import compile_query
 
 OBFUSCATION_KEYWORDS = (
     'AUTHORIZATION',
@@ -18,117 +21,306 @@ OBFUSCATION_KEYWORDS = (
     'AWS_ACCESS_KEY_ID',
     'AWS_SECRET_ACCESS_KEY',
 )
+# site specific keywords and patterns are registered here
+OBFUSCATION_REGISTRY = KeywordsRegistry(OBFUSCATION_KEYWORDS)
 RE_STRING_ELEM = '|'.join(OBFUSCATION_KEYWORDS)
-RE_STR = r'(("*)(' + repr(RE_STRING_ELEM)[1:-1] + r')("*)(:|=)\s*("*))[^\n",]*'
-OBFUSCATION_RE = re.compile(RE_STR, flags=re.IGNORECASE | re.MULTILINE)
+# `{}` is replaced by keywords, value is finished by new line, quote, comma
+# or escaped new line
+RE_TEMPLATE = r'(("*)({})("*)(:|=)\s*("*))(?:[^\n",\\]|\\(?!n))*'
+RE_FLAGS = re.IGNORECASE | re.MULTILINE
+# key without value at the end of text
+RE_KEY_TEMPLATE = r'("*)({})("*)(:|=)\s*("*)\Z'
+# keyword which can be continued by `:` in next chunk
+_RE_OPEN_KEY_TEMPLATE = r'("*)({})("*)\Z'
+# rest of value
+_RE_VALUE = re.compile(r'(?:[^\n",\\]|\\(?!n))*')
+# spaces and quotes between `key:` and value
+_RE_VALUE_START = re.compile(r'\s*"*')
+RE_STR = RE_TEMPLATE.replace('{}', repr(RE_STRING_ELEM)[1:-1])
+OBFUSCATION_RE = re.compile(RE_STR, flags=RE_FLAGS)
 OBFUSCATED_SECRET = 'x' * 16
+# max size of text held by ObfuscationStream
+OBFUSCATION_LOOKAHEAD = 64 * 1024
+# max size of keyword prefix checked at the end of stream chunk
+OBFUSCATION_MAX_KEYWORD = 64
+# values which are never hidden
+_RE_NUMBERS = re.compile(r'^[.0-9]+$')
+_RE_BRACKET_NUMBERS = re.compile(r'[\[+][.0-9]+')
+_RE_BRACKET_TRUE_FALSE = re.compile(r'[\[+](true|false)')
+_RE_DYNAMIC = re.compile(r'^(\$|\\)')
+_KEEP_SUFFIXES = ('{', '[', '(', 'true', 'false', 'null')
+_RE_NONASCII = re.compile(r'[^\x00-\x7f]')
+# xmltodict.unparse special keys and forbidden symbols in names
+XML_TEXT = '#text'
+XML_COMMENT = '#comment'
+_RE_XML_WRONG_NAME = re.compile(r'^[?!]|[<>/"\'=\s]')
+# already checked names
+_XML_NAMES = set()
+# containers walked by limited_repr
+_REPR_BRACKETS = {dict: ('{', '}'), list: ('[', ']'), tuple: ('(', ')')}
 
 
 def get_field_value_recursive(logger, properties, path):
-    if not path:
-        return properties
-    key = path[0]
-    if isinstance(properties, list):
+    for key in path:
         try:
-            return get_field_value_recursive(
-                logger,
-                properties[int(key)],
-                path[1:]
-            )
-        except Exception as e:
-            logger.debug("Can't filter by {}".format(repr(e)))
-            return None
-    elif isinstance(properties, dict):
-        try:
-            return get_field_value_recursive(
-                logger,
-                properties[key],
-                path[1:]
-            )
-        except Exception as e:
+            if isinstance(properties, list):
+                properties = properties[int(key)]
+            elif isinstance(properties, dict):
+                properties = properties[key]
+            else:
+                return None
+        except (LookupError, ValueError, TypeError) as e:
             logger.debug("Can't filter by {}".format(repr(e)))
             return None
-    else:
-        return None
+    return properties
 
 
-def _save(runtime_properties_dict_or_subdict, list, value):
-    first_el = list.pop(0)
-    if len(list) == 0:
-        runtime_properties_dict_or_subdict[first_el] = value
-    else:
-        runtime_properties_dict_or_subdict[
-            first_el] = \
-                runtime_properties_dict_or_subdict.get(
-                    first_el, {}) if isinstance(
-            runtime_properties_dict_or_subdict, dict) else \
-                runtime_properties_dict_or_subdict[first_el]
-        _save(runtime_properties_dict_or_subdict[first_el], list, value)
-
-
-def _prepare_runtime_props_path_for_list(runtime_props_path, idx):
-    path = list(runtime_props_path)
-    last_one = path[-1]
-    if isinstance(last_one, list):
-        path.pop()
-        path.append(idx)
-        path.extend(last_one)
-    else:
-        path.append(idx)
-    return path
+def _save(runtime_properties_dict_or_subdict, path, value):
+    """Save value by path, path is not changed"""
+    for key in path[:-1]:
+        if isinstance(runtime_properties_dict_or_subdict, dict):
+            runtime_properties_dict_or_subdict = \
+                runtime_properties_dict_or_subdict.setdefault(key, {})
+        else:
+            runtime_properties_dict_or_subdict = \
+                runtime_properties_dict_or_subdict[key]
+    runtime_properties_dict_or_subdict[path[-1]] = value
+
+
+# compiled response_translation rules
+TRANSLATION_PLANS = LRUCache(maxsize=256)
+
+
+class _V1Plan(object):
+    """v1: keys/indexes of response, save by rule path for list of keys"""
+
+    __slots__ = ('items', 'save_path', 'is_list')
+
+    def __init__(self, rule):
+        self.is_list = isinstance(rule, list)
+        self.save_path = None
+        items = []
+        if self.is_list:
+            for idx, value in enumerate(rule):
+                if not isinstance(value, (list, dict)):
+                    # rule is path in runtime properties
+                    self.save_path = tuple(rule)
+                    break
+                items.append((idx, _V1Plan(value)))
+        elif isinstance(rule, dict):
+            items = [(key, _V1Plan(value)) for key, value in rule.items()]
+        self.items = tuple(items)
+
+    def apply(self, response_json, runtime_dict):
+        for key, plan in self.items:
+            # check if response json matches expectation
+            if self.is_list and not response_json:
+                return
+            plan.apply(response_json[key], runtime_dict)
+        if self.save_path:
+            _save(runtime_dict, self.save_path, response_json)
 
 
-def _prepare_runtime_props_for_list(runtime_props, runtime_props_path, count):
-    for l_idx, value in enumerate(runtime_props_path):
-        if value == runtime_props_path[-1] or \
-                isinstance(runtime_props_path[l_idx+1], list):
-            runtime_props[value] = [{}] * count
-            return
+def _split_list_path(runtime_path):
+    """Runtime path of list and path in list item.
+
+    ['pages', ['name']] saves list of {'name': ...} to 'pages',
+    ['names'] saves list of values (column) to 'names'.
+    """
+    if runtime_path and isinstance(runtime_path[-1], list):
+        return tuple(runtime_path[:-1]), tuple(runtime_path[-1])
+    return tuple(runtime_path), ()
+
+
+class _V2Value(object):
+    """Value by response path saved to runtime path"""
+
+    __slots__ = ('path', 'runtime_path')
+
+    def __init__(self, path, runtime_path):
+        self.path = tuple(path)
+        self.runtime_path = tuple(runtime_path)
+
+    def apply(self, response_json, runtime_dict):
+        for key in self.path:
+            response_json = response_json[key]
+        _save(runtime_dict, self.runtime_path, response_json)
+
+
+class _V2List(object):
+    """All translations for items of one response list.
+
+    List is walked once, each item gets own result with all columns.
+    """
+
+    __slots__ = ('path', 'runtime_path', 'columns', 'item_plan')
+
+    def __init__(self, path, runtime_path):
+        self.path = tuple(path)
+        self.runtime_path = runtime_path
+        # (path in item, runtime path in item result)
+        self.columns = []
+        # used for lists in items and mixed columns only
+        self.item_plan = None
+
+    def add(self, item_path, item_runtime_path):
+        self.columns.append((tuple(item_path), item_runtime_path))
+        nested = any(isinstance(key, list) for key in item_path)
+        values = [column for column in self.columns if not column[1]]
+        if nested or (values and len(values) != len(self.columns)) or \
+                len(values) > 1:
+            # item result is saved in one item holder
+            self.item_plan = _V2Plan([
+                [list(path), (0,) + runtime_path]
+                for path, runtime_path in self.columns])
+
+    def _apply_plan(self, items):
+        item_is_dict = any(runtime_path for _, runtime_path in self.columns)
+        result = []
+        for item in items:
+            holder = [{} if item_is_dict else None]
+            self.item_plan.apply(item, holder)
+            result.append(holder[0])
+        return result
+
+    def apply(self, response_json, runtime_dict):
+        for key in self.path:
+            response_json = response_json[key]
+        if self.item_plan:
+            result = self._apply_plan(response_json)
+        elif not self.columns[0][1]:
+            # column of values
+            path = self.columns[0][0]
+            result = []
+            for item in response_json:
+                for key in path:
+                    item = item[key]
+                result.append(item)
         else:
-            runtime_props[value] = runtime_props.get(value, {})
-            runtime_props = runtime_props[value]
+            columns = self.columns
+            result = []
+            for item in response_json:
+                item_result = {}
+                for path, runtime_path in columns:
+                    value = item
+                    for key in path:
+                        value = value[key]
+                    _save(item_result, runtime_path, value)
+                result.append(item_result)
+        _save(runtime_dict, self.runtime_path, result)
+
+
+class _V2Plan(object):
+    """v2: list of [response path, runtime path] translations.
+
+    Response path can include [key] for each item in list.
+    """
+
+    __slots__ = ('steps', '_lists')
+
+    def __init__(self, rule):
+        self.steps = []
+        self._lists = {}
+        for translation in rule or []:
+            self.add(translation[0], translation[1])
+
+    def add(self, response_path, runtime_path):
+        for idx, key in enumerate(response_path):
+            if isinstance(key, list):
+                list_runtime_path, item_runtime_path = _split_list_path(
+                    runtime_path)
+                list_key = (tuple(response_path[:idx]), list_runtime_path)
+                if list_key not in self._lists:
+                    self._lists[list_key] = _V2List(*list_key)
+                    self.steps.append(self._lists[list_key])
+                self._lists[list_key].add(
+                    [key[0]] + list(response_path[idx + 1:]),
+                    item_runtime_path)
+                return
+        self.steps.append(_V2Value(response_path, runtime_path))
+
+    def apply(self, response_json, runtime_dict):
+        for step in self.steps:
+            step.apply(response_json, runtime_dict)
+
+
+class _V3Plan(object):
+    """v3: runtime property name => response path"""
+
+    __slots__ = ('paths',)
+
+    def __init__(self, rule):
+        self.paths = tuple(
+            (param_name, tuple(rule[param_name]))
+            for param_name in rule or {})
+
+    def apply(self, response_json, runtime_dict, logger):
+        for param_name, path in self.paths:
+            runtime_dict[param_name] = get_field_value_recursive(
+                logger, response_json, path)
+
+
+class _V4Plan(object):
+    """v4: runtime property name => query, see query module"""
+
+    __slots__ = ('queries',)
+
+    def __init__(self, rule):
+        self.queries = tuple(
+            (param_name, compile_query(rule[param_name]))
+            for param_name in rule or {})
+
+    def apply(self, response_json, runtime_dict):
+        for param_name, query in self.queries:
+            runtime_dict[param_name] = query.search(response_json)
+
+
+class TranslationPlan(object):
+    """Compiled response_translation.
+
+    Plan does not keep references to rule and is never changed, so it can
+    be shared and applied to many responses.
+    """
+
+    __slots__ = ('version', '_plan')
+
+    def __init__(self, response_translation, translation_version="auto"):
+        if translation_version == "v4":
+            self.version = "v4"
+            self._plan = _V4Plan(response_translation)
+        elif translation_version == "v3":
+            self.version = "v3"
+            self._plan = _V3Plan(response_translation)
+        elif _check_if_v2(response_translation) or \
+                translation_version == "v2":
+            self.version = "v2"
+            self._plan = _V2Plan(response_translation)
+        else:
+            self.version = "v1"
+            self._plan = _V1Plan(response_translation)
+
+    def apply(self, logger, response_json, runtime_dict):
+        if self.version == "v3":
+            self._plan.apply(response_json, runtime_dict, logger)
+        else:
+            self._plan.apply(response_json, runtime_dict)
+
+
+def compile_translation(response_translation, translation_version="auto"):
+    """Cached TranslationPlan for response_translation"""
+    return TRANSLATION_PLANS.get_or_create(
+        repr((translation_version, response_translation)),
+        lambda: TranslationPlan(response_translation, translation_version))
 
 
 def _translate_and_save_v1(response_json, response_translation, runtime_dict):
-    if isinstance(response_translation, list):
-        for idx, val in enumerate(response_translation):
-            if isinstance(val, (list, dict)):
-                # check if response json matches expectation
-                if not response_json:
-                    return
-                _translate_and_save_v1(response_json[idx], val, runtime_dict)
-            else:
-                _save(runtime_dict, response_translation, response_json)
-    elif isinstance(response_translation, dict):
-        for key, value in list(response_translation.items()):
-            _translate_and_save_v1(response_json[key], value, runtime_dict)
+    compile_translation(response_translation, "v1").apply(
+        None, response_json, runtime_dict)
 
 
 def _translate_and_save_v2(response_json, response_translation, runtime_dict):
-    if not response_translation:
-        # skip any empty translation rules
-        return
-    for translation in response_translation:
-        json = response_json
-        for idx, key in enumerate(translation[0]):
-            if isinstance(key, list):
-                _prepare_runtime_props_for_list(runtime_dict,
-                                                translation[1],
-                                                len(json))
-                for response_list_idx, response_list_value in enumerate(json):
-                    list_path = translation[0][idx+1:]
-                    list_path.insert(0, key[0])
-                    list_path.insert(0, response_list_idx)
-                    list_path_arg = [[
-                        list_path,
-                        _prepare_runtime_props_path_for_list(
-                            translation[1], response_list_idx)
-                    ]]
-                    _translate_and_save_v2(json, list_path_arg, runtime_dict)
-                return
-            else:
-                json = json[key]
-        _save(runtime_dict, translation[1], json)
+    compile_translation(response_translation, "v2").apply(
+        None, response_json, runtime_dict)
 
 
 def _check_if_v2(response_translation):
@@ -145,39 +337,104 @@ def _check_if_v2(response_translation):
 
 def _translate_and_save_v3(logger, response_json, response_translation,
                            runtime_dict):
-    if not response_translation:
-        # skip any empty translation rules
-        return
-    for param_name in response_translation:
-        runtime_dict[param_name] = get_field_value_recursive(
-            logger, response_json, response_translation[param_name])
+    compile_translation(response_translation, "v3").apply(
+        logger, response_json, runtime_dict)
 
 
 def translate_and_save(logger, response_json, response_translation,
                        runtime_dict, translation_version="auto"):
-    if translation_version == "v3":
-        _translate_and_save_v3(logger, response_json, response_translation,
-                               runtime_dict)
-    elif _check_if_v2(response_translation) or translation_version == "v2":
-        _translate_and_save_v2(response_json, response_translation,
-                               runtime_dict)
-    else:
-        _translate_and_save_v1(response_json, response_translation,
-                               runtime_dict)
+    compile_translation(
+        response_translation, translation_version
+    ).apply(logger, response_json, runtime_dict)
 
 
 def __correct_substr(text, size):
     """check that substring is still valid utf8"""
-    while True:
+    text = text[:size]
+    if isinstance(text, bytes):
+        # drop incomplete multibyte symbol at the end
         try:
-            return ensure_text(text[:size])
-        except Exception:
-            size -= 1
+            return codecs.getincrementaldecoder('utf-8')().decode(text)
+        except UnicodeDecodeError:
+            return text.decode('utf-8', 'ignore')
+    return ensure_text(text)
 
 
 def remove_nonascii(text, placeholder="?"):
     # remove non ascii symbols from text and replace with placeholder
-    return "".join([i if ord(i) < 128 else placeholder for i in text])
+    if _is_ascii(text):
+        return text
+    return _RE_NONASCII.sub(placeholder.replace('\\', '\\\\'), text)
+
+
+def _is_ascii(text):
+    try:
+        return text.isascii()
+    except AttributeError:
+        # python < 3.7
+        return not _RE_NONASCII.search(text)
+
+
+def _repr_prefix(text, size):
+    """Start of repr for long string, quotes are selected by whole text"""
+    single, double = ("'", '"') if isinstance(text, text_type) \
+        else (b"'", b'"')
+    marker = double if single not in text or double in text else single
+    return repr(text[:size] + marker)[:-2]
+
+
+def _repr_chunks(obj, size, running):
+    """Parts of repr(obj), long strings are cut to size"""
+    kind = type(obj)
+    if kind in _REPR_BRACKETS:
+        opening, closing = _REPR_BRACKETS[kind]
+        if not obj:
+            yield repr(obj)
+            return
+        if id(obj) in running:
+            yield opening + '...' + closing
+            return
+        running.add(id(obj))
+        yield opening
+        if kind is dict:
+            for idx, (key, value) in enumerate(obj.items()):
+                if idx:
+                    yield ', '
+                for chunk in _repr_chunks(key, size, running):
+                    yield chunk
+                yield ': '
+                for chunk in _repr_chunks(value, size, running):
+                    yield chunk
+        else:
+            for idx, value in enumerate(obj):
+                if idx:
+                    yield ', '
+                for chunk in _repr_chunks(value, size, running):
+                    yield chunk
+            if kind is tuple and len(obj) == 1:
+                yield ','
+        yield closing
+        running.discard(id(obj))
+    elif kind in (text_type, bytes) and len(obj) > size:
+        yield _repr_prefix(obj, size)
+    else:
+        yield repr(obj)
+
+
+def limited_repr(obj, size):
+    """Start of repr(obj) not shorter than size (if repr is longer).
+
+    Builtin containers are walked and output is stopped when size is
+    reached, so big objects are not converted to text as whole.
+    """
+    chunks = []
+    length = 0
+    for chunk in _repr_chunks(obj, size, set()):
+        chunks.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            break
+    return "".join(chunks)
 
 
 def shorted_text(obj, size=1024):
@@ -185,7 +442,7 @@ def shorted_text(obj, size=1024):
     if isinstance(obj, string_types):
         text = obj
     else:
-        text = repr(obj)
+        text = limited_repr(obj, size + 1)
     if size <= 3:
         return __correct_substr(text, size)
     elif len(text) > size:
@@ -193,135 +450,455 @@ def shorted_text(obj, size=1024):
     return text
 
 
-def obfuscate_passwords(obj,
-                        regex_string=OBFUSCATION_RE,
-                        obfuscation_keywords=OBFUSCATION_KEYWORDS):
-    """Obfuscate passwords in dictionary or list of dictionaries.
+class LazyLogText(object):
+    """Shorted and obfuscated text of object for log message.
 
-    Returns a copy of original object with elements potentially containing
-    passwords obfuscated.  A copy.deepcopy() is used for copying dictionaries
-    but only when absolutely necessary.  If a given object does not contain
-    any passwords, original is returned and deepcopy never performed.
+    Text is built only when log record is emitted, so use it as argument:
+    logger.debug('Call: %s', LazyLogText(call))
+    Bytes are shown as repr of their prefix.
     """
-    def is_empty_key(line):
-        # check if line has empty key value
-        # case of yaml:
+
+    __slots__ = ('obj', 'size', 'obfuscate')
+
+    def __init__(self, obj, size=1024, obfuscate=True):
+        self.obj = obj
+        self.size = size
+        self.obfuscate = obfuscate
+
+    def __str__(self):
+        obj = self.obj
+        if isinstance(obj, bytes):
+            # repr of prefix starts same as repr of whole content
+            obj = repr(obj[:self.size * 4])
+        if not self.obfuscate:
+            return shorted_text(obj, self.size)
+        if isinstance(obj, string_types) and len(obj) > self.size * 4:
+            # only prefix will be shown, obfuscation of prefix is enough
+            obj = obj[:self.size * 4]
+        return shorted_text(obfuscate_passwords(obj), self.size)
+
+    __repr__ = __str__
+
+
+def _obfuscate_value(matchobj):
+    """Decide whether to hide matched value or return it as is"""
+    prefix = matchobj.group(1)
+    value = matchobj.group(0)[len(prefix):].lower()
+    # numbers, array of numbers, array of true/false or dynamic value
+    if _RE_NUMBERS.search(value) or \
+        _RE_BRACKET_NUMBERS.search(value) or \
+            _RE_BRACKET_TRUE_FALSE.search(value) or \
+            _RE_DYNAMIC.search(value):
+        return matchobj.group(0)
+    # empty arrays/dict or true/false/null
+    value = value.rstrip('])}')
+    if value.endswith(_KEEP_SUFFIXES):
+        return matchobj.group(0)
+    if not value and prefix[-1:] in (':', '=') and \
+            matchobj.string.startswith(r'\n', matchobj.end()):
+        # yaml key with value on next lines:
         # secret: \n
         #   some_value: test
-        key_val_line = ':' in line and len(line.split(':')) == 2 \
-            and not line.split(':')[1]
-        key_eq_val_line = '=' in line and len(line.split('=')) == 2 \
-            and not line.split('=')[1]
-        if key_val_line or key_eq_val_line:
+        return matchobj.group(0)
+    # check if value has text then obfuscate other than this return value
+    if not prefix.endswith('""'):
+        return prefix + OBFUSCATED_SECRET
+    return matchobj.group(0)
+
+
+def _has_keyword(text, obfuscation_keywords):
+    if isinstance(obfuscation_keywords, KeywordsRegistry):
+        return obfuscation_keywords.search(text)
+    upper = text.upper()
+    for keyword in obfuscation_keywords:
+        if keyword in upper:
             return True
-        return False
-
-    def obfuscate_value(matchobj):
-        # this method will investigate the value passed to it
-        # and decide whether to hide value or return it as is
-        last_portion = matchobj.group(0).lower().replace(
-            matchobj.group(1).lower(), '')
-        # we have numbers case
-        re_numbers = re.compile(r'^[.0-9]+$')
-        # array of numbers
-        re_bracket_numbers = re.compile(r'[[+][.0-9]+')
-        # true/false
-        re_bracket_true_false = re.compile(r'[[+](true|false)')
-        # a value of $ inside helm comment
-        re_dynamic = re.compile(r'^(\$|\\)')
-        # check if the value has new line
-        re_new_line = re.compile(r'.*\\n')
-
-        # new line case
-        if re_new_line.search(last_portion):
-            result = ""
-            splits = matchobj.group(0).split(r'\n')
-            # go line by line to check for values to obfuscate
-            for i, line in enumerate(splits):
-                if i < len(splits)-1:
-                    # if empty key_value just skip the line
-                    if is_empty_key(line):
-                        result += line + r'\n'
-                    else:
-                        result += regex_string.sub(obfuscate_value, line) + \
-                            r'\n'
-                else:
-                    result += regex_string.sub(obfuscate_value, line)
-            return result
+    return False
+
+
+def _obfuscate_text(text, regex_string, obfuscation_keywords, precheck):
+    """Obfuscated text, same object if nothing is hidden"""
+    if precheck and isinstance(text, text_type) and \
+            not _has_keyword(text, obfuscation_keywords):
+        # nothing to hide
+        return text
+    result = regex_string.sub(_obfuscate_value, text)
+    if result == text:
+        return text
+    return result
 
-        # if we have numbers/array-of-numbers/array-of-true-false/dynamic-value
-        # return the value as is
-        if re_numbers.search(last_portion) or \
-            re_bracket_numbers.search(last_portion) or \
-                re_bracket_true_false.search(last_portion) or \
-                re_dynamic.search(last_portion):
-            return matchobj.group(0)
-        # empty arrays/dict or true/false return the value as is
-        last_portion = last_portion.replace(']', '')
-        last_portion = last_portion.replace('}', '')
-        last_portion = last_portion.replace(')', '')
-        if last_portion.endswith('{') or last_portion.endswith('[') or \
-            last_portion.endswith('(') or \
-            last_portion.lower().endswith('true') or \
-            last_portion.lower().endswith('false') or \
-                last_portion.lower().endswith('null'):
-            return matchobj.group(0)
-
-        # check if value has text then obfuscate other than this return value
-        if not matchobj.group(1).endswith('""'):
-            return matchobj.group(1) + OBFUSCATED_SECRET
-        else:
-            return matchobj.group(0)
 
+def _obfuscate(obj, regex_string, obfuscation_keywords, precheck):
     if isinstance(obj, (text_type, bytes,)):
-        result = regex_string.sub(obfuscate_value, obj)
+        result = _obfuscate_text(
+            obj, regex_string, obfuscation_keywords, precheck)
+        # top level text and list items only
         if isinstance(obj, text_type) and obj.endswith('\n'):
             result = result + '\n'
         return result
     if isinstance(obj, list):
-        return [obfuscate_passwords(elem) for elem in obj]
+        result = obj
+        for idx, value in enumerate(obj):
+            new_value = _obfuscate(
+                value, regex_string, obfuscation_keywords, precheck)
+            if new_value is not value:
+                if result is obj:
+                    result = list(obj)
+                result[idx] = new_value
+        return result
     if not isinstance(obj, dict):
         return obj
     result = obj
-    for k, v in list(result.items()):
-        if any(x for x in obfuscation_keywords if x in k.upper()):
-            a_copy = deepcopy(result)
-            if isinstance(a_copy[k], text_type) and a_copy[k].endswith('\n'):
-                a_copy[k] = OBFUSCATED_SECRET + '\n'
+    for k, v in obj.items():
+        if isinstance(k, string_types) and \
+                _has_keyword(k, obfuscation_keywords):
+            if isinstance(v, text_type) and v.endswith('\n'):
+                new_value = OBFUSCATED_SECRET + '\n'
             else:
-                a_copy[k] = OBFUSCATED_SECRET
-            result = a_copy
-        elif isinstance(v, (text_type, )):
-            a_copy = deepcopy(result)
-            a_copy[k] = regex_string.sub(obfuscate_value, v)
-            result = a_copy
-        if isinstance(v, (dict, list,)):
-            obfuscated_v = obfuscate_passwords(v)
-            if obfuscated_v is not v:
-                a_copy = deepcopy(result)
-                a_copy[k] = obfuscated_v
-                result = a_copy
+                new_value = OBFUSCATED_SECRET
+        elif isinstance(v, bytes):
+            # binary values are kept as is
+            new_value = v
+        elif isinstance(v, text_type):
+            new_value = _obfuscate_text(
+                v, regex_string, obfuscation_keywords, precheck)
+        else:
+            new_value = _obfuscate(
+                v, regex_string, obfuscation_keywords, precheck)
+        if new_value is not v:
+            if result is obj:
+                result = obj.copy()
+            result[k] = new_value
     return result
 
 
+def obfuscate_passwords(obj,
+                        regex_string=OBFUSCATION_RE,
+                        obfuscation_keywords=OBFUSCATION_KEYWORDS):
+    """Obfuscate passwords in dictionary or list of dictionaries.
+
+    Returns a copy of original object with elements potentially containing
+    passwords obfuscated. Only dicts and lists on path to changed values are
+    copied, other parts are shared with original object. If a given object
+    does not contain any passwords, original is returned.
+
+    Default keywords are extended by OBFUSCATION_REGISTRY, register site
+    specific keywords there: OBFUSCATION_REGISTRY.register('API_KEY').
+    With default regex_string, text is checked by keywords of registry
+    passed as obfuscation_keywords too.
+    """
+    if obfuscation_keywords is OBFUSCATION_KEYWORDS:
+        obfuscation_keywords = OBFUSCATION_REGISTRY
+    # text without keywords can't be matched by keywords based regexp
+    precheck = regex_string is OBFUSCATION_RE and \
+        isinstance(obfuscation_keywords, KeywordsRegistry)
+    if precheck:
+        regex_string = obfuscation_keywords.compile(RE_TEMPLATE, RE_FLAGS)
+    return _obfuscate(obj, regex_string, obfuscation_keywords, precheck)
+
+
+class ObfuscationStream(object):
+    """Incremental obfuscate_passwords for text or bytes stream.
+
+    Text is returned only when secret can't be continued in next chunk:
+    text from keyword (or from keyword start at the end of chunk) waits for
+    end of line, `key:` at the end of line waits for value on next lines.
+    Held text is limited by max_lookahead.
+    """
+
+    def __init__(self, obfuscation_keywords=OBFUSCATION_REGISTRY,
+                 max_lookahead=OBFUSCATION_LOOKAHEAD, encoding='utf-8'):
+        if not isinstance(obfuscation_keywords, KeywordsRegistry):
+            obfuscation_keywords = KeywordsRegistry(obfuscation_keywords)
+        self.obfuscation_keywords = obfuscation_keywords
+        self.max_lookahead = max_lookahead
+        self._decoder = codecs.getincrementaldecoder(encoding)('replace')
+        self._buff = ''
+        # value of secret was cut by lookahead limit, skip rest of it
+        self._hide_value = False
+        # part of value was already hidden, else value is after spaces
+        self._value_started = False
+        # rest of line is secret (see expect_value), mask is written
+        self._line_secret = False
+        self._line_masked = False
+        self._prefixes_for = None
+        self._prefixes = frozenset()
+
+    def _keyword_prefixes(self):
+        keywords = self.obfuscation_keywords.keywords
+        if self._prefixes_for is not keywords:
+            self._prefixes = frozenset(
+                keyword[:size] for keyword in keywords
+                for size in range(1, len(keyword)))
+            self._prefixes_for = keywords
+        return self._prefixes
+
+    def _prefix_start(self, tail):
+        """Position of keyword prefix at the end of tail, it can be
+        continued in next chunk"""
+        prefixes = self._keyword_prefixes()
+        upper = tail[-OBFUSCATION_MAX_KEYWORD:].upper()
+        for size in range(len(upper), 0, -1):
+            if upper[-size:] in prefixes:
+                return len(tail) - size
+        return len(tail)
+
+    def _match_start(self, tail):
+        """First position in line where secret can start"""
+        if self.obfuscation_keywords.patterns:
+            return 0
+        start = self._prefix_start(tail)
+        found = self.obfuscation_keywords.compile().search(tail)
+        if found and found.start() < start:
+            start = found.start()
+        # quotes before keyword are part of match
+        while start and tail[start - 1] == '"':
+            start -= 1
+        return start
+
+    def _safe_position(self):
+        buff = self._buff
+        line_start = safe = buff.rfind('\n') + 1
+        key_regexp = self.obfuscation_keywords.compile(RE_KEY_TEMPLATE)
+        # `key:` waits for value on next not empty line, key line itself
+        # can be value of previous `key:`
+        while True:
+            last = len(buff[:safe].rstrip())
+            if not last:
+                break
+            key_line = buff.rfind('\n', 0, last) + 1
+            if not key_regexp.search(buff, key_line, last):
+                break
+            safe = key_line
+        if safe < line_start:
+            return safe
+        return line_start + self._match_start(buff[line_start:])
+
+    def _obfuscate(self, size):
+        text, self._buff = self._buff[:size], self._buff[size:]
+        if not text or not self.obfuscation_keywords.search(text):
+            return text
+
+        def _replace(matchobj):
+            result = _obfuscate_value(matchobj)
+            if matchobj.end() == len(text) and not self._buff:
+                self._hide_value = \
+                    result == matchobj.group(1) + OBFUSCATED_SECRET
+                self._value_started = matchobj.end() > matchobj.end(1)
+            return result
+
+        return self.obfuscation_keywords.compile(
+            RE_TEMPLATE, RE_FLAGS).sub(_replace, text)
+
+    def _skip_value(self, text):
+        start = 0
+        if not self._value_started:
+            # `key:` was released without value, spaces are kept
+            start = _RE_VALUE_START.match(text).end()
+            if start == len(text):
+                return text
+            self._value_started = True
+        end = _RE_VALUE.match(text, start).end()
+        if end < len(text):
+            self._hide_value = False
+        return text[:start] + text[end:]
+
+    def _open_key_start(self, buff):
+        """Start of keyword or its prefix at the end of buff, key can be
+        finished in next chunk"""
+        start = self._prefix_start(buff)
+        found = self.obfuscation_keywords.compile(
+            _RE_OPEN_KEY_TEMPLATE, RE_FLAGS).search(
+                buff, max(len(buff) - 2 * OBFUSCATION_MAX_KEYWORD, 0))
+        if found and found.start() < start:
+            start = found.start()
+        while start and buff[start - 1] == '"':
+            start -= 1
+        return start
+
+    def waits_for_value(self):
+        """Held text ends with `key:`, e.g. `Password:` prompt of device"""
+        if self._hide_value and not self._value_started:
+            return True
+        return self.obfuscation_keywords.compile(
+            RE_KEY_TEMPLATE, RE_FLAGS).search(
+                self._buff, max(len(self._buff) - self.max_lookahead, 0)
+        ) is not None
+
+    def expect_value(self):
+        """Text till end of line is secret without key, e.g. answer to
+        `Password:` prompt from other stream"""
+        if not self._line_secret:
+            self._line_secret = True
+            self._line_masked = False
+
+    def _hide_line(self, chunk):
+        end = chunk.find('\n')
+        if end == -1:
+            end = len(chunk)
+        else:
+            self._line_secret = False
+        value = chunk[:end].rstrip('\r')
+        mask = ''
+        if value and not self._line_masked:
+            mask = OBFUSCATED_SECRET
+            self._line_masked = True
+        return mask + chunk[len(value):]
+
+    def feed(self, chunk):
+        """Add chunk, returns obfuscated text which is ready to output"""
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        if self._line_secret:
+            chunk = self._hide_line(chunk)
+        if self._hide_value:
+            chunk = self._skip_value(chunk)
+        self._buff += chunk
+        if len(self._buff) > self.max_lookahead:
+            # key split by limit is held, unless it is end of value,
+            # value of released `key:` is hidden in next chunks
+            size = self._open_key_start(self._buff)
+            self._buff, tail = self._buff[:size], self._buff[size:]
+            text = self._obfuscate(size)
+            self._buff = self._skip_value(tail) if self._hide_value else tail
+            return text
+        return self._obfuscate(self._safe_position())
+
+    def flush(self):
+        """Returns all held text, stream can be reused after flush"""
+        result = self.feed(self._decoder.decode(b'', final=True))
+        result += self._obfuscate(len(self._buff))
+        self._hide_value = self._value_started = False
+        self._line_secret = self._line_masked = False
+        return result
+
+
+def obfuscate_stream(chunks, **kwargs):
+    """Yield obfuscated text for iterable of text or bytes chunks"""
+    stream = ObfuscationStream(**kwargs)
+    for chunk in chunks:
+        text = stream.feed(chunk)
+        if text:
+            yield text
+    text = stream.flush()
+    if text:
+        yield text
+
+
+def _xml_text(value):
+    if isinstance(value, string_types):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode('utf-8', 'replace')
+    return text_type(value)
+
+
+def _xml_name(name, kind="element"):
+    if name in _XML_NAMES:
+        return name
+    if not isinstance(name, string_types) or \
+            _RE_XML_WRONG_NAME.search(name):
+        raise ValueError("Invalid {} name: {}".format(kind, repr(name)))
+    if len(_XML_NAMES) > 4096:
+        _XML_NAMES.clear()
+    _XML_NAMES.add(name)
+    return name
+
+
+def _xml_write(out, key, value, root=False):
+    """Append xml of key/value to out, same rules as xmltodict.unparse,
+    root element can't be repeated"""
+    if key == XML_COMMENT:
+        for comment in value if isinstance(value, list) else [value]:
+            if comment is not None and _xml_text(comment):
+                comment = _xml_text(comment)
+                if '--' in comment or comment.endswith('-'):
+                    raise ValueError("Invalid comment: {}".format(
+                        repr(comment)))
+                out.append('<!--' + xml_escape(comment) + '-->')
+        return
+    _xml_name(key)
+    if not hasattr(value, '__iter__') or \
+            isinstance(value, (string_types, bytes, bytearray, dict)):
+        value = [value]
+    for index, item in enumerate(value):
+        if root and index > 0:
+            raise ValueError('document with multiple roots')
+        if item is None:
+            item = {}
+        elif not isinstance(item, (dict, string_types)):
+            item = _xml_text(item)
+        if isinstance(item, string_types):
+            out.append(
+                '<' + key + '>' + xml_escape(item) + '</' + key + '>')
+            continue
+        cdata = None
+        children = []
+        out.append('<' + key)
+        for child_key, child_value in item.items():
+            if child_key == XML_TEXT:
+                cdata = None if child_value is None \
+                    else _xml_text(child_value)
+            elif isinstance(child_key, string_types) and \
+                    child_key.startswith('@'):
+                if child_key == '@xmlns' and isinstance(child_value, dict):
+                    for prefix, url in child_value.items():
+                        _xml_name(prefix, "attribute")
+                        out.append(' xmlns{}={}'.format(
+                            ':' + prefix if prefix else '',
+                            xml_quoteattr(
+                                '' if url is None else _xml_text(url))))
+                    continue
+                out.append(' ' + _xml_name(child_key[1:], "attribute") +
+                           '=' + xml_quoteattr(
+                               '' if child_value is None
+                               else _xml_text(child_value)))
+            elif not (isinstance(child_value, list) and not child_value):
+                children.append((child_key, child_value))
+        out.append('>')
+        for child_key, child_value in children:
+            _xml_write(out, child_key, child_value)
+        if cdata is not None:
+            out.append(xml_escape(cdata))
+        out.append('</' + key + '>')
+
+
 def _toxml(value):
     """toxml filter"""
-    XML_PREFIX = '<?xml version="1.0" encoding="utf-8"?>'
-
-    result = ""
+    out = []
     for el in value:
-        part_xml = xmltodict.unparse({el: value[el]}, pretty=False)
-        # remove xml prefix
-        if part_xml[:len(XML_PREFIX)] == XML_PREFIX:
-            part_xml = part_xml[len(XML_PREFIX):]
-        result += part_xml.strip()
+        _xml_write(out, el, value[el], root=True)
+    return "".join(out)
+
+
+def _create_environment():
+    # templates are cached only by COMPILED_TEMPLATES
+    env = Environment(cache_size=0)
+    env.filters["toxml"] = _toxml
+    return env
 
-    return result
 
+# environment shared by all templates without isolation
+JINJA_ENVIRONMENT = _create_environment()
+# compiled templates, keyed by hash of template text
+COMPILED_TEMPLATES = LRUCache(maxsize=256)
 
-def render_template(template_txt, params):
+
+def compile_template(template_txt, isolated=False):
+    """Compile Jinja template, result can be rendered many times
+
+    isolated: use own environment and skip compiled templates cache
+    """
+    if isolated:
+        return _create_environment().from_string(template_txt)
+    return COMPILED_TEMPLATES.get_or_create(
+        content_hash(template_txt),
+        lambda: JINJA_ENVIRONMENT.from_string(template_txt))
+
+
+def render_template(template_txt, params, isolated=False):
     """Render Jinja template"""
-    env = Environment()
-    env.filters["toxml"] = _toxml
-    template = env.from_string(template_txt)
+    template = compile_template(template_txt, isolated=isolated)
     return template.render(params)
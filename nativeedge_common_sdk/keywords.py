@@ -0,0 +1,110 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import re
+import threading
+
+from six import string_types
+
+# marks end of keyword in trie node
+_END = ''
+
+
+def _trie_pattern(node):
+    """Regexp for trie node, keywords with common prefix share branch"""
+    alternatives = [
+        re.escape(char) + _trie_pattern(node[char])
+        for char in sorted(node) if char != _END]
+    if not alternatives:
+        return ''
+    if len(alternatives) == 1 and _END not in node:
+        return alternatives[0]
+    group = '(?:' + '|'.join(alternatives) + ')'
+    return group + '?' if _END in node else group
+
+
+class KeywordsRegistry(object):
+    """Case insensitive set of keywords and regexp patterns.
+
+    Keywords are compiled to single regexp shaped as prefix trie: keywords
+    with common prefix share branch, so at each position of text regexp
+    engine follows common prefix once instead of trying keywords one by
+    one. It is still backtracking regexp, not Aho-Corasick automaton: text
+    is scanned once, but each position costs up to length of longest
+    keyword.
+    """
+
+    def __init__(self, keywords=(), patterns=()):
+        self._keywords = ()
+        self._patterns = ()
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self.register(*keywords)
+        self.register_pattern(*patterns)
+
+    @property
+    def keywords(self):
+        return self._keywords
+
+    @property
+    def patterns(self):
+        return self._patterns
+
+    def register(self, *keywords):
+        """Add keywords, already registered keywords are ignored"""
+        for keyword in keywords:
+            if not keyword or not isinstance(keyword, string_types):
+                raise ValueError(
+                    'Keyword had to be non empty string, got {}'.format(
+                        repr(keyword)))
+        with self._lock:
+            new = tuple(
+                keyword.upper() for keyword in keywords
+                if keyword.upper() not in self._keywords)
+            if new:
+                self._keywords += tuple(sorted(set(new)))
+                self._compiled = {}
+
+    def register_pattern(self, *patterns):
+        """Add regexp patterns for secrets not described by keyword"""
+        for pattern in patterns:
+            re.compile(pattern)
+        with self._lock:
+            new = tuple(
+                pattern for pattern in patterns
+                if pattern not in self._patterns)
+            if new:
+                self._patterns += new
+                self._compiled = {}
+
+    def pattern(self):
+        """Regexp source which matches any of keywords or patterns"""
+        trie = {}
+        for keyword in self._keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[_END] = {}
+        alternatives = [_trie_pattern(trie)] if trie else []
+        alternatives += ['(?:{})'.format(pattern)
+                         for pattern in self._patterns]
+        if not alternatives:
+            # matches nothing
+            return '(?!)'
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    def compile(self, template='{}', flags=re.IGNORECASE):
+        """Compile template with `{}` replaced by keywords regexp"""
+        compiled = self._compiled
+        key = (template, flags)
+        regexp = compiled.get(key)
+        if regexp is None:
+            regexp = re.compile(template.replace('{}', self.pattern()), flags)
+            # dict is replaced on register, so stale regexp is not stored
+            compiled[key] = regexp
+        return regexp
+
+    def search(self, text):
+        """Check that text contains any keyword or pattern"""
+        return self.compile().search(text) is not None
@@ -3,7 +3,9 @@
 import sys
 import time
 import psutil
+import threading
 import subprocess
+from collections import deque
 
 from script_runner.tasks import (
     start_ctx_proxy,
@@ -15,7 +17,9 @@ from script_runner.tasks import (
     ILLEGAL_CTX_OPERATION_ERROR,
     UNSUPPORTED_SCRIPT_FEATURE_ERROR
 )
-from nativeedge_common_sdk.filters import obfuscate_passwords
+from nativeedge_common_sdk.filters import (
+    ObfuscationStream,
+    obfuscate_passwords)
 try:
     from nativeedge import (
         ctx as ctx_from_import,
@@ -29,6 +33,10 @@ try:
 except ImportError:
     ScriptException = Exception
 
+# max time to wait for rest of output after end of run, pipes can be kept
+# open by children of process
+READ_OUTPUT_TIMEOUT = 60
+
 
 class GeneralExecutor(object):
 
@@ -65,6 +73,16 @@ class GeneralExecutor(object):
         self.state_changes = 0
         self.log_stdout = log_stdout
         self.log_stderr = log_stderr
+        # pipes are owned by readers, communicate() of process only waits
+        stdout, stderr = self.process.stdout, self.process.stderr
+        self.process.stdout = self.process.stderr = None
+        self.process.stdin.close()
+        self.process.stdin = None
+        self._readers = [
+            self._start_reader(stdout, self._stdout),
+            self._start_reader(stderr, self._stderr, prefix='<err>',
+                               logger=self.logger.error),
+        ]
 
     @staticmethod
     def desecretize_env(env):
@@ -75,11 +93,13 @@ class GeneralExecutor(object):
                 env[k] = v
         return env
 
-    def _emit_log_message(self, message, prefix=None, logger=None):
+    def _emit_log_message(self, message, prefix=None, logger=None,
+                          clean_message=None):
         logger = logger or self.logger.info
         if hasattr(message, 'decode'):
             message = message.decode('ascii', 'ignore')
-        clean_message = obfuscate_passwords(message)
+        if clean_message is None:
+            clean_message = obfuscate_passwords(message)
 
         try:
             clean_message = clean_message.rstrip('\r\n')
@@ -98,21 +118,59 @@ class GeneralExecutor(object):
             pass
         return message
 
-    def emit_io(self):
+    def _start_reader(self, pipe, output, prefix=None, logger=None):
+        reader = threading.Thread(
+            target=self._read_lines, args=(pipe, output, prefix, logger))
+        reader.daemon = True
+        reader.start()
+        return reader
+
+    def _read_lines(self, pipe, output, prefix=None, logger=None):
+        """Log lines of pipe as they come.
+
+        Lines are passed through ObfuscationStream, so secrets with value
+        on next line after `key:` are hidden too. Obfuscation never adds
+        or removes new lines, line is logged when its clean copy is ready.
+        """
+        stream = ObfuscationStream()
+        lines = deque()
+
+        def _emit(clean):
+            clean_lines = clean.split('\n')
+            for clean_line in clean_lines[:-1]:
+                output.append(self._emit_log_message(
+                    lines.popleft(), prefix=prefix, logger=logger,
+                    clean_message=clean_line))
+            return clean_lines[-1]
+
         try:
-            stdout, stderr = self.process.communicate()
-            if stdout:
-                for line in stdout.decode('ascii', 'ignore').splitlines():
-                    self._stdout.append(self._emit_log_message(line))
-            if stderr:
-                for line in stderr.decode('ascii', 'ignore').splitlines():
-                    self._stderr.append(
-                        self._emit_log_message(
-                            line, prefix='<err>', logger=self.logger.error))
+            clean = ''
+            for data in iter(pipe.readline, b''):
+                for line in data.decode('ascii', 'ignore').splitlines():
+                    lines.append(line)
+                    clean = _emit(clean + stream.feed(line + '\n'))
+            _emit(clean + stream.flush())
         except Exception:
             pass
+        finally:
+            pipe.close()
+
+    def emit_io(self):
+        """Wait for rest of output after end of process"""
+        if self._return_code is not None:
+            self.join_readers()
         sys.stdout.flush()
 
+    def join_readers(self, timeout=READ_OUTPUT_TIMEOUT):
+        """Wait until readers log all output or timeout"""
+        deadline = time.time() + timeout
+        for reader in self._readers:
+            reader.join(max(deadline - time.time(), 0))
+        if any(reader.is_alive() for reader in self._readers):
+            self.logger.debug(
+                'Output of process {0} is not closed in {1} seconds'.format(
+                    self.pid, timeout))
+
     @property
     def stdout(self):
         return '\n'.join(self._stdout)
@@ -191,6 +249,8 @@ class GeneralExecutor(object):
             self.last_state = self.current_status
             time.sleep(POLL_LOOP_INTERVAL)
 
+        # loop is stopped by handle_max_sleep before end of process too
+        self.join_readers()
         self.logger.debug(
             'Execution done (PID={0}, return_code={1}): {2}'.format(
                 self.pid, self.return_code, self.command))
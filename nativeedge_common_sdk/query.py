@@ -0,0 +1,416 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+"""Queries for response translation (translation_format: v4).
+
+Supported subset of JMESPath:
+  * fields: `a.b`, `"key-with-dash"`, current value: `@`
+  * indexes and slices: `a[0]`, `a[-1]`, `a[1:10:2]`
+  * projections: `a[*].b`, `a.*.b`, flatten `a[].b`
+  * filters: `a[?state == 'ready' && size > `10`].name`
+  * multiselect: `a[*].[id, name]`, `a[*].{id: id, name: name}`
+  * pipes: `a[*].b | [0]`
+  * literals: 'raw string', `json`, numbers
+Missing keys and wrong types give null, projections skip null values.
+"""
+
+import re
+import json
+from collections.abc import Mapping
+
+from nativeedge_common_sdk.caching import LRUCache
+from nativeedge_common_sdk.exceptions import WrongTemplateDataException
+
+QUERIES_CACHE = LRUCache(maxsize=256)
+
+_TOKEN_RE = re.compile(r'''\s*(?:
+    (?P<number>-?\d+(?:\.\d+)?)|
+    (?P<name>[A-Za-z_][A-Za-z0-9_]*)|
+    (?P<quoted>"(?:[^"\\]|\\.)*")|
+    (?P<raw>'(?:[^'\\]|\\.)*')|
+    (?P<literal>`(?:[^`\\]|\\.)*`)|
+    (?P<op>\|\||&&|==|!=|<=|>=|\[\?|\[\]|[.\[\]{}()*@,:|<>!])
+)''', re.VERBOSE)
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise WrongTemplateDataException(
+                "Wrong query {}: unexpected {} at {}".format(
+                    repr(text), repr(text[pos:pos + 10]), pos))
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'number':
+            value = json.loads(value)
+        elif kind == 'quoted':
+            value = json.loads(value)
+            kind = 'name'
+        elif kind == 'raw':
+            value = value[1:-1].replace("\\'", "'")
+            kind = 'value'
+        elif kind == 'literal':
+            try:
+                value = json.loads(value[1:-1].replace('\\`', '`'))
+            except ValueError:
+                raise WrongTemplateDataException(
+                    "Wrong query {}: bad literal {}".format(
+                        repr(text), value))
+            kind = 'value'
+        tokens.append((kind, value))
+        pos = match.end()
+    tokens.append(('end', None))
+    return tokens
+
+
+def _is_true(value):
+    return not (value is None or value is False or
+                value in ('', [], {}))
+
+
+def _compare(operator):
+    def _numbers(func):
+        def _check(left, right):
+            if isinstance(left, bool) or isinstance(right, bool) or \
+                    not isinstance(left, (int, float)) or \
+                    not isinstance(right, (int, float)):
+                return None
+            return func(left, right)
+        return _check
+
+    return {
+        '==': lambda left, right: left == right,
+        '!=': lambda left, right: left != right,
+        '<': _numbers(lambda left, right: left < right),
+        '<=': _numbers(lambda left, right: left <= right),
+        '>': _numbers(lambda left, right: left > right),
+        '>=': _numbers(lambda left, right: left >= right),
+    }[operator]
+
+
+def _run(steps, start, value):
+    """Apply chain of steps, projection applies rest of chain to items"""
+    for idx in range(start, len(steps)):
+        is_projection, step = steps[idx]
+        value = step(value)
+        if value is None:
+            return None
+        if is_projection:
+            result = []
+            for item in value:
+                item = _run(steps, idx + 1, item)
+                if item is not None:
+                    result.append(item)
+            return result
+    return value
+
+
+def _field(name):
+    def _get(value):
+        # headers are case insensitive mapping
+        if isinstance(value, Mapping):
+            return value.get(name)
+        return None
+    return _get
+
+
+def _index(idx):
+    def _get(value):
+        if isinstance(value, list) and -len(value) <= idx < len(value):
+            return value[idx]
+        return None
+    return _get
+
+
+def _slice(start, stop, step):
+    if step == 0:
+        raise WrongTemplateDataException("Slice step can't be 0")
+    selected = slice(start, stop, step)
+
+    def _get(value):
+        if isinstance(value, list):
+            return value[selected]
+        return None
+    return _get
+
+
+def _list_items(value):
+    if isinstance(value, list):
+        return value
+    return None
+
+
+def _dict_values(value):
+    if isinstance(value, Mapping):
+        return list(value.values())
+    return None
+
+
+def _flatten(value):
+    if not isinstance(value, list):
+        return None
+    result = []
+    for item in value:
+        if isinstance(item, list):
+            result.extend(item)
+        else:
+            result.append(item)
+    return result
+
+
+def _filter(condition):
+    def _get(value):
+        if isinstance(value, list):
+            return [item for item in value if _is_true(condition(item))]
+        return None
+    return _get
+
+
+def _multiselect_list(expressions):
+    def _get(value):
+        if value is None:
+            return None
+        return [expression(value) for expression in expressions]
+    return _get
+
+
+def _multiselect_hash(expressions):
+    def _get(value):
+        if value is None:
+            return None
+        return {key: expression(value) for key, expression in expressions}
+    return _get
+
+
+class _Parser(object):
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def error(self, message):
+        kind, value = self.tokens[self.pos]
+        raise WrongTemplateDataException(
+            "Wrong query {}: {}, got {}".format(
+                repr(self.text), message,
+                'end of query' if kind == 'end' else repr(value)))
+
+    def peek(self, offset=0):
+        return self.tokens[self.pos + offset]
+
+    def accept(self, op):
+        if self.tokens[self.pos] == ('op', op):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, op):
+        if not self.accept(op):
+            self.error('expected {}'.format(repr(op)))
+
+    def parse(self):
+        expression = self.pipe()
+        if self.peek()[0] != 'end':
+            self.error('expected end of query')
+        return expression
+
+    def pipe(self):
+        left = self.or_expression()
+        while self.accept('|'):
+            right = self.or_expression()
+            left = (lambda left, right: lambda value: right(left(value)))(
+                left, right)
+        return left
+
+    def or_expression(self):
+        left = self.and_expression()
+        while self.accept('||'):
+            right = self.and_expression()
+            left = (lambda left, right: lambda value: (
+                lambda result: result if _is_true(result) else right(value)
+            )(left(value)))(left, right)
+        return left
+
+    def and_expression(self):
+        left = self.not_expression()
+        while self.accept('&&'):
+            right = self.not_expression()
+            left = (lambda left, right: lambda value: (
+                lambda result: right(value) if _is_true(result) else result
+            )(left(value)))(left, right)
+        return left
+
+    def not_expression(self):
+        if self.accept('!'):
+            expression = self.not_expression()
+            return lambda value: not _is_true(expression(value))
+        return self.comparison()
+
+    def comparison(self):
+        left = self.chain()
+        kind, op = self.peek()
+        if kind == 'op' and op in ('==', '!=', '<', '<=', '>', '>='):
+            self.pos += 1
+            right = self.chain()
+            compare = _compare(op)
+            return lambda value: compare(left(value), right(value))
+        return left
+
+    def chain(self):
+        steps = []
+        self.first_step(steps)
+        while True:
+            if self.accept('.'):
+                self.dot_step(steps)
+            elif self.peek() == ('op', '['):
+                self.pos += 1
+                self.bracket_step(steps)
+            elif self.accept('[]'):
+                # flatten is applied to result of previous projections
+                if any(is_projection for is_projection, _ in steps):
+                    steps[:] = [(False, self.wrap(steps))]
+                steps.append((True, _flatten))
+            elif self.accept('[?'):
+                steps.append((True, _filter(self.filter_condition())))
+            else:
+                break
+        return self.wrap(steps)
+
+    @staticmethod
+    def wrap(steps):
+        steps = tuple(steps)
+        if len(steps) == 1 and not steps[0][0]:
+            return steps[0][1]
+        return lambda value: _run(steps, 0, value)
+
+    def first_step(self, steps):
+        kind, value = self.peek()
+        if kind == 'name':
+            self.pos += 1
+            steps.append((False, _field(value)))
+        elif kind in ('value', 'number'):
+            self.pos += 1
+            steps.append((False, lambda _: value))
+        elif self.accept('@'):
+            steps.append((False, lambda value: value))
+        elif self.accept('*'):
+            steps.append((True, _dict_values))
+        elif self.accept('['):
+            self.bracket_step(steps, multiselect=True)
+        elif self.accept('[]'):
+            steps.append((True, _flatten))
+        elif self.accept('[?'):
+            steps.append((True, _filter(self.filter_condition())))
+        elif self.accept('{'):
+            steps.append((False, self.multiselect_hash()))
+        elif self.accept('('):
+            expression = self.pipe()
+            self.expect(')')
+            steps.append((False, expression))
+        else:
+            self.error('expected expression')
+
+    def dot_step(self, steps):
+        kind, value = self.peek()
+        if kind == 'name':
+            self.pos += 1
+            steps.append((False, _field(value)))
+        elif self.accept('*'):
+            steps.append((True, _dict_values))
+        elif self.accept('{'):
+            steps.append((False, self.multiselect_hash()))
+        elif self.accept('['):
+            steps.append((False, self.multiselect_list()))
+        else:
+            self.error('expected field after "."')
+
+    def bracket_step(self, steps, multiselect=False):
+        kind, value = self.peek()
+        if kind == 'number' or self.peek() == ('op', ':'):
+            steps.append(self.index_or_slice())
+        elif self.peek() == ('op', '*') and self.peek(1) == ('op', ']'):
+            self.pos += 2
+            steps.append((True, _list_items))
+        elif multiselect:
+            steps.append((False, self.multiselect_list()))
+        else:
+            self.error('expected index, slice or "*"')
+
+    def index_or_slice(self):
+        parts = [None]
+        while True:
+            kind, value = self.peek()
+            if kind == 'number':
+                if not isinstance(value, int) or parts[-1] is not None:
+                    self.error('expected integer')
+                self.pos += 1
+                parts[-1] = value
+            elif self.accept(':'):
+                if len(parts) == 3:
+                    self.error('expected "]"')
+                parts.append(None)
+            else:
+                self.expect(']')
+                break
+        if len(parts) == 1:
+            if parts[0] is None:
+                self.error('expected index')
+            return False, _index(parts[0])
+        parts += [None] * (3 - len(parts))
+        return True, _slice(*parts)
+
+    def filter_condition(self):
+        condition = self.pipe()
+        self.expect(']')
+        return condition
+
+    def multiselect_list(self):
+        expressions = [self.pipe()]
+        while self.accept(','):
+            expressions.append(self.pipe())
+        self.expect(']')
+        return _multiselect_list(expressions)
+
+    def multiselect_hash(self):
+        expressions = []
+        while True:
+            kind, key = self.peek()
+            if kind != 'name':
+                self.error('expected key')
+            self.pos += 1
+            self.expect(':')
+            expressions.append((key, self.pipe()))
+            if not self.accept(','):
+                break
+        self.expect('}')
+        return _multiselect_hash(expressions)
+
+
+class Query(object):
+    """Compiled query, can be shared between threads"""
+
+    __slots__ = ('text', '_evaluate')
+
+    def __init__(self, text):
+        if not isinstance(text, str):
+            raise WrongTemplateDataException(
+                "Query had to be string. Type {} not supported.".format(
+                    type(text)))
+        self.text = text
+        self._evaluate = _Parser(text).parse()
+
+    def search(self, value):
+        return self._evaluate(value)
+
+
+def compile_query(text):
+    """Cached compiled query"""
+    return QUERIES_CACHE.get_or_create(text, lambda: Query(text))
+
+
+def search(text, value):
+    return compile_query(text).search(value)
@@ -0,0 +1,68 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+"""Compare toxml filter with per key xmltodict.unparse.
+
+Run: python -m nativeedge_common_sdk.tests.benchmark_toxml
+"""
+
+from __future__ import print_function
+import timeit
+
+import xmltodict
+
+from nativeedge_common_sdk.filters import render_template
+
+XML_PREFIX = '<?xml version="1.0" encoding="utf-8"?>'
+
+
+def unparse_toxml(value):
+    """toxml filter before streaming writer"""
+    result = ""
+    for el in value:
+        part_xml = xmltodict.unparse({el: value[el]}, pretty=False)
+        if part_xml[:len(XML_PREFIX)] == XML_PREFIX:
+            part_xml = part_xml[len(XML_PREFIX):]
+        result += part_xml.strip()
+    return result
+
+
+def _payload(count):
+    """NETCONF like config with count interfaces and count top level keys"""
+    payload = {
+        'config': {
+            '@xmlns': 'urn:ietf:params:xml:ns:netconf:base:1.0',
+            'interfaces': {'interface': [{
+                '@operation': 'merge',
+                'name': 'eth{}'.format(idx),
+                'description': 'uplink <{}> & backup'.format(idx),
+                'enabled': idx % 2 == 0,
+                'mtu': 1500,
+                'ipv4': {'address': [
+                    {'ip': '10.0.{}.{}'.format(idx // 256, idx % 256),
+                     'prefix-length': 24}]},
+            } for idx in range(count)]},
+        },
+    }
+    for idx in range(count):
+        payload['param{}'.format(idx)] = {'#text': idx, '@type': 'int'}
+    return payload
+
+
+def main():
+    for count in (100, 1000, 5000):
+        payload = _payload(count)
+        assert unparse_toxml(payload) == render_template(
+            '{{ payload|toxml }}', {'payload': payload})
+        number = max(1, 2000 // count)
+        old = timeit.timeit(lambda: unparse_toxml(payload),
+                            number=number) / number
+        new = timeit.timeit(
+            lambda: render_template('{{ payload|toxml }}',
+                                    {'payload': payload}),
+            number=number) / number
+        print('{} elements: unparse {:.4f}s, toxml {:.4f}s ({:.1f}x)'.format(
+            count, old, new, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import unittest
+
+from nativeedge_common_sdk import caching
+
+
+class TestCaching(unittest.TestCase):
+
+    def test_content_hash(self):
+        self.assertEqual(caching.content_hash(u'abc'),
+                         caching.content_hash(b'abc'))
+        self.assertNotEqual(caching.content_hash('abc'),
+                            caching.content_hash('abd'))
+
+    def test_lru_cache(self):
+        cache = caching.LRUCache(maxsize=2)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # 'a' is used recently, so 'b' will be evicted
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get_or_create('c', lambda: 4), 3)
+        self.assertEqual(cache.get_or_create('d', lambda: 4), 4)
+        self.assertEqual(cache.stats(), {
+            'hits': 2, 'misses': 2, 'size': 2, 'maxsize': 2})
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertIn('d', cache)
+        cache.clear()
+        self.assertEqual(cache.stats(), {
+            'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 1})
+        # disabled cache
+        cache.resize(0)
+        cache.set('a', 1)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,14 @@
 # Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import re
 import unittest
 import json
 import six
-from mock import Mock
+from mock import Mock, patch
 
 import nativeedge_common_sdk.filters as filters
+from nativeedge_common_sdk.caching import content_hash
+from nativeedge_common_sdk.keywords import KeywordsRegistry
 
 
 class TestFilters(unittest.TestCase):
@@ -234,7 +237,7 @@ class TestFilters(unittest.TestCase):
         filters._translate_and_save_v2(parsed_json, response_translation,
                                        runtime_props)
         self.assertEqual(runtime_props,
-                         {'pages': [{'page_name': u'cool_wool'},
+                         {'pages': [{'page_name': u'marvin'},
                                     {'page_name': u'cool_wool'}]})
         # inderect call translate
         runtime_props = {}
@@ -245,9 +248,30 @@ class TestFilters(unittest.TestCase):
         filters.translate_and_save(Mock(), parsed_json,
                                    response_translation, runtime_props)
         self.assertEqual(runtime_props,
-                         {'pages': [{'page_name': u'cool_wool'},
+                         {'pages': [{'page_name': u'marvin'},
                                     {'page_name': u'cool_wool'}]})
 
+    def test_translate_and_save_v2_list(self):
+        parsed_json = {'id': 1, 'pages': [
+            {'name': 'a', 'tags': [{'v': 1}, {'v': 2}]},
+            {'name': 'b', 'tags': []}]}
+        runtime_props = {}
+        filters.translate_and_save(Mock(), parsed_json, [
+            [['pages', ['name']], ['pages', ['name']]],
+            [['pages', ['tags'], ['v']], ['pages', ['tags', ['v']]]],
+            # column of values
+            [['pages', ['name']], ['names']],
+            [['id'], ['id']],
+        ], runtime_props)
+        self.assertEqual(runtime_props, {
+            'pages': [{'name': 'a', 'tags': [{'v': 1}, {'v': 2}]},
+                      {'name': 'b', 'tags': []}],
+            'names': ['a', 'b'],
+            'id': 1})
+        # items are not shared
+        runtime_props['pages'][0]['name'] = 'c'
+        self.assertEqual(runtime_props['pages'][1]['name'], 'b')
+
     def test_translate_and_save_v3(self):
         response_translation = {
             'g': ['a', 'b']
@@ -269,6 +293,27 @@ class TestFilters(unittest.TestCase):
                                    translation_version="v3")
         self.assertEqual(runtime_props, {'g': 'c'})
 
+    def test_translate_and_save_v4(self):
+        response_translation = {
+            'ready': "items[?state == 'ready'].name",
+            'first': 'items[0].id',
+            'missed': 'items[5].id',
+        }
+        parsed_json = {'items': [
+            {'id': 1, 'name': 'a', 'state': 'ready'},
+            {'id': 2, 'name': 'b', 'state': 'failed'},
+            {'id': 3, 'name': 'c', 'state': 'ready'},
+        ]}
+        runtime_props = {}
+        filters.translate_and_save(Mock(), parsed_json,
+                                   response_translation, runtime_props,
+                                   translation_version="v4")
+        self.assertEqual(runtime_props, {
+            'ready': ['a', 'c'], 'first': 1, 'missed': None})
+        self.assertEqual(
+            filters.compile_translation(
+                response_translation, "v4").version, "v4")
+
     def test_translate_and_save_empty_translate(self):
         runtime_props = {}
         parsed_json = {'a': 'b'}
@@ -288,42 +333,32 @@ class TestFilters(unittest.TestCase):
                                        possible_empty, runtime_props,
                                        translation_version="v3")
             self.assertEqual(runtime_props, {})
+            # force v4
+            filters.translate_and_save(Mock(), parsed_json,
+                                       possible_empty, runtime_props,
+                                       translation_version="v4")
+            self.assertEqual(runtime_props, {})
 
-    def test_prepare_runtime_props_path_for_list(self):
-        self.assertListEqual(
-            filters._prepare_runtime_props_path_for_list(
-                ['key1', ['k2', 'k3']], 2),
-            ['key1', 2, 'k2', 'k3'])
-
-        self.assertListEqual(
-            filters._prepare_runtime_props_path_for_list(
-                ['key1', 'k2', 'k3'],
-                1),
-            ['key1', 'k2', 'k3', 1])
-
-        self.assertListEqual(
-            filters._prepare_runtime_props_path_for_list(
-                ['key1', ['k2', ['k3']]],
-                2),
-            ['key1', 2, 'k2', ['k3']])
-
-        self.assertListEqual(
-            filters._prepare_runtime_props_path_for_list(
-                ['key1', 'k2', ['k3']], 1),
-            ['key1', 'k2', 1, 'k3'])
-
-    def test_prepare_runtime_props_for_list(self):
-        runtime_props = {}
-        filters._prepare_runtime_props_for_list(runtime_props,
-                                                ['key1', ['k2', 'k3']], 2)
-        self.assertDictEqual(runtime_props, {'key1': [{}, {}]})
-
-        runtime_props = {}
-        filters._prepare_runtime_props_for_list(runtime_props,
-                                                ['k1', 'k2', 'k3'], 5)
-
-        self.assertDictEqual(runtime_props, {
-            'k1': {'k2': {'k3': [{}, {}, {}, {}, {}]}}})
+    def test_compile_translation(self):
+        rules = [
+            ({'a': ['g', 'h'], 'l': [{'b': ['k']}]}, 'auto', 'v1'),
+            ([[['l', ['b']], ['m', ['b']]], [['a'], ['n']]], 'auto', 'v2'),
+            ({'g': ['l', '1', 'b']}, 'v3', 'v3'),
+        ]
+        parsed_json = {'a': 'c', 'l': [{'b': 'd'}, {'b': 'e'}]}
+        for rule, version, plan_version in rules:
+            rule_text = json.dumps(rule)
+            plan = filters.compile_translation(rule, version)
+            self.assertEqual(plan.version, plan_version)
+            self.assertIs(filters.compile_translation(rule, version), plan)
+            first, second = {}, {}
+            filters.translate_and_save(Mock(), parsed_json, rule, first,
+                                       version)
+            plan.apply(Mock(), parsed_json, second)
+            self.assertEqual(first, second)
+            # rule is not changed by translation
+            self.assertEqual(json.dumps(rule), rule_text)
+        self.assertEqual(first, {'g': 'e'})
 
     def test_shorted_text(self):
         self.assertEqual(filters.shorted_text("12345", 3), "123")
@@ -340,6 +375,53 @@ class TestFilters(unittest.TestCase):
                 filters.shorted_text("very long unicode строчка", 22),
                 'very long unicode с...')
 
+    def test_limited_repr(self):
+        value = {'a': ["b'c", ('d',), b'e' * 10], 'f': 'g"h' * 100}
+        for size in (1, 5, 20, 40, 200):
+            text = filters.limited_repr(value, size)
+            self.assertTrue(repr(value).startswith(text))
+            self.assertGreaterEqual(len(text), size)
+        self.assertEqual(filters.limited_repr(value, 1000), repr(value))
+        recursive = [1]
+        recursive.append(recursive)
+        self.assertEqual(filters.limited_repr(recursive, 100), '[1, [...]]')
+        big = ['a' * 1000] * 1000
+        self.assertEqual(filters.limited_repr(big, 10), "['" + "a" * 10)
+        self.assertEqual(filters.shorted_text(big, 10), "['aaaaa...")
+
+    def test_remove_nonascii(self):
+        self.assertEqual(filters.remove_nonascii('abc'), 'abc')
+        self.assertEqual(filters.remove_nonascii('aяb'), 'a?b')
+        self.assertEqual(filters.remove_nonascii('aяb', '\\'), 'a\\b')
+
+    def test_lazy_log_text(self):
+        self.assertEqual(
+            str(filters.LazyLogText({'password': 'abc', 'a': 'b'})),
+            "{'password': 'xxxxxxxxxxxxxxxx', 'a': 'b'}")
+        self.assertEqual(
+            str(filters.LazyLogText("12345", 4, obfuscate=False)), "1...")
+        self.assertEqual(
+            str(filters.LazyLogText("x" * 100000, 10)), "xxxxxxx...")
+        # bytes are cut before repr
+        content = b'{"password": "abc"}' + b'\x00' * 100000
+        self.assertEqual(
+            str(filters.LazyLogText(content, 40)),
+            str(filters.LazyLogText(repr(content), 40)))
+        self.assertEqual(
+            str(filters.LazyLogText(b'a\nb')), repr(b'a\nb'))
+        with patch('nativeedge_common_sdk.filters.obfuscate_passwords',
+                   Mock(return_value='text')) as obfuscate:
+            str(filters.LazyLogText(content, 10))
+            self.assertEqual(obfuscate.call_args[0][0],
+                             repr(content)[:40])
+        # nothing is calculated before convert to string
+        with patch('nativeedge_common_sdk.filters.obfuscate_passwords',
+                   Mock(return_value='text')) as obfuscate:
+            text = filters.LazyLogText({'password': 'abc'})
+            obfuscate.assert_not_called()
+            self.assertEqual("{0}".format(text), 'text')
+            obfuscate.assert_called_once_with({'password': 'abc'})
+
     def test_render_template(self):
         self.assertEqual(
             filters.render_template('{{a|tojson}}', {'a': {'b': 'c'}}),
@@ -348,6 +430,57 @@ class TestFilters(unittest.TestCase):
             filters.render_template('{{a|toxml}}', {'a': {'b': 'c'}}),
             '<b>c</b>')
 
+    def test_toxml(self):
+        value = {
+            'config': {
+                '@xmlns': 'urn:a',
+                'item': [
+                    {'@id': 1, 'name': 'a<b>&c', 'enabled': True},
+                    {'@id': '"2"', '#text': 'text', 'empty': None},
+                    'plain',
+                ],
+                'skipped': [],
+                '#comment': 'note',
+            },
+            'param': 5,
+        }
+        expected = (
+            '<config xmlns="urn:a">'
+            '<item id="1"><name>a&lt;b&gt;&amp;c</name>'
+            '<enabled>true</enabled></item>'
+            '<item id=\'"2"\'><empty></empty>text</item>'
+            '<item>plain</item><!--note--></config>'
+            '<param>5</param>')
+        self.assertEqual(filters._toxml(value), expected)
+        for name in ('a b', '?a', 'a/b'):
+            with self.assertRaises(ValueError):
+                filters._toxml({name: 'c'})
+            with self.assertRaises(ValueError):
+                filters._toxml({'a': {'@' + name: 'c'}})
+        # top level list is single root, as in xmltodict.unparse
+        self.assertEqual(filters._toxml({'a': [1]}), '<a>1</a>')
+        self.assertEqual(filters._toxml({'a': []}), '')
+        with self.assertRaises(ValueError):
+            filters._toxml({'a': [1, 2]})
+
+    def test_render_template_cache(self):
+        filters.COMPILED_TEMPLATES.clear()
+        self.assertEqual(filters.render_template('{{a}}', {'a': 'b'}), 'b')
+        self.assertEqual(filters.render_template('{{a}}', {'a': 'c'}), 'c')
+        self.assertEqual(filters.COMPILED_TEMPLATES.stats()['hits'], 1)
+        self.assertIs(filters.compile_template('{{a}}'),
+                      filters.compile_template('{{a}}'))
+        # isolated templates are not shared
+        self.assertEqual(
+            filters.render_template('{{a}}', {'a': 'd'}, isolated=True), 'd')
+        self.assertIsNot(filters.compile_template('{{a}}', isolated=True),
+                         filters.compile_template('{{a}}'))
+        self.assertEqual(filters.COMPILED_TEMPLATES.stats()['size'], 1)
+        # template text is not kept as key
+        self.assertIn(content_hash('{{a}}'), filters.COMPILED_TEMPLATES)
+        self.assertNotIn('{{a}}', filters.COMPILED_TEMPLATES)
+        self.assertIsNone(filters.JINJA_ENVIRONMENT.cache)
+
     def test_obfuscate_passwords(self):
         call = {
             'host': 'localhost',
@@ -385,6 +518,135 @@ class TestFilters(unittest.TestCase):
         self.assertEqual(
             filters.obfuscate_passwords(call), call)
 
+    def test_obfuscate_passwords_shared(self):
+        auth = {'user': 'someone', 'password': 'HIDE ME'}
+        other = {'host': 'localhost', 'items': [1, 2]}
+        call = {'auth': auth, 'other': other, 'list': [other, auth]}
+        obfuscated = filters.obfuscate_passwords(call)
+        self.assertEqual(auth['password'], 'HIDE ME')
+        self.assertEqual(obfuscated['auth'], {
+            'user': 'someone', 'password': 'xxxxxxxxxxxxxxxx'})
+        # only path to changed values is copied
+        self.assertIsNot(obfuscated, call)
+        self.assertIs(obfuscated['other'], other)
+        self.assertIsNot(obfuscated['list'], call['list'])
+        self.assertIs(obfuscated['list'][0], other)
+        self.assertEqual(obfuscated['list'][1], obfuscated['auth'])
+        self.assertIs(filters.obfuscate_passwords(call['other']), other)
+
+    def test_obfuscate_text(self):
+        text = 'nothing to hide here'
+        self.assertIs(filters.obfuscate_passwords(text), text)
+        self.assertEqual(
+            filters.obfuscate_passwords(
+                r'secret:\n  MyToken: hide_me\n  token: 12\n'),
+            r'secret:\n  MyToken: xxxxxxxxxxxxxxxx\n  token: 12\n')
+
+    def test_obfuscate_dict_newline(self):
+        # text in dict keeps trailing new line as is
+        call = {'a': 'abc\n', 'b': {'c': 'password: abc\n'}}
+        obfuscated = filters.obfuscate_passwords(call)
+        self.assertEqual(obfuscated, {
+            'a': 'abc\n', 'b': {'c': 'password: xxxxxxxxxxxxxxxx\n'}})
+        self.assertIs(obfuscated['a'], call['a'])
+        nothing = {'a': 'abc\n', 'b': ['c'], 'c': b'password: abc'}
+        self.assertIs(filters.obfuscate_passwords(nothing), nothing)
+        # top level text and list items get new line as before
+        self.assertEqual(filters.obfuscate_passwords('abc\n'), 'abc\n\n')
+        self.assertEqual(filters.obfuscate_passwords(['abc\n']),
+                         ['abc\n\n'])
+
+    def test_obfuscate_registered_keywords(self):
+        registry = KeywordsRegistry(filters.OBFUSCATION_KEYWORDS)
+        call = {'api_key': 'HIDE ME', 'notes': 'Private-Key: HIDE ME'}
+        self.assertIs(
+            filters.obfuscate_passwords(
+                call, obfuscation_keywords=registry), call)
+        registry.register('API_KEY', 'PRIVATE-KEY')
+        self.assertEqual(
+            filters.obfuscate_passwords(call, obfuscation_keywords=registry),
+            {'api_key': 'xxxxxxxxxxxxxxxx',
+             'notes': 'Private-Key: xxxxxxxxxxxxxxxx'})
+        # registered keywords are used with default arguments
+        with patch.object(filters, 'OBFUSCATION_REGISTRY', registry):
+            self.assertEqual(
+                filters.obfuscate_passwords(call),
+                {'api_key': 'xxxxxxxxxxxxxxxx',
+                 'notes': 'Private-Key: xxxxxxxxxxxxxxxx'})
+        # old positional arguments: own regexp and keywords
+        self.assertEqual(
+            filters.obfuscate_passwords(
+                call, re.compile('(Private-Key: )HIDE ME'), ('API_KEY',)),
+            {'api_key': 'xxxxxxxxxxxxxxxx',
+             'notes': 'Private-Key: xxxxxxxxxxxxxxxx'})
+        # plain tuple of keywords is still supported
+        self.assertEqual(
+            filters.obfuscate_passwords(
+                call, obfuscation_keywords=('API_KEY',)),
+            {'api_key': 'xxxxxxxxxxxxxxxx',
+             'notes': 'Private-Key: HIDE ME'})
+
+    def test_obfuscation_stream(self):
+        text = ('output\n"password": "HIDE ME", AWS_SECRET_ACCESS_KEY=1a\n'
+                'secret:\n\n  HIDE ME\nnotes: password:\\n  test\\n\nend')
+        expected = filters.obfuscate_passwords(text)
+        for size in [1, 2, 5, 1000]:
+            stream = filters.ObfuscationStream()
+            result = ''.join(
+                stream.feed(text[pos:pos + size])
+                for pos in range(0, len(text), size)) + stream.flush()
+            self.assertEqual(result, expected)
+        self.assertNotIn('HIDE ME', expected)
+        # text without secrets is not held
+        stream = filters.ObfuscationStream()
+        self.assertEqual(stream.feed('$ ls\nfile.txt\n$ '),
+                         '$ ls\nfile.txt\n$ ')
+        self.assertEqual(stream.feed('echo pass'), 'echo ')
+        self.assertEqual(stream.feed('word: abc'), '')
+        self.assertEqual(stream.flush(), 'password: xxxxxxxxxxxxxxxx')
+
+    def test_obfuscation_stream_lookahead(self):
+        stream = filters.ObfuscationStream(max_lookahead=16)
+        self.assertEqual(stream.feed('token: "12345678'), '')
+        self.assertEqual(stream.feed('9abcdef'), 'token: "xxxxxxxxxxxxxxxx')
+        # rest of value is skipped
+        self.assertEqual(stream.feed('ghi", next\n'), '", next\n')
+        self.assertEqual(
+            list(filters.obfuscate_stream(
+                [b'utf8 \xd1', b'\x8f password: \xd1\x8f', b'\n'])),
+            [u'utf8 ', u'\u044f ', u'password: xxxxxxxxxxxxxxxx\n'])
+        # keyword split by lookahead limit is held
+        stream = filters.ObfuscationStream(max_lookahead=16)
+        self.assertEqual(stream.feed('some long output pass'),
+                         'some long output ')
+        self.assertEqual(stream.feed('word: HIDE ME\n'),
+                         'password: xxxxxxxxxxxxxxxx\n')
+        # prefix of keyword in cut secret is part of value
+        stream = filters.ObfuscationStream(max_lookahead=16)
+        self.assertEqual(stream.feed('token: "abcdefghipass'),
+                         'token: "xxxxxxxxxxxxxxxx')
+        self.assertEqual(stream.feed('word", next\n'), '", next\n')
+        # value of `key:` released by limit is hidden on next line
+        stream = filters.ObfuscationStream(max_lookahead=16)
+        self.assertEqual(stream.feed('output text\nsecret:  '),
+                         'output text\nsecret:  xxxxxxxxxxxxxxxx')
+        self.assertEqual(stream.feed('\n  HIDE ME\nend'), '\n  \nend')
+        # keyword before `:` is held
+        stream = filters.ObfuscationStream(max_lookahead=16)
+        self.assertEqual(stream.feed('some long output token'),
+                         'some long output ')
+        self.assertEqual(stream.feed('=HIDE ME\n') + stream.flush(),
+                         'token=xxxxxxxxxxxxxxxx\n')
+        for lookahead in [40, 64, 200]:
+            text = ('line\n' * 20 + 'token=\n  HIDE ME, password:\n\n'
+                    '"HIDE ME"\n' + 'x' * 60 + ' secret:HIDE ME\n')
+            stream = filters.ObfuscationStream(max_lookahead=lookahead)
+            result = ''.join(stream.feed(text[pos:pos + 7])
+                             for pos in range(0, len(text), 7))
+            result += stream.flush()
+            self.assertNotIn('HIDE', result)
+            self.assertEqual(result.count('\n'), text.count('\n'))
+
     def test_obfuscate_passwords_deep(self):
         call = {
             'host': 'localhost',
@@ -0,0 +1,43 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import unittest
+
+from nativeedge_common_sdk import keywords
+
+
+class TestKeywords(unittest.TestCase):
+
+    def test_pattern(self):
+        registry = keywords.KeywordsRegistry(['token', 'TOKENS', 'secret'])
+        self.assertEqual(registry.keywords, ('SECRET', 'TOKEN', 'TOKENS'))
+        self.assertEqual(registry.pattern(), '(?:SECRET|TOKEN(?:S)?)')
+        self.assertEqual(
+            keywords.KeywordsRegistry().pattern(), '(?!)')
+        self.assertFalse(keywords.KeywordsRegistry().search('token'))
+
+    def test_search(self):
+        registry = keywords.KeywordsRegistry(['password', 'api_key'])
+        self.assertTrue(registry.search('My_Password'))
+        self.assertTrue(registry.search('x-API_KEY'))
+        self.assertFalse(registry.search('api key'))
+        self.assertFalse(registry.search('passwor'))
+        registry.register_pattern(r'api[ -]key')
+        self.assertTrue(registry.search('api key'))
+
+    def test_register(self):
+        registry = keywords.KeywordsRegistry(['token'])
+        regexp = registry.compile()
+        self.assertIs(registry.compile(), regexp)
+        registry.register('Token')
+        self.assertIs(registry.compile(), regexp)
+        registry.register('passphrase')
+        self.assertIsNot(registry.compile(), regexp)
+        self.assertTrue(registry.search('PassPhrase'))
+        with self.assertRaises(ValueError):
+            registry.register('')
+
+    def test_compile_template(self):
+        registry = keywords.KeywordsRegistry(['token'])
+        regexp = registry.compile(r'({})\s*=\s*(\w{1,3})')
+        self.assertEqual(
+            regexp.search('a TOKEN = abcd').groups(), ('TOKEN', 'abc'))
@@ -1,11 +1,14 @@
 # Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import os
 import time
+import mock
 import unittest
 import subprocess
 from tempfile import NamedTemporaryFile
 
 from nativeedge_common_sdk.processes import (
+    GeneralExecutor,
     general_executor,
     handle_max_sleep,
 )
@@ -102,3 +105,41 @@ class TestProcesses(unittest.TestCase):
             general_executor_params['args'] = [t.name]
             result = general_executor('bash', ctx, general_executor_params)
             self.assertEqual(len(result), 89)
+
+    def test_general_executor_output(self):
+        logger = mock.Mock()
+        execution = GeneralExecutor(
+            'echo start; echo "password:"; sleep 1; echo "  HIDE ME"; '
+            'echo err >&2; read value; echo "stdin=$value"',
+            dict(os.environ), None, True, logger, mock.Mock())
+        # line is logged before end of process, `key:` waits for value
+        time.sleep(0.5)
+        logger.info.assert_called_once_with('start')
+        while execution.return_code is None:
+            execution.poll()
+        self.assertEqual(
+            logger.info.call_args_list,
+            [mock.call('start'), mock.call('password:'),
+             mock.call('  xxxxxxxxxxxxxxxx'), mock.call('stdin=')])
+        logger.error.assert_called_once_with('<err>: err')
+        self.assertEqual(execution.stdout,
+                         'start\npassword:\n  HIDE ME\nstdin=')
+        self.assertEqual(execution.stderr, 'err')
+
+    def test_general_executor_stopped(self):
+        logger = mock.Mock()
+        execution = GeneralExecutor(
+            'echo first; sleep 0.5; echo second',
+            dict(os.environ), None, True, logger, mock.Mock())
+        execution.poll = mock.Mock()
+        with mock.patch('nativeedge_common_sdk.processes.'
+                        'process_ctx_request', mock.Mock()), \
+                mock.patch('nativeedge_common_sdk.processes.'
+                           'POLL_LOOP_LOG_ITERATIONS', 1), \
+                mock.patch('nativeedge_common_sdk.processes.'
+                           'handle_max_sleep',
+                           mock.Mock(return_value=(None, None))):
+            execution.run(mock.Mock(), 0.1)
+        # output is read after loop is stopped before end of process
+        self.assertIsNone(execution.return_code)
+        self.assertEqual(execution.stdout, 'first\nsecond')
@@ -0,0 +1,88 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import unittest
+
+from nativeedge_common_sdk import query
+from nativeedge_common_sdk.exceptions import WrongTemplateDataException
+
+
+DATA = {
+    'items': [
+        {'id': 1, 'name': 'a', 'state': 'ready', 'tags': ['x', 'y'],
+         'size': 5},
+        {'id': 2, 'name': 'b', 'state': 'failed', 'tags': ['z'],
+         'size': 20},
+        {'id': 3, 'name': 'c', 'state': 'ready', 'tags': [], 'size': 15},
+    ],
+    'nodes': {'first': {'ip': '10.0.0.1'}, 'second': {'ip': '10.0.0.2'}},
+    'key-with-dash': 'dash',
+    'count': 0,
+}
+
+
+class TestQuery(unittest.TestCase):
+
+    def check(self, text, expected):
+        self.assertEqual(query.search(text, DATA), expected, text)
+
+    def test_fields_and_indexes(self):
+        self.check('nodes.first.ip', '10.0.0.1')
+        self.check('items[0].name', 'a')
+        self.check('items[-1].name', 'c')
+        self.check('items[10].name', None)
+        self.check('items.name', None)
+        self.check('nodes.third.ip', None)
+        self.check('"key-with-dash"', 'dash')
+        self.check('@.count', 0)
+
+    def test_projections(self):
+        self.check('items[*].name', ['a', 'b', 'c'])
+        self.check('nodes.*.ip', ['10.0.0.1', '10.0.0.2'])
+        self.check('items[].tags[]', ['x', 'y', 'z'])
+        self.check('items[*].tags[0]', ['x', 'z'])
+        self.check('items[1:].id', [2, 3])
+        self.check('items[::-2].id', [3, 1])
+        self.check('items[*].name | [0]', 'a')
+        self.check('items[*].missed', [])
+
+    def test_filters(self):
+        self.check("items[?state == 'ready'].name", ['a', 'c'])
+        self.check("items[?state != 'ready'].id", [2])
+        self.check('items[?size > `10`].id', [2, 3])
+        self.check('items[?size <= `5` || id == `3`].id', [1, 3])
+        self.check("items[?state == 'ready' && size > `10`].id", [3])
+        self.check('items[?tags].id', [1, 2])
+        self.check('items[?!tags].id', [3])
+        self.check("items[?name > 'a'].id", [])
+
+    def test_multiselect(self):
+        self.check('items[*].[id, name]', [[1, 'a'], [2, 'b'], [3, 'c']])
+        self.check("items[?id == `2`].{n: name, s: state}",
+                   [{'n': 'b', 's': 'failed'}])
+        self.check('{first: items[0].id, last: items[-1].id}',
+                   {'first': 1, 'last': 3})
+        self.check('missed.{a: a}', None)
+
+    def test_compile_cache(self):
+        compiled = query.compile_query('items[*].id')
+        self.assertIs(query.compile_query('items[*].id'), compiled)
+        self.assertEqual(compiled.search(DATA), [1, 2, 3])
+        self.assertEqual(compiled.search({'items': 'a'}), None)
+
+    def test_wrong_query(self):
+        for text in ('items[', 'items.', 'items[?id ==]', 'items[a]',
+                     '`{broken`', 'items[::0]', 'a b', 'items#', 1):
+            with self.assertRaises(WrongTemplateDataException):
+                query.compile_query(text)
+
+    def test_deep_path(self):
+        data = value = {}
+        for _ in range(2000):
+            value['a'] = {}
+            value = value['a']
+        value['b'] = 'c'
+        self.assertEqual(query.search('a.' * 2000 + 'b', data), 'c')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,354 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+"""asyncio variant of utility.process, requires aiohttp.
+
+Calls of many templates can be sent concurrently on one event loop:
+
+    results = await asyncio.gather(
+        process_async(params, template, request_props), ...)
+
+Template semantics are same as in process: control flow (retries, pages,
+parallel calls) is shared with process, only requests are sent by aiohttp.
+Responses are converted to requests.Response, errors to requests
+exceptions.
+"""
+
+import os
+import ssl
+import asyncio
+import logging
+import tempfile
+from contextlib import contextmanager
+
+import requests
+from six import string_types
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from nativeedge_rest_sdk import LOGGER_NAME
+from nativeedge_rest_sdk.hosts import HOSTS_HEALTH
+from nativeedge_rest_sdk.utility import (
+    MAX_PARALLEL_CALLS,
+    _load_rest_calls,
+    _process_calls_flow,
+    _send_request_flow)
+from nativeedge_common_sdk.caching import LRUCache, content_hash
+from nativeedge_common_sdk.exceptions import WrongTemplateDataException
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# ssl contexts by verify/cert, shared between requests and sessions
+SSL_CONTEXTS = LRUCache(maxsize=32)
+# connect timeout is separate error only in new versions of aiohttp
+_CONNECT_TIMEOUT_ERROR = getattr(aiohttp, 'ConnectionTimeoutError', None)
+
+
+@contextmanager
+def _as_file(value):
+    """Path to certificate, content is saved to temporary file"""
+    if os.path.exists(value):
+        yield value
+        return
+    fd, destination = tempfile.mkstemp()
+    try:
+        os.write(fd, value.encode())
+        os.close(fd)
+        yield destination
+    finally:
+        try:
+            os.remove(destination)
+        except Exception as e:
+            logger.debug(
+                'Cant remove temporary file {path}: {error}'
+                .format(path=destination, error=repr(e)))
+
+
+def _ssl_context(verify=True, cert=None):
+    """SSL settings for aiohttp from requests verify/cert values"""
+    if not cert:
+        if verify is True:
+            return None
+        if not verify:
+            return False
+    context = ssl.create_default_context()
+    if isinstance(verify, string_types):
+        with _as_file(verify) as path:
+            if os.path.isdir(path):
+                context.load_verify_locations(capath=path)
+            else:
+                context.load_verify_locations(cafile=path)
+    elif not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    if cert:
+        if isinstance(cert, string_types):
+            cert = (cert, None)
+        with _as_file(cert[0]) as cert_path:
+            if cert[1]:
+                with _as_file(cert[1]) as key_path:
+                    context.load_cert_chain(cert_path, key_path)
+            else:
+                context.load_cert_chain(cert_path)
+    return context
+
+
+async def _cached_ssl_context(verify=True, cert=None):
+    """Cached _ssl_context, new context is built in thread"""
+    if not cert and (verify is True or not verify):
+        return _ssl_context(verify, cert)
+    key = content_hash(repr((verify, cert)))
+    context = SSL_CONTEXTS.get(key)
+    if context is None:
+        # files are written and read out of event loop
+        context = await asyncio.get_running_loop().run_in_executor(
+            None, _ssl_context, verify, cert)
+        SSL_CONTEXTS.set(key, context)
+    return context
+
+
+def _params(params):
+    """aiohttp accepts only strings as url params"""
+    result = []
+    for name, value in (params or {}).items():
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            if item is None:
+                continue
+            if isinstance(item, bool):
+                item = "true" if item else "false"
+            result.append((name, "{0}".format(item)))
+    return result
+
+
+def _form_fields(data):
+    """Fields of multipart form from data, as requests encodes them"""
+    if isinstance(data, (string_types, bytes)):
+        raise ValueError('cannot encode objects that are not 2-tuples')
+    fields = data.items() if isinstance(data, dict) else (data or [])
+    for name, values in fields:
+        if isinstance(values, (string_types, bytes)) or \
+                not hasattr(values, '__iter__'):
+            values = [values]
+        for value in values:
+            if value is None:
+                continue
+            if not isinstance(value, bytes):
+                value = "{0}".format(value)
+            yield name, value
+
+
+def _form_data(files, data):
+    form = aiohttp.FormData()
+    for name, value in _form_fields(data):
+        form.add_field(name, value)
+    for name, value in files.items():
+        filename, content_type = name, None
+        if isinstance(value, tuple):
+            filename = value[0]
+            if len(value) > 2:
+                content_type = value[2]
+            value = value[1]
+        if hasattr(value, 'read'):
+            value = value.read()
+        form.add_field(name, value, filename=filename,
+                       content_type=content_type)
+    return form
+
+
+def _timeout(timeout):
+    if isinstance(timeout, (list, tuple)):
+        return aiohttp.ClientTimeout(
+            total=None, sock_connect=timeout[0], sock_read=timeout[1])
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+def _aiohttp_kwargs(request_kwargs, scheme):
+    """Convert requests arguments to aiohttp arguments, except ssl"""
+    kwargs = {
+        'headers': request_kwargs['headers'],
+        'params': _params(request_kwargs['params']),
+        'timeout': _timeout(request_kwargs['timeout']),
+    }
+    if request_kwargs['auth']:
+        user, password = request_kwargs['auth']
+        kwargs['auth'] = aiohttp.BasicAuth(user or '', password or '')
+    if request_kwargs['proxies']:
+        kwargs['proxy'] = request_kwargs['proxies'].get(scheme)
+    if request_kwargs['files']:
+        kwargs['data'] = _form_data(request_kwargs['files'],
+                                    request_kwargs['data'])
+    elif request_kwargs['json'] is not None:
+        kwargs['json'] = request_kwargs['json']
+    elif request_kwargs['data'] is not None:
+        kwargs['data'] = request_kwargs['data']
+    return kwargs
+
+
+def to_response(status, reason, headers, content, url, cookies=None):
+    """requests.Response with loaded content"""
+    response = requests.models.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = requests.utils.get_encoding_from_headers(
+        response.headers)
+    response._content = content
+    response._content_consumed = True
+    for name, value in (cookies or {}).items():
+        response.cookies.set(name, value)
+    return response
+
+
+async def _request(session, method, url, **kwargs):
+    """Send request, errors are converted to requests exceptions"""
+    try:
+        async with session.request(method, url, **kwargs) as response:
+            content = await response.read()
+            return to_response(
+                response.status, response.reason, response.headers,
+                content, str(response.url),
+                {name: morsel.value
+                 for name, morsel in response.cookies.items()})
+    except Exception as e:
+        if _CONNECT_TIMEOUT_ERROR and isinstance(e, _CONNECT_TIMEOUT_ERROR):
+            raise requests.exceptions.ConnectTimeout(e)
+        if isinstance(e, asyncio.TimeoutError):
+            raise requests.exceptions.ReadTimeout(e)
+        if isinstance(e, aiohttp.ClientConnectionError):
+            raise requests.exceptions.ConnectionError(e)
+        raise
+
+
+async def _run_async(flow, execute):
+    """utility._run for event loop"""
+    result = error = None
+    try:
+        while True:
+            try:
+                if error is None:
+                    operation = flow.send(result)
+                else:
+                    operation = flow.throw(error)
+                    error = None
+            except StopIteration as e:
+                return e.value
+            try:
+                result = await execute(operation)
+            except Exception as e:
+                result, error = None, e
+    finally:
+        flow.close()
+
+
+class _AsyncIO(object):
+    """Operations of control flow (see utility._SyncIO) done on event loop"""
+
+    def __init__(self, session, resource_callback=None,
+                 max_parallel_calls=MAX_PARALLEL_CALLS):
+        self.session = session
+        self.resource_callback = resource_callback
+        self.semaphore = asyncio.Semaphore(max(1, max_parallel_calls))
+
+    async def __call__(self, operation):
+        return await getattr(self, operation[0])(*operation[1:])
+
+    async def race(self, call, hosts, port):
+        # hosts are ordered by health, probes are not used on event loop
+        return HOSTS_HEALTH.order(hosts, port)
+
+    async def request(self, method, url, request_kwargs, key=None):
+        if request_kwargs.get('stream'):
+            # parser of stream reads body synchronously
+            raise WrongTemplateDataException(
+                'response_stream is not supported by process_async, '
+                'use process')
+        # keep-alive connections are kept by shared session
+        kwargs = _aiohttp_kwargs(request_kwargs, url.split(':', 1)[0])
+        kwargs['ssl'] = await _cached_ssl_context(request_kwargs['verify'],
+                                                  request_kwargs['cert'])
+        return await _request(self.session, method, url, **kwargs)
+
+    async def sleep(self, delay):
+        await asyncio.sleep(delay)
+
+    async def blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, func, *args)
+
+    async def call(self, call_with_request_props, retry_state=None):
+        return await _run_async(
+            _send_request_flow(call_with_request_props.copy(),
+                               self.resource_callback,
+                               retry_state=retry_state), self)
+
+    async def parallel(self, calls_with_request_props, retry_states=None):
+        async def _send(call_with_request_props, retry_state):
+            async with self.semaphore:
+                return await self.call(call_with_request_props, retry_state)
+
+        retry_states = retry_states or [None] * len(calls_with_request_props)
+        tasks = [asyncio.ensure_future(_send(call_with_request_props,
+                                             retry_state))
+                 for call_with_request_props, retry_state
+                 in zip(calls_with_request_props, retry_states)]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            # first failed call in template order raises
+            for task in tasks:
+                if task.done() and task.exception() is not None:
+                    raise task.exception()
+            return [task.result() for task in tasks]
+        finally:
+            # failed or cancelled run doesn't leave calls in background
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def wait(self, task):
+        return await task
+
+    # not blocking, used by flow directly
+
+    def start(self, call_with_request_props, retry_state=None):
+        """Start call in background"""
+        return asyncio.ensure_future(
+            self.call(call_with_request_props, retry_state))
+
+    def cancel(self, task):
+        task.cancel()
+
+
+async def process_async(params, template, request_props, prerender=False,
+                        resource_callback=False,
+                        max_parallel_calls=MAX_PARALLEL_CALLS,
+                        properties_dir=None, session=None):
+    """Same as utility.process, but calls are sent by aiohttp.
+
+    session: aiohttp.ClientSession shared between runs, by default session
+    is created for run (cookies are not shared between calls).
+    """
+    if aiohttp is None:
+        raise ImportError('process_async requires aiohttp package')
+    # template is parsed and prerendered out of event loop
+    rest_calls = await asyncio.get_running_loop().run_in_executor(
+        None, _load_rest_calls, template, params, prerender)
+    if not rest_calls:
+        logger.debug('Empty call list')
+        return {}
+
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession(
+            cookie_jar=aiohttp.DummyCookieJar())
+    try:
+        io = _AsyncIO(session, resource_callback, max_parallel_calls)
+        return await _run_async(
+            _process_calls_flow(rest_calls, params, request_props, io,
+                                properties_dir), io)
+    finally:
+        if own_session:
+            await session.close()
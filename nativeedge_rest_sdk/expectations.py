@@ -0,0 +1,85 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import re
+
+from nativeedge_common_sdk.caching import LRUCache
+from nativeedge_common_sdk.exceptions import (
+    ExpectationException,
+    WrongTemplateDataException,
+    NonRecoverableResponseException,
+    RecoverableResponseException)
+
+# compiled response_expectation/nonrecoverable_response rules
+MATCHERS_CACHE = LRUCache(maxsize=256)
+
+
+class ResponseMatcher(object):
+    """Single rule: path to value in response and regexp for value"""
+
+    __slots__ = ('path', 'pattern', 'regexp', 'is_recoverable')
+
+    def __init__(self, path, pattern, is_recoverable):
+        self.path = tuple(path)
+        self.pattern = pattern
+        self.regexp = re.compile(pattern)
+        self.is_recoverable = is_recoverable
+
+    def get_value(self, json):
+        for key in self.path:
+            try:
+                json = json[key]
+            except (TypeError, IndexError, KeyError):
+                raise ExpectationException(
+                    'No key or index "{}" in json {}'.format(key, json))
+        return json
+
+    def check(self, json):
+        value = "{0}".format(self.get_value(json))
+        matched = self.regexp.match(value)
+        if matched and not self.is_recoverable:
+            raise NonRecoverableResponseException(
+                "Giving up... \n"
+                "Response value: "
+                "{} matches regexp:{} from nonrecoverable_response. ".format(
+                    value, self.pattern))
+        if not matched and self.is_recoverable:
+            raise RecoverableResponseException(
+                "Trying one more time...\n"
+                "Response value:{} does not match regexp: {} "
+                "from response_expectation".format(
+                    value, self.pattern))
+
+
+def _compile_rules(response, is_recoverable, matchers):
+    if not response:
+        return
+    if not isinstance(response, list):
+        raise WrongTemplateDataException(
+            "Response ({}) had to be list. "
+            "Type {} not supported. ".format(
+                "recoverable" if is_recoverable else "nonrecoverable",
+                type(response)))
+    if isinstance(response[0], list):
+        for item in response:
+            _compile_rules(item, is_recoverable, matchers)
+    else:
+        matchers.append(
+            ResponseMatcher(response[:-1], response[-1], is_recoverable))
+
+
+def compile_rules(response, is_recoverable):
+    """Compile rules to tuple of matchers, rules are not changed"""
+    def _create():
+        matchers = []
+        _compile_rules(response, is_recoverable, matchers)
+        return tuple(matchers)
+
+    if not response:
+        return ()
+    return MATCHERS_CACHE.get_or_create(
+        repr((response, is_recoverable)), _create)
+
+
+def check_response(json, response, is_recoverable):
+    for matcher in compile_rules(response, is_recoverable):
+        matcher.check(json)
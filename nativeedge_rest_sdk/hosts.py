@@ -0,0 +1,153 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from nativeedge_rest_sdk import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# max concurrent probes of all races
+MAX_PROBES = 16
+
+
+def _probe(host, port, timeout):
+    """Check that tcp connection to host can be established"""
+    try:
+        sock = socket.create_connection((host, port), timeout=timeout)
+    except (OSError, socket.error) as e:
+        logger.debug('Host {}:{} is not available: {}'.format(
+            host, port, repr(e)))
+        return False
+    sock.close()
+    return True
+
+
+def _probe_until(host, port, deadline):
+    """_probe limited by end of race, None if race is already finished"""
+    timeout = deadline - time.time()
+    if timeout <= 0:
+        return None
+    return _probe(host, port, timeout)
+
+
+class HostsHealth(object):
+    """Remember which hosts from `hosts` list are alive.
+
+    Every connection failure adds penalty to host, penalty is halved each
+    half_life seconds. Successful request resets penalty, so the last healthy
+    host is tried first on next call.
+    """
+
+    def __init__(self, half_life=300, max_probes=MAX_PROBES):
+        self.half_life = half_life
+        self.max_probes = max_probes
+        # (host, port) => [penalty, penalty_time, last_success]
+        self._state = {}
+        self._lock = threading.Lock()
+        # shared by races, created on first race
+        self._executor = None
+
+    def _penalty(self, state, now):
+        penalty, penalty_time, _ = state
+        return penalty * 0.5 ** ((now - penalty_time) / self.half_life)
+
+    def failure(self, host, port):
+        now = time.time()
+        with self._lock:
+            state = self._state.setdefault((host, port), [0, now, 0])
+            state[0] = self._penalty(state, now) + 1
+            state[1] = now
+
+    def success(self, host, port):
+        with self._lock:
+            self._state[(host, port)] = [0, time.time(), time.time()]
+
+    def reset(self):
+        with self._lock:
+            self._state = {}
+
+    def _keys(self, hosts, port):
+        now = time.time()
+        with self._lock:
+            states = [self._state.get((host, port)) for host in hosts]
+            return [
+                (self._penalty(state, now), -state[2]) if state else (0, 0)
+                for state in states]
+
+    def order(self, hosts, port):
+        """Sort hosts: less failures first, then recently successful"""
+        keys = self._keys(hosts, port)
+        return [
+            host for _, _, host in sorted(
+                zip(keys, range(len(hosts)), hosts))]
+
+    def _probes(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_probes)
+            return self._executor
+
+    def race(self, hosts, port, delay=0.25, timeout=10):
+        """Start connection to hosts with staggered delays.
+
+        Returns hosts list with first host which accepted connection at the
+        beginning, other hosts are kept in order() as fallback. Last healthy
+        host without failures is returned first without probes.
+        """
+        keys = self._keys(hosts, port)
+        hosts = [
+            host for _, _, host in sorted(
+                zip(keys, range(len(hosts)), hosts))]
+        penalty, last_success = min(keys)
+        if len(hosts) < 2 or (not penalty and last_success):
+            return hosts
+        deadline = time.time() + timeout
+        executor = self._probes()
+        futures = {}
+        winner = None
+        try:
+            for host in hosts:
+                futures[executor.submit(
+                    _probe_until, host, port, deadline)] = host
+                winner = self._wait_winner(
+                    futures, min(deadline, time.time() + delay))
+                if winner:
+                    break
+            else:
+                winner = self._wait_winner(futures, deadline)
+        finally:
+            # slow probes are finished in background until deadline
+            for future in futures:
+                future.cancel()
+        for future, host in futures.items():
+            if future.done() and not future.cancelled() and \
+                    future.result() is False:
+                self.failure(host, port)
+        if not winner:
+            logger.debug('No host accepted connection in {} seconds'.format(
+                timeout))
+            return hosts
+        logger.debug('Host {} answered first'.format(repr(winner)))
+        return [winner] + [host for host in hosts if host != winner]
+
+    @staticmethod
+    def _wait_winner(futures, until):
+        """Wait for first accepted connection until time or all failed"""
+        while True:
+            for future, host in futures.items():
+                if future.done() and future.result():
+                    return host
+            pending = [future for future in futures if not future.done()]
+            timeout = until - time.time()
+            if not pending or timeout <= 0:
+                return None
+            wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+
+# hosts state shared between all process() runs in worker
+HOSTS_HEALTH = HostsHealth()
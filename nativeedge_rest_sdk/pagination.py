@@ -0,0 +1,132 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import logging
+
+from nativeedge_rest_sdk import LOGGER_NAME
+from nativeedge_common_sdk._compat import urlparse
+from nativeedge_common_sdk.filters import get_field_value_recursive
+from nativeedge_common_sdk.exceptions import WrongTemplateDataException
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# next page url in Link header
+PAGINATION_LINK = 'link'
+# next page url in response body
+PAGINATION_NEXT = 'next'
+# next page token in response body, sent as url param
+PAGINATION_CURSOR = 'cursor'
+# offset/limit url params
+PAGINATION_OFFSET = 'offset'
+
+PAGINATION_TYPES = (PAGINATION_LINK, PAGINATION_NEXT, PAGINATION_CURSOR,
+                    PAGINATION_OFFSET)
+
+DEFAULT_MAX_PAGES = 1000
+
+
+class Paginator(object):
+    """Build requests for next pages of call by `pagination` settings"""
+
+    def __init__(self, settings):
+        if not isinstance(settings, dict):
+            raise WrongTemplateDataException(
+                "Pagination had to be dict. Type {} not supported. ".format(
+                    type(settings)))
+        self.type = settings.get('type', PAGINATION_LINK)
+        if self.type not in PAGINATION_TYPES:
+            raise WrongTemplateDataException(
+                "Pagination type {} is not supported. Supported: {}".format(
+                    repr(self.type), ", ".join(PAGINATION_TYPES)))
+        self.next_path = settings.get('next_path', ['next'])
+        self.cursor_path = settings.get('cursor_path', ['cursor'])
+        self.cursor_param = settings.get('cursor_param', 'cursor')
+        self.items_path = settings.get('items_path', [])
+        self.offset_param = settings.get('offset_param', 'offset')
+        self.limit_param = settings.get('limit_param', 'limit')
+        self.limit = int(settings.get('limit', 100))
+        self.start = int(settings.get('start', 0))
+        self.max_pages = int(settings.get('max_pages', DEFAULT_MAX_PAGES))
+        self.prefetch = bool(settings.get('prefetch', False))
+        self.page = 0
+
+    def response_paths(self):
+        """Parts of response body used for find next page"""
+        if self.type == PAGINATION_NEXT:
+            return [self.next_path]
+        if self.type == PAGINATION_CURSOR:
+            return [self.cursor_path]
+        if self.type == PAGINATION_OFFSET:
+            return [self.items_path]
+        return []
+
+    def _with_params(self, call, new_params):
+        page_call = call.copy()
+        params = dict(call.get('params') or {})
+        params.update(new_params)
+        page_call['params'] = params
+        return page_call
+
+    def request(self, call):
+        """Call for current page, original call is not changed"""
+        if self.type == PAGINATION_OFFSET:
+            return self._with_params(call, {
+                self.offset_param: self.start + self.page * self.limit,
+                self.limit_param: self.limit})
+        return call.copy()
+
+    def _get(self, json, path):
+        return get_field_value_recursive(logger, json, path)
+
+    def next_request(self, call, response, json):
+        """Call for next page or None if current page is last"""
+        if self.page + 1 >= self.max_pages:
+            logger.warning(
+                'Pagination stopped after {} pages'.format(self.max_pages))
+            return None
+        if self.type == PAGINATION_OFFSET:
+            items = self._get(json, self.items_path)
+            if not isinstance(items, list) or len(items) < self.limit:
+                return None
+            self.page += 1
+            return self.request(call)
+        if self.type == PAGINATION_CURSOR:
+            cursor = self._get(json, self.cursor_path)
+            if not cursor:
+                return None
+            self.page += 1
+            return self._with_params(call, {self.cursor_param: cursor})
+        if self.type == PAGINATION_NEXT:
+            next_url = self._get(json, self.next_path)
+        else:
+            next_url = (getattr(response, 'links', None) or {}).get(
+                'next', {}).get('url')
+        if not next_url:
+            return None
+        self.page += 1
+        parsed = urlparse(next_url)
+        page_call = call.copy()
+        # params are already in next url
+        page_call['params'] = {}
+        path = parsed.path or call.get('path', '').split('?')[0]
+        page_call['path'] = path + (
+            '?' + parsed.query if parsed.query else '')
+        return page_call
+
+
+def create_paginator(call):
+    settings = call.get('pagination') if isinstance(call, dict) else None
+    if not settings:
+        return None
+    return Paginator(settings)
+
+
+def merge_page(result_properties, page_properties):
+    """Merge translated page to results: lists extended, dicts merged"""
+    for key, value in page_properties.items():
+        current = result_properties.get(key)
+        if isinstance(current, list) and isinstance(value, list):
+            current.extend(value)
+        elif isinstance(current, dict) and isinstance(value, dict):
+            merge_page(current, value)
+        else:
+            result_properties[key] = value
@@ -0,0 +1,120 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import json
+import logging
+import tempfile
+
+from nativeedge_rest_sdk import LOGGER_NAME
+from nativeedge_common_sdk.caching import content_hash
+from nativeedge_common_sdk.exceptions import WrongTemplateDataException
+
+logger = logging.getLogger(LOGGER_NAME)
+
+TEMPLATE_PROPERTY_PROPERTIES_LIMIT = 'properties_limit'
+# key of reference to spilled value
+SPILLED_FILE = '__file__'
+DEFAULT_MAX_VALUE_SIZE = 64 * 1024
+DEFAULT_MAX_TOTAL_SIZE = 1024 * 1024
+# subdirectory of node instance directory for spilled values
+PROPERTIES_DIRECTORY = 'properties'
+
+
+def is_spilled(value):
+    return isinstance(value, dict) and SPILLED_FILE in value
+
+
+def load_property(value):
+    """Value of property, spilled value is read from file"""
+    if not is_spilled(value):
+        return value
+    with open(value[SPILLED_FILE], 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def _node_instance_dir():
+    # utils requires operation context packages
+    from nativeedge_common_sdk.utils import get_node_instance_dir
+    return get_node_instance_dir()
+
+
+def default_directory():
+    """Directory of node instance in operation, else temporary directory"""
+    try:
+        return os.path.join(_node_instance_dir(), PROPERTIES_DIRECTORY)
+    except Exception as e:
+        logger.debug('No node instance directory: {}'.format(repr(e)))
+    return os.path.join(tempfile.gettempdir(), 'nativeedge-rest-properties')
+
+
+def _serialize(value):
+    return json.dumps(value, default=str).encode('utf-8')
+
+
+class PropertiesWriter(object):
+    """Keep result properties in size budget.
+
+    Values bigger than max_value_size and, while total size is bigger than
+    max_total_size, biggest values are saved to files named by content hash
+    and replaced by reference: {"__file__": path, "size": ..., "sha256": ...}.
+    Same content is written only once.
+    """
+
+    def __init__(self, settings, directory=None):
+        if not isinstance(settings, dict):
+            raise WrongTemplateDataException(
+                "Properties limit had to be dict. Type {} not supported. "
+                .format(type(settings)))
+        self.max_value_size = int(
+            settings.get('max_value_size', DEFAULT_MAX_VALUE_SIZE))
+        self.max_total_size = int(
+            settings.get('max_total_size', DEFAULT_MAX_TOTAL_SIZE))
+        self.directory = settings.get('directory') or directory or \
+            default_directory()
+
+    @classmethod
+    def from_call(cls, call, directory=None):
+        settings = call.get(TEMPLATE_PROPERTY_PROPERTIES_LIMIT)
+        if not settings:
+            return None
+        return cls(settings, directory)
+
+    def _spill(self, data):
+        digest = content_hash(data)
+        path = os.path.join(self.directory, digest + '.json')
+        if not os.path.isfile(path):
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.rename(tmp_path, path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        logger.debug('Value with size {} saved to {}'.format(
+            len(data), path))
+        return {SPILLED_FILE: path, 'size': len(data), 'sha256': digest}
+
+    def apply(self, properties):
+        """Replace oversized top level values by references, in place"""
+        sizes = []
+        total = 0
+        for key, value in properties.items():
+            if is_spilled(value):
+                continue
+            data = _serialize(value)
+            if len(data) > self.max_value_size:
+                properties[key] = self._spill(data)
+            else:
+                sizes.append((len(data), key, data))
+                total += len(data)
+        if total <= self.max_total_size:
+            return properties
+        for size, key, data in sorted(sizes, key=lambda item: -item[0]):
+            properties[key] = self._spill(data)
+            total -= size
+            if total <= self.max_total_size:
+                break
+        return properties
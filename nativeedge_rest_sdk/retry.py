@@ -0,0 +1,84 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import time
+import random
+import calendar
+from email.utils import parsedate_tz, mktime_tz
+
+from nativeedge_common_sdk.exceptions import WrongTemplateDataException
+
+TEMPLATE_PROPERTY_RETRY = 'retry'
+
+
+def parse_retry_after(value, now=None):
+    """Seconds from Retry-After header (delay in seconds or http date)"""
+    if value is None:
+        return None
+    value = "{0}".format(value).strip()
+    if value.isdigit():
+        return int(value)
+    parsed = parsedate_tz(value)
+    if not parsed:
+        return None
+    if now is None:
+        now = calendar.timegm(time.gmtime())
+    return max(0, mktime_tz(parsed) - now)
+
+
+class RetryPolicy(object):
+    """Per call retries with exponential backoff.
+
+    Delay before attempt N+1 is backoff * backoff_factor ** (N - 1), limited
+    by max_backoff; with jitter random value between 0 and delay is used.
+    Retry-After response header has priority over calculated delay.
+    """
+
+    def __init__(self, settings):
+        if not isinstance(settings, dict):
+            raise WrongTemplateDataException(
+                "Retry had to be dict. Type {} not supported. ".format(
+                    type(settings)))
+        self.max_attempts = int(settings.get('max_attempts', 3))
+        self.backoff = float(settings.get('backoff', 1))
+        self.backoff_factor = float(settings.get('backoff_factor', 2))
+        self.max_backoff = float(settings.get('max_backoff', 60))
+        self.jitter = bool(settings.get('jitter', True))
+        self.retry_after = bool(settings.get('retry_after', True))
+        self.on_codes = list(settings.get('on_codes', [429, 503]))
+        self.on_expectation = bool(settings.get('on_expectation', True))
+
+    @classmethod
+    def from_call(cls, call):
+        settings = call.get(TEMPLATE_PROPERTY_RETRY)
+        if not settings:
+            return None
+        return cls(settings)
+
+    def can_retry(self, attempt):
+        return attempt < self.max_attempts
+
+    def next_delay(self, attempt, response=None):
+        """Delay before next attempt, None if attempts are exhausted"""
+        if not self.can_retry(attempt):
+            return None
+        if self.retry_after and response is not None:
+            retry_after = parse_retry_after(
+                (getattr(response, 'headers', None) or {}).get(
+                    'Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        delay = min(self.backoff * self.backoff_factor ** (attempt - 1),
+                    self.max_backoff)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class RetryState(object):
+    """Attempt of one call, status codes and response expectation are
+    retried with same counter, so delays follow one schedule"""
+
+    __slots__ = ('attempt',)
+
+    def __init__(self):
+        self.attempt = 1
@@ -0,0 +1,192 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from nativeedge_rest_sdk import LOGGER_NAME
+from nativeedge_common_sdk.caching import content_hash
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def _hashable(value):
+    """Convert dict/list props (proxies, cert) to something usable as key"""
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (k, _hashable(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def session_key(scheme, host, port, verify=True, cert=None, proxies=None):
+    return (scheme, host, port,
+            _hashable(verify), _hashable(cert), _hashable(proxies))
+
+
+class SessionPool(object):
+    """Keep-alive requests sessions shared between calls.
+
+    Each session is used by one call at a time, idle sessions are kept
+    per key (scheme, host, port, verify, cert, proxies) and closed after
+    idle_timeout seconds or when more than maxsize sessions are idle.
+
+    Inline certificates are saved by inline_file() to one file per
+    content, key has content_hash of certificate. File is kept while it
+    is used by call or by session of key, so urllib3 connection pools of
+    session are reused with same file path.
+    """
+
+    def __init__(self, maxsize=16, idle_timeout=60,
+                 pool_connections=10, pool_maxsize=10):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        # list of (last_used, key, session), most recently used at the end
+        self._idle = []
+        # content_hash => [path, users] of inline certificates
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize=None, idle_timeout=None,
+                  pool_connections=None, pool_maxsize=None):
+        """Change pool settings, already created sessions are kept"""
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+        if pool_connections is not None:
+            self.pool_connections = pool_connections
+        if pool_maxsize is not None:
+            self.pool_maxsize = pool_maxsize
+        self.evict()
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _use_files(self, names, users):
+        """Change users of inline files, returns paths of unused files"""
+        unused = []
+        for name in names:
+            entry = self._files.get(name) if isinstance(name, str) \
+                else None
+            if entry is None:
+                continue
+            entry[1] += users
+            if entry[1] <= 0:
+                del self._files[name]
+                unused.append(entry[0])
+        return unused
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except Exception as e:
+                logger.debug('Cant remove temporary file {path}: {error}'
+                             .format(path=path, error=repr(e)))
+
+    def _close(self, items):
+        """Close (key, session) items and remove their unused files"""
+        unused = []
+        for key, session in items:
+            session.close()
+            with self._lock:
+                # verify and cert of key
+                unused.extend(self._use_files(key[3:5], -1))
+        self._remove_files(unused)
+
+    def inline_file(self, content):
+        """Save inline certificate, returns (content_hash, path).
+
+        Same content has same path while file is used, call must
+        release_file() after request.
+        """
+        name = content_hash(content)
+        with self._lock:
+            entry = self._files.get(name)
+            if entry is None:
+                fd, path = tempfile.mkstemp()
+                try:
+                    os.write(fd, content.encode())
+                finally:
+                    os.close(fd)
+                entry = self._files[name] = [path, 0]
+            entry[1] += 1
+        return name, entry[0]
+
+    def release_file(self, name):
+        with self._lock:
+            unused = self._use_files([name], -1)
+        self._remove_files(unused)
+
+    def acquire(self, key):
+        self.evict()
+        with self._lock:
+            for idx in range(len(self._idle) - 1, -1, -1):
+                if self._idle[idx][1] == key:
+                    logger.debug('Reuse session for {}'.format(repr(key[:3])))
+                    return self._idle.pop(idx)[2]
+            # inline files are kept for session
+            self._use_files(key[3:5], 1)
+        logger.debug('New session for {}'.format(repr(key[:3])))
+        return self._create_session()
+
+    def release(self, key, session):
+        # cookies must not be shared between unrelated calls
+        session.cookies.clear()
+        with self._lock:
+            self._idle.append((time.time(), key, session))
+        self.evict()
+
+    def evict(self):
+        """Close sessions idle for too long or above pool size"""
+        to_close = []
+        with self._lock:
+            deadline = time.time() - self.idle_timeout
+            while self._idle and (
+                len(self._idle) > self.maxsize or
+                self._idle[0][0] < deadline
+            ):
+                to_close.append(self._idle.pop(0)[1:])
+        self._close(to_close)
+
+    def close(self):
+        """Close all idle sessions"""
+        with self._lock:
+            to_close = [item[1:] for item in self._idle]
+            self._idle = []
+        self._close(to_close)
+
+    def __len__(self):
+        return len(self._idle)
+
+    @contextmanager
+    def session(self, key):
+        session = self.acquire(key)
+        try:
+            yield session
+        except Exception:
+            # connection state is unknown, don't reuse it
+            self._close([(key, session)])
+            raise
+        else:
+            self.release(key, session)
+
+
+# sessions shared between all process() runs in worker
+SESSION_POOL = SessionPool()
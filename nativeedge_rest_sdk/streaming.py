@@ -0,0 +1,349 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+"""Parse streamed responses and keep only parts used by template rules.
+
+Required parts are described by tree of dicts: key is dict key or list index
+(as string), '*' is any list item, ALL marks subtree which is kept as is.
+Skipped list items are replaced by None, so indexes are not changed.
+"""
+
+import re
+import json
+import codecs
+
+import xmltodict
+
+from nativeedge_common_sdk.filters import _check_if_v2
+
+# keep whole subtree
+ALL = True
+# any item in list
+ANY_ITEM = '*'
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def add_path(paths, path):
+    """Mark path (list of keys) as required"""
+    if paths is ALL or not path:
+        return ALL
+    if paths is None:
+        paths = {}
+    key = "{0}".format(path[0])
+    paths[key] = add_path(paths.get(key), path[1:])
+    return paths
+
+
+def merge_paths(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    if first is ALL or second is ALL:
+        return ALL
+    result = dict(first)
+    for key, value in second.items():
+        result[key] = merge_paths(result.get(key), value)
+    return result
+
+
+def _v1_paths(rule, prefix, paths):
+    if isinstance(rule, list):
+        for idx, value in enumerate(rule):
+            if isinstance(value, (list, dict)):
+                paths = _v1_paths(value, prefix + [idx], paths)
+            else:
+                # current value is saved
+                paths = add_path(paths, prefix)
+    elif isinstance(rule, dict):
+        for key, value in rule.items():
+            if isinstance(value, (list, dict)):
+                paths = _v1_paths(value, prefix + [key], paths)
+            else:
+                paths = add_path(paths, prefix + [key])
+    return paths
+
+
+def _v2_paths(rule, paths):
+    for translation in rule or []:
+        path = []
+        for key in translation[0]:
+            if isinstance(key, list):
+                path += [ANY_ITEM, key[0]]
+            else:
+                path.append(key)
+        paths = add_path(paths, path)
+    return paths
+
+
+def _v3_paths(rule, paths):
+    for param_name in rule or {}:
+        paths = add_path(paths, rule[param_name])
+    return paths
+
+
+def translation_paths(response_translation, translation_version="auto"):
+    """Parts of response used by translate_and_save"""
+    if translation_version not in ("auto", "v1", "v2", "v3"):
+        return ALL
+    try:
+        if translation_version == "v3":
+            return _v3_paths(response_translation, None)
+        if _check_if_v2(response_translation) or translation_version == "v2":
+            return _v2_paths(response_translation, None)
+        return _v1_paths(response_translation, [], None)
+    except (TypeError, IndexError, AttributeError, KeyError):
+        # rule is broken, let translation report it on full response
+        return ALL
+
+
+def expectation_paths(response):
+    """Parts of response used by response_expectation rules"""
+    if not response:
+        return None
+    if not isinstance(response, list):
+        return ALL
+    if isinstance(response[0], list):
+        paths = None
+        for item in response:
+            paths = merge_paths(paths, expectation_paths(item))
+        return paths
+    return add_path(None, response[:-1])
+
+
+def _is_index(key):
+    return key.isdigit() and "{0}".format(int(key)) == key
+
+
+def _list_common_paths(paths):
+    """Paths which can't be matched by position, applied to each item"""
+    if not isinstance(paths, dict):
+        return paths
+    common = None
+    for key, value in paths.items():
+        if not _is_index(key):
+            common = merge_paths(common, value)
+    return common
+
+
+def _item_paths(paths, common, idx):
+    if paths is None or paths is ALL:
+        return paths
+    return merge_paths(common, paths.get("{0}".format(idx)))
+
+
+# whitespace, then structure char, string or literal
+_JSON_TOKEN_RE = re.compile(
+    r'[ \t\n\r]*(?:([\[\]{}:,])|("[^"\\]*(?:\\.[^"\\]*)*")|'
+    r'([^ \t\n\r\[\]{}:,"]+))')
+
+
+class _JsonTokens(object):
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buff = ''
+        self._pos = 0
+        self._eof = False
+        self._pending = None
+
+    def _read(self):
+        # read at least size of unparsed tail, so long values are rescanned
+        # only logarithmic number of times
+        tail = self._buff[self._pos:]
+        parts = [tail]
+        size = 0
+        while size <= len(tail):
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._eof = True
+                break
+            parts.append(chunk)
+            size += len(chunk)
+        self._buff = ''.join(parts)
+        self._pos = 0
+
+    def next(self):
+        if self._pending:
+            match, self._pending = self._pending, None
+            return match
+        while True:
+            match = _JSON_TOKEN_RE.match(self._buff, self._pos)
+            # literal can be continued in next chunk
+            if match and (
+                match.group(3) is None or
+                match.end() < len(self._buff) or
+                self._eof
+            ):
+                self._pos = match.end()
+                return match
+            if self._eof:
+                if self._buff[self._pos:].strip():
+                    raise ValueError(
+                        'Unexpected data at: {}'.format(
+                            repr(self._buff[self._pos:self._pos + 20])))
+                raise ValueError('Unexpected end of JSON')
+            self._read()
+
+    def peek(self):
+        if not self._pending:
+            self._pending = self.next()
+        return self._pending
+
+    def finish(self):
+        while not self._eof:
+            self._read()
+        if self._pending or self._buff[self._pos:].strip():
+            raise ValueError('Extra data after JSON')
+
+
+def _json_value(tokens, paths, match):
+    token = match.group(1)
+    if token == '{':
+        return _json_object(tokens, paths)
+    if token == '[':
+        return _json_array(tokens, paths)
+    if token:
+        raise ValueError('Unexpected {}'.format(repr(token)))
+    if paths is None:
+        return None
+    return json.loads(match.group(2) or match.group(3))
+
+
+def _json_object(tokens, paths):
+    result = {} if paths is not None else None
+    match = tokens.next()
+    if match.group(1) == '}':
+        return result
+    while True:
+        if match.group(2) is None:
+            raise ValueError('Expected key, got {}'.format(
+                repr(match.group(0))))
+        if tokens.next().group(1) != ':':
+            raise ValueError('Expected ":"')
+        if paths is None:
+            key, child = None, None
+        else:
+            key = json.loads(match.group(2))
+            child = paths if paths is ALL else paths.get(key)
+        value = _json_value(tokens, child, tokens.next())
+        if child is not None:
+            result[key] = value
+        match = tokens.next()
+        if match.group(1) == '}':
+            return result
+        if match.group(1) != ',':
+            raise ValueError('Expected "," or "}"')
+        match = tokens.next()
+
+
+def _json_array(tokens, paths):
+    result = [] if paths is not None else None
+    common = _list_common_paths(paths)
+    match = tokens.next()
+    if match.group(1) == ']':
+        return result
+    idx = 0
+    while True:
+        child = _item_paths(paths, common, idx)
+        value = _json_value(tokens, child, match)
+        if result is not None:
+            result.append(value)
+        idx += 1
+        match = tokens.next()
+        if match.group(1) == ']':
+            return result
+        if match.group(1) != ',':
+            raise ValueError('Expected "," or "]"')
+        match = tokens.next()
+
+
+def parse_json_stream(chunks, paths=ALL):
+    """Parse json from text chunks, keep only required paths.
+
+    Returns tuple of value and flag that original document is empty.
+    """
+    if paths is None:
+        paths = {}
+    tokens = _JsonTokens(chunks)
+    match = tokens.next()
+    if match.group(1) in ('{', '['):
+        empty = tokens.peek().group(1) in ('}', ']')
+        value = _json_value(tokens, paths, match)
+    else:
+        value = _json_value(tokens, ALL, match)
+        empty = not value
+    tokens.finish()
+    return value, empty
+
+
+def _xml_element_paths(paths):
+    """Xml repeated elements are list, so index is applied to element"""
+    if not isinstance(paths, dict):
+        return paths
+    result = paths
+    for key, value in paths.items():
+        if key == ANY_ITEM or _is_index(key) or key.startswith('-'):
+            result = merge_paths(result, value)
+    return result
+
+
+def _xml_paths(paths, names):
+    for name in names:
+        if paths is None or paths is ALL:
+            return paths
+        paths = _xml_element_paths(paths.get(name))
+    return paths
+
+
+class _ChunksReader(object):
+    """File like wrapper for bytes chunks iterator"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buff = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buff) < size:
+            try:
+                self._buff += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buff)
+        result, self._buff = self._buff[:size], self._buff[size:]
+        return result
+
+
+def parse_xml_stream(chunks, paths=ALL):
+    """Parse xml from bytes chunks as xmltodict, keep only required paths"""
+    if paths is None:
+        paths = {}
+    cache = {}
+
+    def _postprocessor(path, key, value):
+        names = tuple(name for name, _ in path)
+        if not names or names[-1] != key:
+            # attribute or text of element
+            names += (key,)
+        if names not in cache:
+            cache[names] = _xml_paths(paths, names)
+        if cache[names] is None:
+            return None
+        return key, value
+
+    return xmltodict.parse(_ChunksReader(chunks),
+                           postprocessor=_postprocessor) or {}
+
+
+def iter_text(response, chunk_size=STREAM_CHUNK_SIZE):
+    """Decode streamed response content to text chunks"""
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
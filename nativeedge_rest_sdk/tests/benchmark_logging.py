@@ -0,0 +1,78 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+"""Compare eager and lazy log formatting of large response.
+
+Run: python -m nativeedge_rest_sdk.tests.benchmark_logging
+"""
+
+from __future__ import print_function
+import json
+import timeit
+import logging
+
+import mock
+
+from nativeedge_rest_sdk import utility
+from nativeedge_common_sdk.filters import (
+    LazyLogText,
+    shorted_text,
+    obfuscate_passwords)
+
+TEMPLATE = """
+    rest_calls:
+    - ssl: false
+      path: /items
+      method: get
+      host: localhost
+      port: 80
+      response_format: json
+      response_translation:
+        total: [total]"""
+
+ITEMS = [{'id': idx, 'name': 'item{}'.format(idx), 'password': 'secret'}
+         for idx in range(20000)]
+BODY = {'total': len(ITEMS), 'items': ITEMS}
+
+
+def _response():
+    response = mock.Mock()
+    response.status_code = 200
+    response.headers = {'Content-Type': 'application/json'}
+    response.cookies = {}
+    response.content = json.dumps(BODY).encode()
+    response.text = response.content.decode()
+    response.json = mock.Mock(return_value=BODY)
+    return response
+
+
+def eager(logger):
+    logger.debug('Response: {}'.format(shorted_text(obfuscate_passwords(
+        BODY))))
+
+
+def lazy(logger):
+    logger.debug('Response: %s', LazyLogText(BODY))
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger(utility.LOGGER_NAME)
+    logger.setLevel(logging.INFO)
+    print('eager debug dump: {:.4f}s'.format(
+        timeit.timeit(lambda: eager(logger), number=10) / 10))
+    print('lazy debug dump:  {:.6f}s'.format(
+        timeit.timeit(lambda: lazy(logger), number=10) / 10))
+    response = _response()
+    with mock.patch("nativeedge_rest_sdk.utility.requests.request",
+                    mock.Mock(return_value=response)):
+        for level in (logging.DEBUG, logging.WARNING):
+            logger.setLevel(level)
+            print('process() with {}: {:.4f}s'.format(
+                logging.getLevelName(level),
+                timeit.timeit(
+                    lambda: utility.process({}, TEMPLATE, {}),
+                    number=5) / 5))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import json
+import asyncio
+import unittest
+import threading
+
+import requests
+
+from nativeedge_rest_sdk import aio
+from nativeedge_common_sdk import exceptions
+
+if aio.aiohttp:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+
+class TestAio(unittest.TestCase):
+
+    def test_to_response(self):
+        response = aio.to_response(
+            404, 'Not Found',
+            {'Content-Type': 'application/json; charset=utf-8'},
+            b'{"a": "b"}', 'http://localhost/a', {'c': 'd'})
+        self.assertEqual(response.headers['content-type'],
+                         'application/json; charset=utf-8')
+        self.assertEqual(response.json(), {'a': 'b'})
+        self.assertEqual(response.text, '{"a": "b"}')
+        self.assertEqual(list(response.iter_content(chunk_size=4)),
+                         [b'{"a"', b': "b', b'"}'])
+        self.assertEqual(response.cookies.get_dict(), {'c': 'd'})
+        with self.assertRaises(requests.exceptions.HTTPError):
+            response.raise_for_status()
+
+    def test_params(self):
+        self.assertEqual(
+            aio._params({'a': 1, 'b': [True, 'c'], 'd': None}),
+            [('a', '1'), ('b', 'true'), ('b', 'c')])
+
+    def test_ssl_context(self):
+        self.assertIsNone(aio._ssl_context())
+        self.assertFalse(aio._ssl_context(False))
+        with self.assertRaises(Exception):
+            aio._ssl_context('not a certificate')
+
+    def test_cached_ssl_context(self):
+        with open(requests.certs.where()) as ca_file:
+            ca_content = ca_file.read()
+
+        async def _main():
+            return [await aio._cached_ssl_context(verify)
+                    for verify in [requests.certs.where(), ca_content,
+                                   ca_content, True]]
+
+        aio.SSL_CONTEXTS.clear()
+        by_path, by_content, cached, default = asyncio.run(_main())
+        self.assertIsNot(by_path, by_content)
+        self.assertIs(by_content, cached)
+        self.assertIsNone(default)
+        self.assertEqual(len(aio.SSL_CONTEXTS), 2)
+        aio.SSL_CONTEXTS.clear()
+
+    def test_form_fields(self):
+        self.assertEqual(
+            list(aio._form_fields({'a': [1, None, b'b'], 'c': 'd'})),
+            [('a', '1'), ('a', b'b'), ('c', 'd')])
+        self.assertEqual(list(aio._form_fields([('a', 'b'), ('a', 'c')])),
+                         [('a', 'b'), ('a', 'c')])
+        self.assertEqual(list(aio._form_fields(None)), [])
+        with self.assertRaises(ValueError):
+            list(aio._form_fields('a=b'))
+
+    def test_parallel_cancel(self):
+        cancelled = []
+
+        async def _call(call_with_request_props, retry_state=None):
+            if call_with_request_props['fail']:
+                raise requests.exceptions.ConnectionError('failed')
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(call_with_request_props['name'])
+                raise
+
+        async def _main(fail):
+            io = aio._AsyncIO(None)
+            io.call = _call
+            task = asyncio.ensure_future(io.parallel([
+                {'name': 'slow', 'fail': False},
+                {'name': 'failed', 'fail': fail}]))
+            if not fail:
+                await asyncio.sleep(0.01)
+                task.cancel()
+            return await task
+
+        # failed call cancels others
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            asyncio.run(_main(True))
+        self.assertEqual(cancelled, ['slow'])
+        # cancelled run cancels calls
+        del cancelled[:]
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(_main(False))
+        self.assertEqual(sorted(cancelled), ['failed', 'slow'])
+
+
+@unittest.skipIf(aio.aiohttp is None, 'aiohttp is not installed')
+class TestProcessAsync(unittest.TestCase):
+
+    def _run(self, handlers, template, params=None, **kwargs):
+        async def _main():
+            app = web.Application()
+            for method, path, handler in handlers:
+                app.router.add_route(method, path, handler)
+            server = TestServer(app, host='127.0.0.1')
+            await server.start_server()
+            try:
+                return await aio.process_async(
+                    params or {}, template,
+                    {'host': '127.0.0.1', 'port': server.port,
+                     'ssl': False},
+                    **kwargs)
+            finally:
+                await server.close()
+        return asyncio.run(_main())
+
+    def test_process(self):
+        received = []
+
+        async def _create(request):
+            received.append((request.query.get('q'), await request.json()))
+            return web.json_response({'id': 10, 'name': 'a'})
+
+        async def _get(request):
+            return web.Response(text='item ' + request.match_info['id'])
+
+        template = """
+            rest_calls:
+            - path: "/items"
+              method: post
+              params:
+                q: "{{ query }}"
+              payload:
+                name: a
+              response_translation:
+                id: [object_id]
+            - path: "/items/{{ object_id }}"
+              method: get
+              response_format: text"""
+        result = self._run([('POST', '/items', _create),
+                            ('GET', '/items/{id}', _get)],
+                           template, {'query': 5})
+        self.assertEqual(received, [('5', {'name': 'a'})])
+        self.assertEqual(result['result_properties'],
+                         {'object_id': 10, 'text': 'item 10'})
+        self.assertEqual(len(result['calls']), 2)
+
+    def test_process_blocking(self):
+        threads = []
+
+        async def _create(request):
+            return web.json_response(await request.json())
+
+        def _callback(resource):
+            threads.append(threading.current_thread())
+            return {'name': resource}
+
+        template = """
+            rest_calls:
+            - path: "/items"
+              method: post
+              payload_raw: "{{ name }}"
+              response_translation:
+                name: [name]"""
+        result = self._run([('POST', '/items', _create)], template,
+                           {'name': 'a'}, resource_callback=_callback)
+        self.assertEqual(result['result_properties'], {'name': 'a'})
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_process_stream(self):
+        template = """
+            rest_calls:
+            - path: "/"
+              method: get
+              response_stream: true"""
+        with self.assertRaises(exceptions.WrongTemplateDataException):
+            self._run([], template)
+
+    def test_process_parallel(self):
+        async def _get(request):
+            await asyncio.sleep(0.01)
+            return web.json_response({'value': request.path})
+
+        template = """
+            rest_calls:
+            - path: "/first"
+              method: get
+              parallel: true
+              response_translation:
+                value: [first]
+            - path: "/second"
+              method: get
+              parallel: true
+              response_translation:
+                value: [second]"""
+        result = self._run([('GET', '/first', _get),
+                            ('GET', '/second', _get)], template)
+        self.assertEqual(result['result_properties'],
+                         {'first': '/first', 'second': '/second'})
+
+    def test_process_codes(self):
+        statuses = [503, 200]
+
+        async def _get(request):
+            return web.Response(status=statuses.pop(0),
+                                body=json.dumps({'a': 'b'}),
+                                content_type='application/json')
+
+        template = """
+            rest_calls:
+            - path: "/status"
+              method: get
+              retry:
+                backoff: 0
+              response_translation:
+                a: [a]"""
+        result = self._run([('GET', '/status', _get)], template)
+        self.assertEqual(result['result_properties'], {'a': 'b'})
+
+        async def _missed(request):
+            return web.Response(status=404)
+
+        template = """
+            rest_calls:
+            - path: "/missed"
+              method: get
+              recoverable_codes: [404]"""
+        with self.assertRaises(
+                exceptions.RecoverableStatusCodeCodeException):
+            self._run([('GET', '/missed', _missed)], template)
+
+    def test_process_timeout(self):
+        async def _slow(request):
+            await asyncio.sleep(1)
+            return web.Response(text='late')
+
+        template = """
+            rest_calls:
+            - path: "/slow"
+              method: get
+              timeout: 0.1"""
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self._run([('GET', '/slow', _slow)], template)
+
+    def test_process_pages(self):
+        async def _items(request):
+            page = int(request.query.get('cursor', '1'))
+            return web.json_response({
+                'items': [page],
+                'cursor': str(page + 1) if page < 3 else None})
+
+        template = """
+            rest_calls:
+            - path: "/items"
+              method: get
+              pagination:
+                type: cursor
+                prefetch: true
+              response_translation:
+                items: [items]"""
+        result = self._run([('GET', '/items', _items)], template)
+        self.assertEqual(result['result_properties'], {'items': [1, 2, 3]})
+
+    def test_process_connection_error(self):
+        template = """
+            rest_calls:
+            - path: "/"
+              method: get
+              port: 1"""
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self._run([], template)
+
+
+if __name__ == '__main__':
+    unittest.main()
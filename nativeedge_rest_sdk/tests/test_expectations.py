@@ -0,0 +1,50 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import unittest
+
+from nativeedge_rest_sdk import expectations
+from nativeedge_common_sdk import exceptions
+
+
+class TestExpectations(unittest.TestCase):
+
+    def test_compile_rules(self):
+        rules = [['status', 'state', 'ready|done'], ['items', 0, '1']]
+        matchers = expectations.compile_rules(rules, True)
+        self.assertEqual(
+            [(matcher.path, matcher.pattern) for matcher in matchers],
+            [(('status', 'state'), 'ready|done'), (('items', 0), '1')])
+        # rules are not changed and compiled only once
+        self.assertEqual(
+            rules, [['status', 'state', 'ready|done'], ['items', 0, '1']])
+        self.assertIs(expectations.compile_rules(rules, True), matchers)
+        self.assertIsNot(expectations.compile_rules(rules, False), matchers)
+        self.assertEqual(expectations.compile_rules([], True), ())
+        with self.assertRaises(exceptions.WrongTemplateDataException):
+            expectations.compile_rules('broken', True)
+        with self.assertRaises(exceptions.WrongTemplateDataException):
+            expectations.compile_rules([['a', 'b'], 'broken'], False)
+
+    def test_check_response(self):
+        rules = [['status', 'state', 'ready|done']]
+        json = {'status': {'state': 'done'}}
+        # same rules can be checked many times
+        for _ in range(3):
+            expectations.check_response(json, rules, True)
+            with self.assertRaises(
+                exceptions.NonRecoverableResponseException
+            ):
+                expectations.check_response(json, rules, False)
+        with self.assertRaises(exceptions.RecoverableResponseException):
+            expectations.check_response(
+                {'status': {'state': 'pending'}}, rules, True)
+        with self.assertRaises(exceptions.ExpectationException) as error:
+            expectations.check_response({'status': []}, rules, True)
+        self.assertEqual("{0}".format(error.exception),
+                         'No key or index "state" in json []')
+        # whole response
+        expectations.check_response('ok', [['ok']], True)
+
+
+if __name__ == '__main__':
+    unittest.main()
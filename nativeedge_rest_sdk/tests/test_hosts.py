@@ -0,0 +1,99 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import time
+import socket
+import unittest
+import mock
+
+from nativeedge_rest_sdk import hosts
+
+
+class TestHosts(unittest.TestCase):
+
+    def test_order(self):
+        health = hosts.HostsHealth(half_life=10)
+        self.assertEqual(health.order(['a', 'b', 'c'], 443), ['a', 'b', 'c'])
+        with mock.patch("nativeedge_rest_sdk.hosts.time.time",
+                        mock.Mock(return_value=100)):
+            health.failure('a', 443)
+            health.failure('a', 443)
+            health.failure('b', 443)
+            health.success('c', 443)
+            self.assertEqual(health.order(['a', 'b', 'c'], 443),
+                             ['c', 'b', 'a'])
+            # other port has own state
+            self.assertEqual(health.order(['a', 'b', 'c'], 80),
+                             ['a', 'b', 'c'])
+        with mock.patch("nativeedge_rest_sdk.hosts.time.time",
+                        mock.Mock(return_value=120)):
+            # penalty of 'a' decayed to 0.5, 'b' to 0.25 and new failure
+            health.failure('c', 443)
+            self.assertEqual(health.order(['a', 'b', 'c'], 443),
+                             ['b', 'a', 'c'])
+        health.reset()
+        self.assertEqual(health.order(['c', 'b'], 443), ['c', 'b'])
+
+    def test_race(self):
+        health = hosts.HostsHealth()
+
+        def _fake_probe(host, port, timeout):
+            if host == 'slow':
+                time.sleep(2)
+                return True
+            return host == 'alive'
+
+        with mock.patch("nativeedge_rest_sdk.hosts._probe",
+                        mock.Mock(side_effect=_fake_probe)):
+            start = time.time()
+            self.assertEqual(
+                health.race(['slow', 'dead', 'alive'], 443, delay=0.1),
+                ['alive', 'slow', 'dead'])
+            self.assertLess(time.time() - start, 1)
+            # dead host is moved to the end
+            self.assertEqual(health.order(['dead', 'slow'], 443),
+                             ['slow', 'dead'])
+            # nothing answered in time
+            self.assertEqual(
+                health.race(['slow', 'dead'], 443, delay=0.1, timeout=0.3),
+                ['slow', 'dead'])
+            # single host is not checked
+            self.assertEqual(health.race(['dead'], 443), ['dead'])
+
+    def test_race_healthy(self):
+        health = hosts.HostsHealth(max_probes=2)
+        probe = mock.Mock(side_effect=lambda host, port, timeout: True)
+        with mock.patch("nativeedge_rest_sdk.hosts._probe", probe):
+            self.assertEqual(health.race(['a', 'b'], 443, timeout=5),
+                             ['a', 'b'])
+            # probe is limited by race timeout
+            self.assertLessEqual(probe.call_args[0][2], 5)
+            executor = health._executor
+            health.failure('a', 443)
+            self.assertEqual(health.race(['a', 'b'], 443), ['b', 'a'])
+            # executor is shared by races
+            self.assertIs(health._executor, executor)
+            probe.reset_mock()
+            # last healthy host without failures is used without probes
+            health.success('b', 443)
+            self.assertEqual(health.race(['a', 'b'], 443), ['b', 'a'])
+            probe.assert_not_called()
+        # probe is skipped after end of race
+        with mock.patch("nativeedge_rest_sdk.hosts._probe", probe):
+            self.assertIsNone(
+                hosts._probe_until('a', 443, time.time() - 1))
+        probe.assert_not_called()
+
+    def test_probe(self):
+        sock = mock.Mock()
+        with mock.patch("nativeedge_rest_sdk.hosts.socket.create_connection",
+                        mock.Mock(return_value=sock)) as connect:
+            self.assertTrue(hosts._probe('localhost', 443, 5))
+        connect.assert_called_with(('localhost', 443), timeout=5)
+        sock.close.assert_called_with()
+        with mock.patch("nativeedge_rest_sdk.hosts.socket.create_connection",
+                        mock.Mock(side_effect=socket.timeout('timeout'))):
+            self.assertFalse(hosts._probe('localhost', 443, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import unittest
+import mock
+
+from nativeedge_rest_sdk import pagination
+from nativeedge_common_sdk import exceptions
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_wrong_settings(self):
+        with self.assertRaises(exceptions.WrongTemplateDataException):
+            pagination.Paginator('link')
+        with self.assertRaises(exceptions.WrongTemplateDataException):
+            pagination.Paginator({'type': 'unknown'})
+        self.assertIsNone(pagination.create_paginator({'path': '/'}))
+
+    def test_link(self):
+        call = {'path': '/items', 'params': {'a': 'b'}}
+        paginator = pagination.Paginator({'type': 'link'})
+        self.assertEqual(paginator.request(call), call)
+        response = mock.Mock()
+        response.links = {'next': {
+            'url': 'https://localhost/items?a=b&page=2'}}
+        self.assertEqual(paginator.next_request(call, response, None), {
+            'path': '/items?a=b&page=2', 'params': {}})
+        response.links = {}
+        self.assertIsNone(paginator.next_request(call, response, None))
+        # original call is not changed
+        self.assertEqual(call, {'path': '/items', 'params': {'a': 'b'}})
+
+    def test_next(self):
+        call = {'path': '/items?page=1'}
+        paginator = pagination.Paginator({
+            'type': 'next', 'next_path': ['links', 'next']})
+        self.assertEqual(paginator.response_paths(), [['links', 'next']])
+        self.assertEqual(
+            paginator.next_request(
+                call, None, {'links': {'next': '?page=2'}}),
+            {'path': '/items?page=2', 'params': {}})
+        self.assertIsNone(
+            paginator.next_request(call, None, {'links': {'next': None}}))
+
+    def test_cursor(self):
+        call = {'path': '/items', 'params': {'a': 'b'}}
+        paginator = pagination.Paginator({
+            'type': 'cursor', 'cursor_param': 'token', 'max_pages': 2})
+        self.assertEqual(
+            paginator.next_request(call, None, {'cursor': 'abc'}),
+            {'path': '/items', 'params': {'a': 'b', 'token': 'abc'}})
+        # max pages
+        self.assertIsNone(
+            paginator.next_request(call, None, {'cursor': 'def'}))
+
+    def test_offset(self):
+        call = {'path': '/items'}
+        paginator = pagination.Paginator({
+            'type': 'offset', 'limit': 2, 'start': 1,
+            'items_path': ['items']})
+        self.assertEqual(paginator.request(call), {
+            'path': '/items', 'params': {'offset': 1, 'limit': 2}})
+        self.assertEqual(
+            paginator.next_request(call, None, {'items': [1, 2]}),
+            {'path': '/items', 'params': {'offset': 3, 'limit': 2}})
+        self.assertIsNone(
+            paginator.next_request(call, None, {'items': [3]}))
+
+    def test_merge_page(self):
+        result = {'a': [1], 'b': {'c': [2], 'd': 1}, 'e': 1}
+        pagination.merge_page(result, {
+            'a': [3], 'b': {'c': [4], 'd': 2}, 'e': 2, 'f': 3})
+        self.assertEqual(result, {
+            'a': [1, 3], 'b': {'c': [2, 4], 'd': 2}, 'e': 2, 'f': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
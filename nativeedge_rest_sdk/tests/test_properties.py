@@ -0,0 +1,75 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+
+from nativeedge_rest_sdk import properties
+from nativeedge_common_sdk import exceptions
+
+
+class TestProperties(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_from_call(self):
+        self.assertIsNone(properties.PropertiesWriter.from_call({}))
+        writer = properties.PropertiesWriter.from_call(
+            {'properties_limit': {'max_value_size': 10}}, self.directory)
+        self.assertEqual(writer.max_value_size, 10)
+        self.assertEqual(writer.max_total_size,
+                         properties.DEFAULT_MAX_TOTAL_SIZE)
+        self.assertEqual(writer.directory, self.directory)
+        # beside runtime properties of node instance by default
+        with mock.patch("nativeedge_rest_sdk.properties._node_instance_dir",
+                        mock.Mock(return_value=self.directory)):
+            writer = properties.PropertiesWriter.from_call(
+                {'properties_limit': {'max_value_size': 10}})
+        self.assertEqual(writer.directory,
+                         os.path.join(self.directory, 'properties'))
+        # without operation context
+        with mock.patch("nativeedge_rest_sdk.properties._node_instance_dir",
+                        mock.Mock(side_effect=RuntimeError('no context'))):
+            writer = properties.PropertiesWriter.from_call(
+                {'properties_limit': {'max_value_size': 10}})
+        self.assertEqual(
+            writer.directory,
+            os.path.join(tempfile.gettempdir(), 'nativeedge-rest-properties'))
+        with self.assertRaises(exceptions.WrongTemplateDataException):
+            properties.PropertiesWriter([], self.directory)
+
+    def test_max_value_size(self):
+        writer = properties.PropertiesWriter(
+            {'max_value_size': 10}, self.directory)
+        values = {'small': 'abc', 'big': ['a' * 20], 'same': ['a' * 20]}
+        writer.apply(values)
+        self.assertEqual(values['small'], 'abc')
+        self.assertTrue(properties.is_spilled(values['big']))
+        # content addressed, same value is saved once
+        self.assertEqual(values['big'], values['same'])
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        self.assertEqual(properties.load_property(values['big']),
+                         ['a' * 20])
+        self.assertEqual(properties.load_property(values['small']), 'abc')
+        # references are kept as is
+        reference = values['big']
+        writer.apply(values)
+        self.assertIs(values['big'], reference)
+
+    def test_max_total_size(self):
+        writer = properties.PropertiesWriter(
+            {'max_total_size': 25}, self.directory)
+        values = {'a': 'a' * 10, 'b': 'b' * 15, 'c': 'c' * 5}
+        writer.apply(values)
+        self.assertEqual(values['a'], 'a' * 10)
+        self.assertEqual(values['c'], 'c' * 5)
+        self.assertTrue(properties.is_spilled(values['b']))
+        self.assertEqual(values['b']['size'], 17)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import unittest
+import mock
+
+from nativeedge_rest_sdk import retry
+from nativeedge_common_sdk import exceptions
+
+
+class TestRetry(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        self.assertIsNone(retry.parse_retry_after(None))
+        self.assertIsNone(retry.parse_retry_after('soon'))
+        self.assertEqual(retry.parse_retry_after('120'), 120)
+        self.assertEqual(retry.parse_retry_after(
+            'Wed, 21 Oct 2015 07:28:00 GMT', now=1445412470), 10)
+        self.assertEqual(retry.parse_retry_after(
+            'Wed, 21 Oct 2015 07:28:00 GMT', now=1445412490), 0)
+
+    def test_policy(self):
+        self.assertIsNone(retry.RetryPolicy.from_call({}))
+        with self.assertRaises(exceptions.WrongTemplateDataException):
+            retry.RetryPolicy.from_call({'retry': 'yes'})
+        policy = retry.RetryPolicy.from_call({'retry': {
+            'max_attempts': 4, 'backoff': 2, 'max_backoff': 5,
+            'jitter': False}})
+        self.assertEqual(policy.on_codes, [429, 503])
+        self.assertEqual(
+            [policy.next_delay(attempt) for attempt in range(1, 5)],
+            [2, 4, 5, None])
+        # retry-after
+        response = mock.Mock()
+        response.headers = {'Retry-After': '3'}
+        self.assertEqual(policy.next_delay(1, response), 3)
+        response.headers = {'Retry-After': '300'}
+        self.assertEqual(policy.next_delay(1, response), 5)
+        # jitter
+        policy.jitter = True
+        with mock.patch("nativeedge_rest_sdk.retry.random.uniform",
+                        mock.Mock(return_value=1.5)) as uniform:
+            self.assertEqual(policy.next_delay(2), 1.5)
+        uniform.assert_called_with(0, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,18 @@
 # Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import os
+import shutil
+import logging
+import tempfile
 import unittest
 import json
 import mock
+import threading
 import six
 
 from nativeedge_rest_sdk import utility
+from nativeedge_rest_sdk.properties import load_property
+from nativeedge_rest_sdk.sessions import SessionPool
 from nativeedge_common_sdk import exceptions
 
 
@@ -357,6 +364,49 @@ class TestSdk(unittest.TestCase):
             'user-full-name': u'Clementina DuBuque'
         })
 
+    def test_process_response_stream(self):
+        body = json.dumps({
+            'id': 10,
+            'items': [{'name': 'a', 'data': 'x' * 100},
+                      {'name': 'b', 'data': 'y' * 100}]}).encode()
+        response = mock.Mock()
+        response.encoding = 'utf-8'
+        response.headers = {
+            'Content-Type': "application/json"
+        }
+        response.cookies = {}
+        response.iter_content = mock.Mock(
+            return_value=iter([body[i:i + 16]
+                               for i in range(0, len(body), 16)]))
+        store_props = {}
+        call = {
+            'response_stream': True,
+            'response_expectation': [['id', '10']],
+            'response_translation': [
+                [['items', ['name']], ['names', ['name']]]]
+        }
+        utility._process_response(response, call, store_props)
+        self.assertEqual(store_props, {
+            'names': [{'name': 'a'}, {'name': 'b'}]})
+        response.close.assert_called_with()
+        # request is sent with stream and content is not logged
+        call.update({
+            'ssl': True,
+            'path': "/",
+            'method': 'get',
+            'host': 'localhost',
+            'port': -1,
+        })
+        response.status_code = 200
+        type(response).content = mock.PropertyMock(
+            side_effect=AssertionError('content read'))
+        request = mock.Mock(return_value=response)
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            self.assertEqual(utility._send_request(call), response)
+        self.assertTrue(request.call_args[1]['stream'])
+
     def test_send_request(self):
         # json request
         call = {
@@ -669,6 +719,323 @@ class TestSdk(unittest.TestCase):
                 "retry_on_connection_error is set. Retrying...\")"
             )
 
+    def test_send_request_keep_alive(self):
+        call = {
+            'ssl': True,
+            'path': "/",
+            'method': 'get',
+            'host': 'localhost',
+            'port': -1,
+            'keep_alive': True,
+        }
+        response = mock.Mock()
+        response.status_code = 200
+        session = mock.Mock()
+        session.request = mock.Mock(return_value=response)
+        request = mock.Mock()
+        pool = mock.MagicMock()
+        pool.session.return_value.__enter__.return_value = session
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            with mock.patch(
+                "nativeedge_rest_sdk.utility.SESSION_POOL", pool
+            ):
+                self.assertEqual(utility._send_request(call), response)
+        request.assert_not_called()
+        pool.session.assert_called_with(
+            ('https', 'localhost', 443, True, None, None))
+        session.request.assert_called_with('get', 'https://localhost:443/',
+                                           data=None, headers=None,
+                                           json=None,
+                                           params={},
+                                           files=None,
+                                           auth=None,
+                                           cert=None,
+                                           proxies=None,
+                                           timeout=None,
+                                           verify=True)
+
+    def test_send_call_keep_alive_inline_cert(self):
+        call = {
+            'ssl': True,
+            'path': "/",
+            'method': 'get',
+            'host': 'localhost',
+            'port': -1,
+            'keep_alive': True,
+            'verify': '-----BEGIN CERTIFICATE-----',
+        }
+        response = mock.Mock()
+        response.status_code = 200
+        pool = SessionPool()
+        paths = []
+
+        def _request(session, method, url, **kwargs):
+            paths.append((session, kwargs['verify']))
+            with open(kwargs['verify']) as f:
+                self.assertEqual(f.read(), call['verify'])
+            return response
+
+        with mock.patch("nativeedge_rest_sdk.utility.SESSION_POOL", pool):
+            with mock.patch("requests.Session.request", _request):
+                self.assertEqual(utility._send_call(call), response)
+                self.assertEqual(utility._send_call(call), response)
+        # same session and same file, so urllib3 pool of session is reused
+        self.assertEqual(len(paths), 2)
+        self.assertEqual(paths[0], paths[1])
+        # file is kept for pooled session
+        self.assertTrue(os.path.exists(paths[0][1]))
+        pool.close()
+        self.assertFalse(os.path.exists(paths[0][1]))
+        # without keep-alive file is removed after call
+        call['keep_alive'] = False
+        request = mock.Mock(return_value=response)
+        with mock.patch("nativeedge_rest_sdk.utility.SESSION_POOL", pool):
+            with mock.patch(
+                "nativeedge_rest_sdk.utility.requests.request", request
+            ):
+                utility._send_call(call)
+        self.assertFalse(os.path.exists(request.call_args[1]['verify']))
+
+    def test_send_request_hosts(self):
+        call = {
+            'ssl': False,
+            'path': "/",
+            'method': 'get',
+            'hosts': ['first', 'second'],
+            'port': -1,
+        }
+        response = mock.Mock()
+        response.status_code = 200
+        # first host is available, second is not called
+        request = mock.Mock(return_value=response)
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            self.assertEqual(utility._send_request(call), response)
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(request.call_args[0][1], 'http://first:80/')
+        # failover to second host, health is remembered in race mode
+        call['race_hosts'] = True
+        utility.HOSTS_HEALTH.reset()
+        request = mock.Mock(side_effect=[
+            utility.requests.exceptions.ConnectionError('check connect'),
+            response,
+            response])
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            with mock.patch(
+                "nativeedge_rest_sdk.hosts._probe",
+                mock.Mock(return_value=True)
+            ):
+                self.assertEqual(utility._send_request(call), response)
+                self.assertEqual(utility._send_request(call), response)
+        self.assertEqual(
+            [args[0][1] for args in request.call_args_list],
+            ['http://first:80/', 'http://second:80/', 'http://second:80/'])
+        # fallback hosts have connect timeout
+        self.assertEqual(
+            [args[1]['timeout'] for args in request.call_args_list],
+            [(utility.DEFAULT_RACE_TIMEOUT, None)] * 3)
+        call['timeout'] = 30
+        request = mock.Mock(return_value=response)
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            with mock.patch(
+                "nativeedge_rest_sdk.hosts._probe",
+                mock.Mock(return_value=True)
+            ):
+                self.assertEqual(utility._send_request(call), response)
+        self.assertEqual(request.call_args[1]['timeout'], 30)
+        utility.HOSTS_HEALTH.reset()
+
+    def test_send_request_retry(self):
+        call = {
+            'ssl': True,
+            'path': "/",
+            'method': 'get',
+            'host': 'localhost',
+            'port': -1,
+            'recoverable_codes': [500],
+            'retry': {'max_attempts': 3, 'jitter': False},
+        }
+        busy = mock.Mock()
+        busy.status_code = 503
+        busy.headers = {'Retry-After': '7'}
+        busy.raise_for_status = mock.Mock(
+            side_effect=utility.requests.exceptions.HTTPError('Busy!'))
+        broken = mock.Mock()
+        broken.status_code = 500
+        broken.headers = {}
+        broken.raise_for_status = mock.Mock(
+            side_effect=utility.requests.exceptions.HTTPError('Error!'))
+        response = mock.Mock()
+        response.status_code = 200
+        request = mock.Mock(side_effect=[busy, broken, response])
+        sleep = mock.Mock()
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            with mock.patch("nativeedge_rest_sdk.utility.time.sleep", sleep):
+                self.assertEqual(utility._send_request(call), response)
+        self.assertEqual(sleep.call_args_list,
+                         [mock.call(7), mock.call(2)])
+        # attempts are exhausted, last response is checked as usual
+        request = mock.Mock(return_value=busy)
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            with mock.patch("nativeedge_rest_sdk.utility.time.sleep", sleep):
+                with self.assertRaises(
+                    utility.requests.exceptions.HTTPError
+                ):
+                    utility._send_request(call)
+        self.assertEqual(request.call_count, 3)
+        call['recoverable_codes'] = [503]
+        request = mock.Mock(return_value=busy)
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            with mock.patch("nativeedge_rest_sdk.utility.time.sleep", sleep):
+                with self.assertRaises(
+                    exceptions.RecoverableStatusCodeCodeException
+                ):
+                    utility._send_request(call)
+        self.assertEqual(request.call_count, 3)
+        # successful code is not retried
+        call['successful_codes'] = [503]
+        call['recoverable_codes'] = []
+        request = mock.Mock(return_value=busy)
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            self.assertEqual(utility._send_request(call), busy)
+        self.assertEqual(request.call_count, 1)
+
+    def test_process_retry_expectation(self):
+        template = """
+            rest_calls:
+            - ssl: true
+              path: "/status"
+              method: get
+              host: localhost
+              port: -1
+              response_format: json
+              retry:
+                max_attempts: 5
+                backoff: 0
+              response_expectation: [['status', 'done']]
+              response_translation:
+                status:
+                - status"""
+        statuses = iter(['pending', 'pending', 'done'])
+
+        def _fake_request(method, url, **kwargs):
+            response = mock.Mock()
+            response.status_code = 200
+            response.headers = {}
+            response.cookies = {}
+            response.json = mock.Mock(
+                return_value={'status': next(statuses)})
+            return response
+
+        request = mock.Mock(side_effect=_fake_request)
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            result = utility.process({}, template, {})
+        self.assertEqual(result['result_properties'], {'status': 'done'})
+        self.assertEqual(request.call_count, 3)
+
+    def test_process_retry_status_and_expectation(self):
+        template = """
+            rest_calls:
+            - ssl: true
+              path: "/status"
+              method: get
+              host: localhost
+              port: -1
+              response_format: json
+              retry:
+                max_attempts: 4
+                backoff: 1
+                jitter: false
+              response_expectation: [['status', 'done']]"""
+        # (status code, status) of responses
+        responses = iter([(503, None), (200, 'pending'), (503, None),
+                          (200, 'pending'), (200, 'done')])
+
+        def _fake_request(method, url, **kwargs):
+            code, status = next(responses)
+            response = mock.Mock()
+            response.status_code = code
+            response.headers = {}
+            response.cookies = {}
+            response.json = mock.Mock(return_value={'status': status})
+            return response
+
+        request = mock.Mock(side_effect=_fake_request)
+        sleep = mock.Mock()
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            with mock.patch("nativeedge_rest_sdk.utility.time.sleep", sleep):
+                with self.assertRaises(
+                    exceptions.RecoverableResponseException
+                ):
+                    utility.process({}, template, {})
+        # one counter for status codes and expectation
+        self.assertEqual(request.call_count, 4)
+        self.assertEqual(sleep.call_args_list,
+                         [mock.call(1.0), mock.call(2.0), mock.call(4.0)])
+
+    def test_process_properties_limit(self):
+        template = """
+            rest_calls:
+            - ssl: true
+              path: "/text"
+              method: get
+              host: localhost
+              port: -1
+              response_format: text
+              properties_limit:
+                max_value_size: 100
+            - ssl: true
+              path: "/size/{{ text | length }}"
+              method: get
+              host: localhost
+              port: -1
+              response_format: text"""
+        response = mock.Mock()
+        response.status_code = 200
+        response.headers = {}
+        response.cookies = {}
+        response.text = 'a' * 1000
+        request = mock.Mock(return_value=response)
+        directory = tempfile.mkdtemp()
+        try:
+            with mock.patch(
+                "nativeedge_rest_sdk.utility.requests.request", request
+            ), mock.patch(
+                "nativeedge_rest_sdk.properties.PropertiesWriter.apply",
+                side_effect=utility.PropertiesWriter.apply,
+                autospec=True
+            ) as apply:
+                result = utility.process({}, template, {},
+                                         properties_dir=directory)
+            # next call is rendered with full value
+            self.assertEqual(request.call_args[0][1],
+                             'https://localhost:443/size/1000')
+            apply.assert_called_once()
+            text = result['result_properties']['text']
+            self.assertEqual(os.path.dirname(text['__file__']), directory)
+            self.assertEqual(load_property(text), 'a' * 1000)
+        finally:
+            shutil.rmtree(directory)
+
     def test_process_pre_render(self):
         # without params
         template = """
@@ -710,14 +1077,14 @@ class TestSdk(unittest.TestCase):
                         'headers': {'a': 'b'},
                         'host': 'localhost',
                         'method': 'get',
-                        'nonrecoverable_response': [['object']],
+                        'nonrecoverable_response': [['object', '20']],
                         'path': '/xml',
                         'payload': '<object>11</object>',
                         'payload_format': 'raw',
                         'port': -1,
-                        'response_expectation': [['object']],
+                        'response_expectation': [['object', '10']],
                         'response_format': 'xml',
-                        'response_translation': {'object': []},
+                        'response_translation': {'object': ['object_id']},
                         'ssl': True,
                         'verify': False
                     }],
@@ -776,15 +1143,15 @@ class TestSdk(unittest.TestCase):
                         'headers': {'a': 'b'},
                         'host': 'localhost',
                         'method': 'get',
-                        'nonrecoverable_response': [['object']],
+                        'nonrecoverable_response': [['object', '20']],
                         'path': '/xml',
                         'raw_payload': 'payload.xml',
                         'payload': '<object>11</object>',
                         'payload_format': 'raw',
                         'port': -1,
-                        'response_expectation': [['object']],
+                        'response_expectation': [['object', '10']],
                         'response_format': 'xml',
-                        'response_translation': {'object': []},
+                        'response_translation': {'object': ['object_id']},
                         'ssl': True,
                         'verify': False
                     }],
@@ -848,7 +1215,7 @@ class TestSdk(unittest.TestCase):
             "nativeedge_rest_sdk.utility.requests.request", request
         ):
             with mock.patch(
-                "nativeedge_rest_sdk.utility.tempfile.mkstemp",
+                "nativeedge_rest_sdk.sessions.tempfile.mkstemp",
                 mock.Mock(return_value=['fake_fd', '/tmp/fake_tmp'])
             ):
                 def _verify_cert_data_type(_, data):
@@ -862,21 +1229,25 @@ class TestSdk(unittest.TestCase):
                 fake_os.write = mock.Mock(side_effect=_verify_cert_data_type)
                 fake_os.remove = mock.Mock(
                     side_effect=Exception("can't remove"))
-                with mock.patch("nativeedge_rest_sdk.utility.os", fake_os):
+                with mock.patch("nativeedge_rest_sdk.utility.os",
+                                fake_os), \
+                        mock.patch("nativeedge_rest_sdk.sessions.os",
+                                   fake_os):
                     self.assertEqual(
                         utility.process({}, template, {}), {
                             'calls': [{
                                 'headers': {'a': 'b'},
                                 'host': 'localhost',
                                 'method': 'get',
-                                'nonrecoverable_response': [['object']],
+                                'nonrecoverable_response': [['object', '20']],
                                 'path': '/xml',
                                 'payload': '<object>11</object>',
                                 'payload_format': 'raw',
                                 'port': -1,
-                                'response_expectation': [['object']],
+                                'response_expectation': [['object', '10']],
                                 'response_format': 'xml',
-                                'response_translation': {'object': []},
+                                'response_translation': {
+                                    'object': ['object_id']},
                                 'ssl': True,
                                 'timeout': 300,
                                 'cert': "some_client_cert",
@@ -933,14 +1304,14 @@ class TestSdk(unittest.TestCase):
                         'headers': {'a': 'b'},
                         'host': 'localhost',
                         'method': 'get',
-                        'nonrecoverable_response': [['object']],
+                        'nonrecoverable_response': [['object', '20']],
                         'path': '/xml',
                         'payload': '<object>11</object>',
                         'payload_format': 'raw',
                         'port': -1,
-                        'response_expectation': [['object']],
+                        'response_expectation': [['object', '10']],
                         'response_format': 'xml',
-                        'response_translation': {'object': []},
+                        'response_translation': {'object': ['object_id']},
                         'ssl': True,
                         'verify': False
                     }],
@@ -986,14 +1357,14 @@ class TestSdk(unittest.TestCase):
                         'headers': {'a': 'b'},
                         'host': 'localhost',
                         'method': 'get',
-                        'nonrecoverable_response': [['object']],
+                        'nonrecoverable_response': [['object', '20']],
                         'path': '/xml',
                         'payload': [1, 2, 3],
                         'payload_format': 'raw',
                         'port': -1,
-                        'response_expectation': [['object']],
+                        'response_expectation': [['object', '10']],
                         'response_format': 'xml',
-                        'response_translation': {'object': []},
+                        'response_translation': {'object': ['object_id']},
                         'ssl': True,
                         'verify': False
                     }],
@@ -1053,17 +1424,17 @@ class TestSdk(unittest.TestCase):
                         'headers': {'a': 'b'},
                         'host': 'localhost',
                         'method': 'get',
-                        'nonrecoverable_response': [['object']],
+                        'nonrecoverable_response': [['object', '20']],
                         'path': '/xml',
                         'payload': {
                             'object': 11
                         },
                         'payload_format': 'urlencoded',
                         'port': -1,
-                        'response_expectation': [['object']],
+                        'response_expectation': [['object', '10']],
                         'response_format': 'xml',
-                        'response_translation': {'object': []},
-                        'cookies_translation': {'a': []},
+                        'response_translation': {'object': ['object_id']},
+                        'cookies_translation': {'a': ['a']},
                         'ssl': True,
                         'verify': False
                     }],
@@ -1083,6 +1454,176 @@ class TestSdk(unittest.TestCase):
                                    timeout=None,
                                    verify=False)
 
+    def test_process_parallel(self):
+        template = """
+            rest_calls:
+            - ssl: true
+              path: "/first"
+              method: get
+              host: localhost
+              port: -1
+              parallel: true
+              response_format: json
+              response_translation:
+                value:
+                - first
+            - ssl: true
+              path: "/second"
+              method: get
+              host: localhost
+              port: -1
+              parallel: true
+              response_format: json
+              response_translation:
+                value:
+                - second
+            - ssl: true
+              path: "/{{ first }}/{{ second }}"
+              method: get
+              host: localhost
+              port: -1
+              response_format: json
+              response_translation:
+                value:
+                - third"""
+        # both parallel calls must be in flight at the same time
+        barrier = threading.Barrier(2, timeout=10)
+
+        def _fake_request(method, url, **kwargs):
+            path = url[len('https://localhost:443/'):]
+            if path in ('first', 'second'):
+                barrier.wait()
+            response = mock.Mock()
+            response.status_code = 200
+            response.headers = {}
+            response.cookies = {}
+            response.json = mock.Mock(return_value={'value': path})
+            return response
+
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request",
+            mock.Mock(side_effect=_fake_request)
+        ):
+            result = utility.process({}, template, {})
+        self.assertEqual(
+            [call['path'] for call in result['calls']],
+            ['/first', '/second', '/first/second'])
+        self.assertEqual(result['result_properties'], {
+            'first': 'first',
+            'second': 'second',
+            'third': 'first/second'})
+
+    def test_process_pagination(self):
+        template = """
+            rest_calls:
+            - ssl: true
+              path: "/items"
+              method: get
+              host: localhost
+              port: -1
+              response_format: json
+              pagination:
+                type: cursor
+                cursor_path: ['meta', 'cursor']
+                prefetch: true
+              response_translation:
+                items:
+                - items
+                meta:
+                  cursor:
+                  - last_cursor"""
+        pages = {
+            None: {'items': [1, 2], 'meta': {'cursor': 'second'}},
+            'second': {'items': [3, 4], 'meta': {'cursor': 'third'}},
+            'third': {'items': [5], 'meta': {'cursor': None}},
+        }
+
+        def _fake_request(method, url, params=None, **kwargs):
+            response = mock.Mock()
+            response.status_code = 200
+            response.headers = {}
+            response.cookies = {}
+            response.json = mock.Mock(
+                return_value=pages[params.get('cursor')])
+            return response
+
+        request = mock.Mock(side_effect=_fake_request)
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            result = utility.process({}, template, {})
+        self.assertEqual(result['result_properties'], {
+            'items': [1, 2, 3, 4, 5], 'last_cursor': None})
+        self.assertEqual(
+            [args[1]['params'] for args in request.call_args_list],
+            [{}, {'cursor': 'second'}, {'cursor': 'third'}])
+
+    def test_process_template_cache(self):
+        template = """
+            rest_calls:
+            - ssl: true
+              path: "/{{ object }}"
+              method: get
+              host: localhost
+              port: -1
+              response_format: raw"""
+        response = mock.Mock()
+        response.status_code = 200
+        response.headers = {}
+        response.cookies = {}
+        request = mock.Mock(return_value=response)
+        utility.TEMPLATE_CACHE.clear()
+        with mock.patch(
+            "nativeedge_rest_sdk.utility.requests.request", request
+        ):
+            for name in ['first', 'second']:
+                result = utility.process({'object': name}, template, {})
+                self.assertEqual(result['calls'][0]['path'],
+                                 '/{}'.format(name))
+                self.assertEqual(request.call_args[0][1],
+                                 'https://localhost:443/{}'.format(name))
+            self.assertEqual(utility.template_cache_info(), {
+                'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 128})
+            # prerender does not use cache
+            utility.process({'object': 'third'}, template, {},
+                            prerender=True)
+            self.assertEqual(utility.template_cache_info()['misses'], 1)
+
+    def test_process_lazy_logs(self):
+        template = """
+            rest_calls:
+            - ssl: true
+              path: "/{{ object }}"
+              method: get
+              host: localhost
+              port: -1
+              response_format: json
+              response_translation:
+                name: [name]"""
+        response = mock.Mock()
+        response.status_code = 200
+        response.headers = {}
+        response.cookies = {}
+        response.content = b'{"name": "a", "password": "b"}'
+        response.text = '{"name": "a", "password": "b"}'
+        response.json = mock.Mock(
+            return_value={"name": "a", "password": "b"})
+        request = mock.Mock(return_value=response)
+        logger = logging.getLogger(utility.LOGGER_NAME)
+        level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            with mock.patch(
+                "nativeedge_rest_sdk.utility.requests.request", request
+            ), mock.patch(
+                "nativeedge_common_sdk.filters.obfuscate_passwords"
+            ) as obfuscate:
+                result = utility.process({'object': 'a'}, template, {})
+            obfuscate.assert_not_called()
+        finally:
+            logger.setLevel(level)
+        self.assertEqual(result['result_properties'], {'name': 'a'})
+
 
 if __name__ == '__main__':
     unittest.main()
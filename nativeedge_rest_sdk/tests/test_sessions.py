@@ -0,0 +1,102 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import unittest
+import mock
+
+from nativeedge_rest_sdk import sessions
+
+
+class TestSessions(unittest.TestCase):
+
+    def test_session_key(self):
+        self.assertEqual(
+            sessions.session_key('https', 'localhost', 443, True, None,
+                                 {'https': 'a', 'http': 'b'}),
+            ('https', 'localhost', 443, True, None,
+             (('http', 'b'), ('https', 'a'))))
+        self.assertEqual(
+            sessions.session_key('https', 'localhost', 443, False,
+                                 ['cert', 'key']),
+            ('https', 'localhost', 443, False, ('cert', 'key'), None))
+
+    def test_reuse_session(self):
+        pool = sessions.SessionPool(maxsize=1)
+        key = sessions.session_key('https', 'localhost', 443)
+        with pool.session(key) as session:
+            session.cookies.set('a', 'b')
+        self.assertEqual(len(pool), 1)
+        # cookies are cleaned before reuse
+        self.assertEqual(len(session.cookies), 0)
+        with pool.session(key) as reused:
+            self.assertIs(reused, session)
+            # same key but session is busy
+            with pool.session(key) as other:
+                self.assertIsNot(other, session)
+        # pool size is limited
+        self.assertEqual(len(pool), 1)
+        # other host
+        with pool.session(
+            sessions.session_key('https', 'other', 443)
+        ) as other:
+            self.assertIsNot(other, session)
+        pool.close()
+        self.assertEqual(len(pool), 0)
+
+    def test_broken_session(self):
+        pool = sessions.SessionPool()
+        key = sessions.session_key('https', 'localhost', 443)
+        with self.assertRaises(ValueError):
+            with pool.session(key):
+                raise ValueError('broken')
+        self.assertEqual(len(pool), 0)
+
+    def test_inline_file(self):
+        pool = sessions.SessionPool()
+        name, path = pool.inline_file('content')
+        self.assertEqual(pool.inline_file('content'), (name, path))
+        with open(path) as f:
+            self.assertEqual(f.read(), 'content')
+        key = sessions.session_key('https', 'localhost', 443, name)
+        with pool.session(key):
+            pass
+        pool.release_file(name)
+        pool.release_file(name)
+        # used by idle session
+        self.assertTrue(os.path.exists(path))
+        pool.close()
+        self.assertFalse(os.path.exists(path))
+        # file of broken session
+        name, path = pool.inline_file('content')
+        with self.assertRaises(ValueError):
+            with pool.session(key):
+                pool.release_file(name)
+                raise ValueError('broken')
+        self.assertFalse(os.path.exists(path))
+
+    def test_idle_eviction(self):
+        pool = sessions.SessionPool(idle_timeout=10)
+        key = sessions.session_key('https', 'localhost', 443)
+        with mock.patch("nativeedge_rest_sdk.sessions.time.time",
+                        mock.Mock(return_value=100)):
+            with pool.session(key) as session:
+                pass
+        session.close = mock.Mock()
+        with mock.patch("nativeedge_rest_sdk.sessions.time.time",
+                        mock.Mock(return_value=105)):
+            pool.evict()
+        self.assertEqual(len(pool), 1)
+        with mock.patch("nativeedge_rest_sdk.sessions.time.time",
+                        mock.Mock(return_value=111)):
+            pool.evict()
+        self.assertEqual(len(pool), 0)
+        session.close.assert_called_with()
+        # reconfigure
+        pool.configure(maxsize=2, idle_timeout=5, pool_maxsize=20)
+        self.assertEqual(pool.maxsize, 2)
+        self.assertEqual(pool.idle_timeout, 5)
+        self.assertEqual(pool.pool_maxsize, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import json
+import unittest
+import xmltodict
+from mock import Mock
+
+from nativeedge_rest_sdk import streaming
+from nativeedge_common_sdk.filters import translate_and_save
+
+RESPONSE = {
+    "id": "6857017661",
+    "empty": {},
+    "text": "with \"quotes\", [brackets] and \\ é",
+    "payload": {
+        "pages": [
+            {
+                "page_name": "marvin",
+                "action": "edited",
+                "properties": {"color": "blue", "size": 1.5e3}
+            },
+            {
+                "page_name": "cool_wool",
+                "action": "saved",
+                "properties": {"color": "red", "size": None}
+            }
+        ],
+        "flags": [True, False, None, -10]
+    }
+}
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestStreaming(unittest.TestCase):
+
+    def test_translation_paths(self):
+        # v1
+        self.assertEqual(
+            streaming.translation_paths({
+                "name": ["user-full-name"],
+                "address": {"geo": {"lat": ["latitude"]}},
+                "list": [["first"], {"id": ["second_id"]}],
+            }),
+            {'name': True,
+             'address': {'geo': {'lat': True}},
+             'list': {'0': True, '1': {'id': True}}})
+        # v2
+        self.assertEqual(
+            streaming.translation_paths([
+                [['payload', 'pages', ['page_name']],
+                 ['pages', ['page_name']]],
+                [['id'], ['id']]
+            ]),
+            {'payload': {'pages': {'*': {'page_name': True}}}, 'id': True})
+        # v3
+        self.assertEqual(
+            streaming.translation_paths({'g': ['a', '0']}, 'v3'),
+            {'a': {'0': True}})
+        # unknown
+        self.assertEqual(streaming.translation_paths({}, 'v9'), True)
+        self.assertIsNone(streaming.translation_paths(None))
+        # expectations
+        self.assertEqual(
+            streaming.expectation_paths([['id', '10'], ['a', 'b', '1']]),
+            {'id': True, 'a': {'b': True}})
+        self.assertEqual(streaming.expectation_paths('broken'), True)
+
+    def test_parse_json_stream(self):
+        text = json.dumps(RESPONSE, indent=2)
+        for size in (1, 3, 7, len(text)):
+            self.assertEqual(
+                streaming.parse_json_stream(_chunks(text, size)),
+                (RESPONSE, False))
+        value, empty = streaming.parse_json_stream(
+            _chunks(text, 5), {'text': True,
+                               'payload': {'pages': {'1': {'action': True}},
+                                           'flags': {'-1': True}}})
+        self.assertFalse(empty)
+        self.assertEqual(value, {
+            'text': RESPONSE['text'],
+            'payload': {
+                'pages': [None, {'action': 'saved'}],
+                'flags': [True, False, None, -10]}})
+        # empty values
+        self.assertEqual(streaming.parse_json_stream(['{ }'], None),
+                         ({}, True))
+        self.assertEqual(streaming.parse_json_stream(['[', ']']), ([], True))
+        self.assertEqual(streaming.parse_json_stream(['1', '0']),
+                         (10, False))
+        # broken json
+        for broken in ('{"a": 1', '{"a" 1}', '[1 2]', '{} {}', '{1: 2}'):
+            with self.assertRaises(ValueError):
+                streaming.parse_json_stream(_chunks(broken, 2))
+
+    def test_translate_streamed_json(self):
+        text = json.dumps(RESPONSE)
+        rules = [
+            ([[['payload', 'pages', ['page_name']], ['pages', ['page_name']]]],
+             'auto'),
+            ({'payload': {'pages': [{'properties': {'color': ['c']}}]}},
+             'v1'),
+            ({'g': ['payload', 'pages', '-1', 'action'], 'n': ['none']},
+             'v3'),
+        ]
+        for rule, version in rules:
+            expected = {}
+            translate_and_save(Mock(), RESPONSE, rule, expected,
+                               version)
+            value, _ = streaming.parse_json_stream(
+                _chunks(text, 11),
+                streaming.translation_paths(rule, version))
+            result = {}
+            translate_and_save(Mock(), value, rule, result,
+                               version)
+            self.assertEqual(result, expected)
+
+    def test_parse_xml_stream(self):
+        text = (
+            b'<?xml version="1.0" encoding="utf-8"?>'
+            b'<root a="b"><id>1</id><items>'
+            b'<item id="1"><name>first</name><size>1</size></item>'
+            b'<item id="2"><name>second</name><size>2</size></item>'
+            b'</items><other>skip</other></root>')
+        self.assertEqual(
+            streaming.parse_xml_stream(_chunks(text, 7)),
+            xmltodict.parse(text))
+        self.assertEqual(
+            streaming.parse_xml_stream(
+                _chunks(text, 7),
+                {'root': {'items': {'item': {'1': {'name': True},
+                                             '@id': True}}}}),
+            {'root': {'items': {'item': [
+                {'@id': '1', 'name': 'first'},
+                {'@id': '2', 'name': 'second'}]}}})
+        self.assertEqual(
+            streaming.parse_xml_stream(_chunks(text, 7), {}), {})
+
+    def test_iter_text(self):
+        response = Mock()
+        response.encoding = None
+        response.iter_content = Mock(
+            return_value=iter(['é'.encode('utf-8')[:1],
+                               'é'.encode('utf-8')[1:] + b'a']))
+        self.assertEqual(list(streaming.iter_text(response)), ['éa'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,174 +6,534 @@ import ast
 import yaml
 import logging
 import requests
-import tempfile
+import time
 import xmltodict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
 from six import StringIO, string_types
 
-from nativeedge_rest_sdk import LOGGER_NAME
+from nativeedge_rest_sdk import LOGGER_NAME, streaming
+from nativeedge_rest_sdk.hosts import HOSTS_HEALTH
+from nativeedge_rest_sdk.expectations import check_response
+from nativeedge_rest_sdk.pagination import create_paginator, merge_page
+from nativeedge_rest_sdk.properties import PropertiesWriter
+from nativeedge_rest_sdk.retry import RetryPolicy, RetryState
+from nativeedge_rest_sdk.sessions import SESSION_POOL, session_key
+from nativeedge_common_sdk.caching import LRUCache, content_hash
 from nativeedge_common_sdk.filters import (
+    LazyLogText,
     translate_and_save,
-    shorted_text,
     render_template,
-    obfuscate_passwords,
+    compile_template,
 )
 from nativeedge_common_sdk.exceptions import (
     RecoverableStatusCodeCodeException,
-    ExpectationException,
     WrongTemplateDataException,
-    NonRecoverableResponseException,
     RecoverableResponseException)
 
 logger = logging.getLogger(LOGGER_NAME)
 
 TEMPLATE_PROPERTY_RETRY_ON_CONNECTION_ERROR = 'retry_on_connection_error'
+TEMPLATE_PROPERTY_KEEP_ALIVE = 'keep_alive'
+TEMPLATE_PROPERTY_PARALLEL = 'parallel'
+TEMPLATE_PROPERTY_RACE_HOSTS = 'race_hosts'
+TEMPLATE_PROPERTY_RESPONSE_STREAM = 'response_stream'
+# delay before connecting to next host and max time for race, in seconds
+DEFAULT_RACE_DELAY = 0.25
+DEFAULT_RACE_TIMEOUT = 10
+# default limit of concurrently sent calls from one parallel batch
+MAX_PARALLEL_CALLS = 8
 
+# parsed templates with precompiled calls, shared between process() runs
+TEMPLATE_CACHE = LRUCache(maxsize=128)
 
-#  request_props (port, ssl, verify, hosts )
-def process(params, template, request_props, prerender=False,
-            resource_callback=False):
-    logger.info(
-        'Template:\n{}'.format(shorted_text(obfuscate_passwords(template))))
-    if prerender:
-        rendered_call = render_template(template, params)
-        template_yaml = yaml.safe_load(rendered_call)
-    else:
-        template_yaml = yaml.safe_load(template)
-    result_properties = {}
-    calls = []
+
+def template_cache_info():
+    """Hits/misses/size of compiled templates cache"""
+    return TEMPLATE_CACHE.stats()
+
+
+def _compile_call(call):
+    """Convert call to Jinja template, render result is call repr"""
+    call = "{0}".format(call)
+    # Remove quotation marks before and after jinja blocks
+    call = re.sub(r'\'\{\%', '{%', call)
+    call = re.sub(r'\%\}\'', '%}', call)
+    return compile_template(call)
+
+
+def _compile_rest_template(template):
+    """Parse template and compile each call, result must be read only"""
+    template_yaml = yaml.safe_load(template)
     if not template_yaml or not template_yaml.get('rest_calls'):
-        logger.debug('Empty call list')
-        return {}
+        return ()
+    return tuple(
+        (call, _compile_call(call)) for call in template_yaml['rest_calls'])
 
-    for call in template_yaml['rest_calls']:
-        call_with_request_props = request_props.copy()
-        logger.debug(
-            'Call: {}'.format(shorted_text(obfuscate_passwords(call))))
-        # enrich params with items stored in runtime props by prev calls
-        params.update(result_properties)
-        if not prerender:
-            call = "{0}".format(call)
-            # Remove quotation marks before and after jinja blocks
-            call = re.sub(r'\'\{\%', '{%', call)
-            call = re.sub(r'\%\}\'', '%}', call)
-            rendered_call = render_template(call, params)
-            call = ast.literal_eval(rendered_call)
-        calls.append(call)
-        logger.debug('Rendered call: {}'.format(
-            shorted_text(obfuscate_passwords(call))))
-        call_with_request_props.update(call)
-
-        # client/server side certification check
-        file_to_remove = []
+
+def _get_compiled_calls(template):
+    return TEMPLATE_CACHE.get_or_create(
+        content_hash(template),
+        lambda: _compile_rest_template(template))
+
+
+def _render_call(call, call_template, params, request_props):
+    logger.debug('Call: %s', LazyLogText(call))
+    if call_template:
+        rendered_call = call_template.render(params)
+        call = ast.literal_eval(rendered_call)
+    logger.debug('Rendered call: %s', LazyLogText(call))
+    call_with_request_props = request_props.copy()
+    call_with_request_props.update(call)
+    return call, call_with_request_props
+
+
+def _render_calls(batch, params, request_props):
+    return [_render_call(call, call_template, params, request_props)
+            for call, call_template in batch]
+
+
+def _send_call(call_with_request_props, resource_callback=None,
+               retry_state=None):
+    # props are updated by temporary files, original is kept for resend
+    call_with_request_props = call_with_request_props.copy()
+    # client/server side certification check, inline certificate is saved
+    # to file shared by calls and keep-alive sessions with same content
+    inline_files = []
+    session_props = {}
+    try:
         for field in ['verify', 'cert']:
-            if isinstance(call_with_request_props.get(field), string_types):
-                if not os.path.isfile(call_with_request_props.get(field)):
-                    fd, destination = tempfile.mkstemp()
-                    os.write(fd, call_with_request_props.get(field).encode())
-                    os.close(fd)
-                    # replace to path to content
-                    call_with_request_props[field] = destination
-                    file_to_remove.append(destination)
+            value = call_with_request_props.get(field)
+            if isinstance(value, string_types) and not os.path.isfile(value):
+                name, destination = SESSION_POOL.inline_file(value)
+                inline_files.append(name)
+                session_props[field] = name
+                # replace to path to content
+                call_with_request_props[field] = destination
 
         # run requests
+        return _send_request(call_with_request_props,
+                             resource_callback=resource_callback,
+                             session_props=session_props,
+                             retry_state=retry_state)
+    finally:
+        for name in inline_files:
+            SESSION_POOL.release_file(name)
+
+
+def _send_calls_parallel(calls_with_request_props, resource_callback=None,
+                         max_workers=MAX_PARALLEL_CALLS, retry_states=None):
+    """Send independent calls concurrently, responses are in calls order"""
+    max_workers = max(1, min(max_workers, len(calls_with_request_props)))
+    retry_states = retry_states or [None] * len(calls_with_request_props)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_send_call, call_with_request_props,
+                            resource_callback, retry_state)
+            for call_with_request_props, retry_state
+            in zip(calls_with_request_props, retry_states)]
+    # executor waits for all calls, first failed call in template raises
+    return [future.result() for future in futures]
+
+
+# Control flow of process is shared with aio.process_async: *_flow
+# generators yield blocking operations as tuples (name, *args) and get
+# result (or exception) back. Operations are done by _SyncIO here and by
+# aio._AsyncIO on event loop.
+
+
+def _run(flow, execute):
+    """Run control flow, operations are done by execute(operation)"""
+    result = error = None
+    try:
+        while True:
+            try:
+                if error is None:
+                    operation = flow.send(result)
+                else:
+                    operation = flow.throw(error)
+                    error = None
+            except StopIteration as e:
+                return e.value
+            try:
+                result = execute(operation)
+            except Exception as e:
+                result, error = None, e
+    finally:
+        flow.close()
+
+
+class _SyncIO(object):
+    """Operations of control flow done in current thread"""
+
+    def __init__(self, resource_callback=None,
+                 max_parallel_calls=MAX_PARALLEL_CALLS):
+        self.resource_callback = resource_callback
+        self.max_parallel_calls = max_parallel_calls
+
+    def __call__(self, operation):
+        return getattr(self, operation[0])(*operation[1:])
+
+    def race(self, call, hosts, port):
+        if call.get('proxies'):
+            # can't check direct connection to host behind proxy
+            return HOSTS_HEALTH.order(hosts, port)
+        return HOSTS_HEALTH.race(
+            hosts, port,
+            delay=call.get('race_delay', DEFAULT_RACE_DELAY),
+            timeout=call.get('race_timeout', DEFAULT_RACE_TIMEOUT))
+
+    def request(self, method, url, request_kwargs, key=None):
+        if key:
+            with SESSION_POOL.session(key) as session:
+                return session.request(method, url, **request_kwargs)
+        return requests.request(method, url, **request_kwargs)
+
+    def sleep(self, delay):
+        time.sleep(delay)
+
+    def blocking(self, func, *args):
+        return func(*args)
+
+    def call(self, call_with_request_props, retry_state=None):
+        return _send_call(call_with_request_props, self.resource_callback,
+                          retry_state)
+
+    def parallel(self, calls_with_request_props, retry_states=None):
+        return _send_calls_parallel(calls_with_request_props,
+                                    self.resource_callback,
+                                    self.max_parallel_calls, retry_states)
+
+    def wait(self, future):
+        return future.result()
+
+    # not blocking, used by flow directly
+
+    def start(self, call_with_request_props, retry_state=None):
+        """Start call in background"""
+        executor = ThreadPoolExecutor(max_workers=1)
         try:
-            response = _send_request(call_with_request_props,
-                                     resource_callback=resource_callback)
+            return executor.submit(_send_call, call_with_request_props,
+                                   self.resource_callback, retry_state)
         finally:
-            for path in file_to_remove:
-                try:
-                    os.remove(path)
-                except Exception as e:
-                    logger.debug(
-                        'Cant remove temporary file {path}: {error}'
-                        .format(path=path, error=repr(e))
-                    )
-        _process_response(response, call, result_properties)
-    result_properties = {'result_properties': result_properties,
-                         'calls': calls}
-    return result_properties
+            executor.shutdown(wait=False)
+
+    def cancel(self, future):
+        if not future.cancel():
+            # started call is finished before return
+            wait_futures([future])
+
+
+def _process_response_flow(response, call, call_with_request_props,
+                           store_props, on_body=None, retry_state=None):
+    """Process response, resend call while response_expectation is not met.
+
+    retry_state is shared with retries of request, so call is sent at most
+    max_attempts times.
+    """
+    retry_policy = RetryPolicy.from_call(call_with_request_props)
+    retry_state = retry_state or RetryState()
+    while True:
+        try:
+            return _process_response(response, call, store_props,
+                                     on_body=on_body)
+        except RecoverableResponseException as e:
+            delay = retry_policy.next_delay(retry_state.attempt, response) \
+                if retry_policy and retry_policy.on_expectation else None
+            if delay is None:
+                raise
+            logger.info('Attempt {} failed: {}, retry in {:.2f} seconds'
+                        .format(retry_state.attempt, repr(e), delay))
+            yield ('sleep', delay)
+            retry_state.attempt += 1
+            response = yield ('call', call_with_request_props, retry_state)
+
+
+def _process_pages_flow(paginator, call, call_with_request_props,
+                        page_request, response, result_properties, io,
+                        retry_state=None):
+    """Process response and all next pages of paginated call"""
+    next_page = {}
+
+    def _on_body(response, json):
+        if 'call' in next_page:
+            # page is resent by retry policy
+            return
+        next_page['call'] = paginator.next_request(
+            call_with_request_props, response, json)
+        next_page['retry_state'] = RetryState()
+        if next_page['call'] and paginator.prefetch:
+            # load next page while current one is translated
+            next_page['future'] = io.start(next_page['call'],
+                                           next_page['retry_state'])
+
+    try:
+        while response is not None:
+            next_page.clear()
+            page_properties = {}
+            yield from _process_response_flow(
+                response, call, page_request, page_properties,
+                on_body=_on_body, retry_state=retry_state)
+            if 'call' not in next_page:
+                _on_body(response, None)
+            merge_page(result_properties, page_properties)
+            page_request = next_page['call']
+            retry_state = next_page['retry_state']
+            if next_page.get('future'):
+                response = yield ('wait', next_page.pop('future'))
+            elif page_request:
+                response = yield ('call', page_request, retry_state)
+            else:
+                response = None
+            logger.debug('Page {} loaded'.format(paginator.page))
+    finally:
+        if next_page.get('future'):
+            io.cancel(next_page['future'])
 
 
-def _send_request(call, resource_callback=None):
-    logger.debug(
-        'Request props: {}'.format(shorted_text(obfuscate_passwords(call))))
+def _process_calls_flow(rest_calls, params, request_props, io,
+                        properties_dir=None):
+    """Send calls of template, returns result of process"""
+    result_properties = {}
+    calls = []
+    writer = None
+    for batch in _split_to_batches(rest_calls):
+        # enrich params with items stored in runtime props by prev calls,
+        # calls in same parallel batch can't see results of each other
+        params.update(result_properties)
+        # rendering and callbacks are blocking, aio runs them in thread
+        rendered = yield ('blocking', _render_calls, batch, params,
+                          request_props)
+        calls.extend(call for call, _ in rendered)
+        paginators = [create_paginator(call) for call, _ in rendered]
+        # first page request, original call is kept for next pages
+        first_requests = [
+            paginator.request(call_with_request_props)
+            if paginator else call_with_request_props
+            for paginator, (_, call_with_request_props)
+            in zip(paginators, rendered)]
+        retry_states = [RetryState() for _ in rendered]
+        if len(rendered) == 1:
+            responses = [(yield ('call', first_requests[0], retry_states[0]))]
+        else:
+            logger.debug('Send {} calls in parallel'.format(len(rendered)))
+            responses = yield ('parallel', first_requests, retry_states)
+        # responses are processed in template order
+        for (call, call_with_request_props), paginator, page_request, \
+                response, retry_state in zip(rendered, paginators,
+                                             first_requests, responses,
+                                             retry_states):
+            if paginator:
+                yield from _process_pages_flow(
+                    paginator, call, call_with_request_props, page_request,
+                    response, result_properties, io, retry_state)
+            else:
+                yield from _process_response_flow(
+                    response, call, call_with_request_props,
+                    result_properties, retry_state=retry_state)
+            writer = PropertiesWriter.from_call(
+                call_with_request_props, properties_dir) or writer
+    # next calls are rendered with full values
+    if writer:
+        yield ('blocking', writer.apply, result_properties)
+    return {'result_properties': result_properties, 'calls': calls}
+
+
+def _split_to_batches(rest_calls):
+    """Group consecutive calls marked as parallel"""
+    batches = []
+    for call, call_template in rest_calls:
+        is_parallel = isinstance(call, dict) and \
+            call.get(TEMPLATE_PROPERTY_PARALLEL) is True
+        if is_parallel and batches and batches[-1][0]:
+            batches[-1][1].append((call, call_template))
+        else:
+            batches.append((is_parallel, [(call, call_template)]))
+    return [batch for _, batch in batches]
+
+
+def _load_rest_calls(template, params, prerender=False):
+    """List of (call, compiled call) from template"""
+    logger.info('Template:\n%s', LazyLogText(template))
+    if prerender:
+        rendered_call = render_template(template, params)
+        template_yaml = yaml.safe_load(rendered_call)
+        if template_yaml and template_yaml.get('rest_calls'):
+            return [(call, None) for call in template_yaml['rest_calls']]
+        return ()
+    rest_calls = _get_compiled_calls(template)
+    logger.debug('Template cache: {}'.format(template_cache_info()))
+    return rest_calls
+
+
+#  request_props (port, ssl, verify, hosts )
+def process(params, template, request_props, prerender=False,
+            resource_callback=False, max_parallel_calls=MAX_PARALLEL_CALLS,
+            properties_dir=None):
+    rest_calls = _load_rest_calls(template, params, prerender)
+    if not rest_calls:
+        logger.debug('Empty call list')
+        return {}
+    io = _SyncIO(resource_callback, max_parallel_calls)
+    return _run(_process_calls_flow(rest_calls, params, request_props, io,
+                                    properties_dir), io)
+
+
+def _send_request(call, resource_callback=None, session_props=None,
+                  retry_state=None):
+    """Send request, repeat it by call retry policy"""
+    return _run(_send_request_flow(call, resource_callback, session_props,
+                                   retry_state),
+                _SyncIO(resource_callback))
+
+
+def _send_request_flow(call, resource_callback=None, session_props=None,
+                       retry_state=None):
+    """Send request, repeat it by call retry policy, retry_state is attempt
+    of last sent request"""
+    retry_policy = RetryPolicy.from_call(call)
+    retry_state = retry_state or RetryState()
+    while True:
+        try:
+            return (yield from _send_request_once_flow(
+                call, resource_callback, retry_policy, retry_state.attempt,
+                session_props))
+        except (RecoverableStatusCodeCodeException,
+                RecoverableResponseException) as e:
+            delay = retry_policy.next_delay(
+                retry_state.attempt, getattr(e, 'response', None)) \
+                if retry_policy else None
+            if delay is None:
+                raise
+            logger.info('Attempt {} failed: {}, retry in {:.2f} seconds'
+                        .format(retry_state.attempt, repr(e), delay))
+            yield ('sleep', delay)
+            retry_state.attempt += 1
+
+
+def _request_kwargs(call, resource_callback=None):
+    """Arguments of requests.request for call, files are opened again"""
+    # check if payload can be used as json
+    payload_format = call.get('payload_format', 'json')
+    payload_data = call.get('payload', None)
+    # check that we have some raw payload
+    payload_raw = call.get('payload_raw', call.get('raw_payload'))
+    if resource_callback and payload_raw:
+        payload_data = resource_callback(payload_raw)
+    # url params
+    params = call.get('params', {})
+    # files magic
+    files_merged = {}
+    files = {}
+    files_raw = call.get("files_raw", call.get("raw_files", {}))
+    # add all raw files
+    for name in files_raw:
+        files_merged[name] = resource_callback(files_raw[name])
+    # add inline files
+    files_merged.update(call.get("files", {}))
+    logger.debug('Files merged: %s',
+                 LazyLogText(files_merged, obfuscate=False))
+    # convert files strcut to correct type
+    for name in files_merged:
+        if isinstance(files_merged[name], list):
+            # convert to correct struct
+            files[name] = tuple(files_merged[name])
+        elif isinstance(files_merged[name], string_types):
+            # send string as file
+            files[name] = StringIO(files_merged[name])
+        else:
+            # let's request decide about format
+            files[name] = files_merged[name]
+    logger.debug('Files: %s', LazyLogText(files, obfuscate=False))
+    # combine payloads and params
+    if payload_format == 'json':
+        json_payload = payload_data
+        data = None
+    elif payload_format == 'urlencoded' and isinstance(payload_data, dict):
+        json_payload = None
+        params.update(payload_data)
+        data = None
+    else:
+        json_payload = None
+        data = payload_data
+
+    # auth
+    if 'auth' not in call:
+        auth = None
+    else:
+        auth = (call['auth'].get('user'), call['auth'].get('password'))
+
+    request_kwargs = {
+        'auth': auth,
+        'headers': call.get('headers', None),
+        'verify': call.get('verify', True),
+        'cert': call.get('cert', None),
+        'proxies': call.get('proxies', None),
+        'timeout': call.get('timeout', None),
+        'json': json_payload,
+        'params': params,
+        'files': files if files else None,
+        'data': data,
+    }
+    if call.get(TEMPLATE_PROPERTY_RESPONSE_STREAM):
+        request_kwargs['stream'] = True
+    return request_kwargs
+
+
+def _race_timeout(call, request_kwargs):
+    """Connect timeout for hosts in race mode, dead fallback host can't
+    block call, timeout of call has priority"""
+    if call.get(TEMPLATE_PROPERTY_RACE_HOSTS) and \
+            request_kwargs['timeout'] is None:
+        request_kwargs['timeout'] = (
+            call.get('race_timeout', DEFAULT_RACE_TIMEOUT), None)
+    return request_kwargs
+
+
+def _send_request_once_flow(call, resource_callback=None, retry_policy=None,
+                            attempt=1, session_props=None):
+    """Send request to first available host and check status"""
+    logger.debug('Request props: %s', LazyLogText(call))
     port = call['port']
     ssl = call['ssl']
     if port == -1:
         port = 443 if ssl else 80
     if not call.get('hosts', None):
         call['hosts'] = [call['host']]
-    for i, host in enumerate(call['hosts']):
+    hosts = call['hosts']
+    race_hosts = call.get(TEMPLATE_PROPERTY_RACE_HOSTS)
+    if race_hosts:
+        hosts = yield ('race', call, hosts, port)
+    for i, host in enumerate(hosts):
         full_url = '{}://{}:{}{}'.format('https' if ssl else 'http', host,
                                          port,
                                          call['path'])
         logger.debug('Full url: {}'.format(repr(full_url)))
-        # check if payload can be used as json
-        payload_format = call.get('payload_format', 'json')
-        payload_data = call.get('payload', None)
-        # check that we have some raw payload
-        payload_raw = call.get('payload_raw', call.get('raw_payload'))
-        if resource_callback and payload_raw:
-            payload_data = resource_callback(payload_raw)
-        # url params
-        params = call.get('params', {})
-        # files magic
-        files_merged = {}
-        files = {}
-        files_raw = call.get("files_raw", call.get("raw_files", {}))
-        # add all raw files
-        for name in files_raw:
-            files_merged[name] = resource_callback(files_raw[name])
-        # add inline files
-        files_merged.update(call.get("files", {}))
-        logger.debug('Files merged: {files_merged}'
-                     .format(files_merged=shorted_text(files_merged)))
-        # convert files strcut to correct type
-        for name in files_merged:
-            if isinstance(files_merged[name], list):
-                # convert to correct struct
-                files[name] = tuple(files_merged[name])
-            elif isinstance(files_merged[name], string_types):
-                # send string as file
-                files[name] = StringIO(files_merged[name])
-            else:
-                # let's request decide about format
-                files[name] = files_merged[name]
-        logger.debug('Files: {files}'
-                     .format(files=shorted_text(files)))
-        # combine payloads and params
-        if payload_format == 'json':
-            json_payload = payload_data
-            data = None
-        elif payload_format == 'urlencoded' and isinstance(payload_data, dict):
-            json_payload = None
-            params.update(payload_data)
-            data = None
-        else:
-            json_payload = None
-            data = payload_data
-
-        # auth
-        if 'auth' not in call:
-            auth = None
+        if resource_callback and (
+                call.get('payload_raw', call.get('raw_payload')) or
+                call.get('files_raw', call.get('raw_files'))):
+            request_kwargs = yield ('blocking', _request_kwargs, call,
+                                    resource_callback)
         else:
-            auth = (call['auth'].get('user'), call['auth'].get('password'))
+            request_kwargs = _request_kwargs(call, resource_callback)
+        request_kwargs = _race_timeout(call, request_kwargs)
+        key = None
+        if call.get(TEMPLATE_PROPERTY_KEEP_ALIVE):
+            session_props = session_props or {}
+            key = session_key('https' if ssl else 'http', host, port,
+                              session_props.get(
+                                  'verify', request_kwargs['verify']),
+                              session_props.get(
+                                  'cert', request_kwargs['cert']),
+                              request_kwargs['proxies'])
 
         # run request
         try:
-            response = requests.request(call['method'], full_url,
-                                        auth=auth,
-                                        headers=call.get('headers', None),
-                                        verify=call.get('verify', True),
-                                        cert=call.get('cert', None),
-                                        proxies=call.get('proxies', None),
-                                        timeout=call.get('timeout', None),
-                                        json=json_payload,
-                                        params=params,
-                                        files=files if files else None,
-                                        data=data)
+            response = yield ('request', call['method'], full_url,
+                              request_kwargs, key)
         except requests.exceptions.ConnectionError as e:
             logger.debug('ConnectionError for host: {}'.format(repr(host)))
+            if race_hosts:
+                HOSTS_HEALTH.failure(host, port)
 
             if TEMPLATE_PROPERTY_RETRY_ON_CONNECTION_ERROR in call and \
                     call[TEMPLATE_PROPERTY_RETRY_ON_CONNECTION_ERROR]:
@@ -187,22 +547,47 @@ def _send_request(call, resource_callback=None):
                     )
                 )
 
-            if i == len(call['hosts']) - 1:
+            if i == len(hosts) - 1:
                 logger.error('No host from list available')
                 raise
+        else:
+            if race_hosts:
+                HOSTS_HEALTH.success(host, port)
+            break
+
+    _check_status(call, response, retry_policy, attempt)
+    return response
+
 
-    logger.info('Response content: \n{}...'.format(
-        shorted_text(obfuscate_passwords(repr(response.content)))))
+def _check_status(call, response, retry_policy=None, attempt=1):
+    """Log response, raise for codes which are not accepted by call"""
+    if call.get(TEMPLATE_PROPERTY_RESPONSE_STREAM):
+        logger.info('Response content is streamed')
+    elif logger.isEnabledFor(logging.INFO):
+        logger.info('Response content: \n%s...',
+                    LazyLogText(response.content))
     logger.info('Status code: {}'.format(repr(response.status_code)))
 
+    # last attempt and successful codes are checked as without retry
+    if retry_policy and response.status_code in retry_policy.on_codes and \
+            response.status_code not in call.get('successful_codes', []) and \
+            retry_policy.can_retry(attempt):
+        error = RecoverableStatusCodeCodeException(
+            'Response code {} defined as retriable'.format(
+                response.status_code))
+        error.response = response
+        raise error
+
     try:
         response.raise_for_status()
     except requests.exceptions.HTTPError as e:
         logger.debug(repr(e))
         if response.status_code in call.get('recoverable_codes', []):
-            raise RecoverableStatusCodeCodeException(
+            error = RecoverableStatusCodeCodeException(
                 'Response code {} defined as recoverable'.format(
                     response.status_code))
+            error.response = response
+            raise error
         if response.status_code not in call.get('successful_codes', []):
             # code is not marked as successful
             raise
@@ -212,16 +597,13 @@ def _send_request(call, resource_callback=None):
             'Response code {} defined as successful.'.format(
                 response.status_code))
 
-    return response
-
 
-def _process_response(response, call, store_props):
-    logger.debug('Process Response: {}'.format(shorted_text(response)))
-    logger.debug(
-        'Call: {}'.format(shorted_text(obfuscate_passwords(call))))
-    logger.debug('Store props: {}'.format(shorted_text(store_props)))
-    logger.debug('Store headers: {}'.format(shorted_text(obfuscate_passwords(
-        response.headers))))
+def _process_response(response, call, store_props, on_body=None):
+    logger.debug('Process Response: %s',
+                 LazyLogText(response, obfuscate=False))
+    logger.debug('Call: %s', LazyLogText(call))
+    logger.debug('Store props: %s', LazyLogText(store_props, obfuscate=False))
+    logger.debug('Store headers: %s', LazyLogText(response.headers))
     translation_version = call.get('translation_format', 'auto')
 
     # process headers
@@ -255,15 +637,23 @@ def _process_response(response, call, store_props):
             response_format = 'json'
     logger.debug('Response format is {}'.format(repr(response_format)))
     if response_format == 'json' or response_format == 'xml':
-        if response_format == 'json':
+        empty = None
+        if call.get(TEMPLATE_PROPERTY_RESPONSE_STREAM):
+            json, empty = _parse_response_stream(response, call,
+                                                 response_format)
+        elif response_format == 'json':
             json = response.json()
         else:  # XML
             json = xmltodict.parse(response.text)
-            logger.debug('XML transformed to dict: {}'
-                         .format(shorted_text(obfuscate_passwords(json))))
+            logger.debug('XML transformed to dict: %s', LazyLogText(json))
+
+        if on_body:
+            on_body(response, json)
 
+        if empty is None:
+            empty = not json
         # if empty do nothing
-        if not json:
+        if empty:
             logger.debug('Empty {0} response'.format(response_format))
             return
 
@@ -284,62 +674,39 @@ def _process_response(response, call, store_props):
                 repr(response_format)))
 
 
-def _check_response(json, response, is_recoverable):
-    if not is_recoverable:
-        logger.debug(
-            'Check response (nonrecoverable) in json: {} by {}'.format(
-                shorted_text(obfuscate_passwords(json)),
-                repr(response)))
-    else:
-        logger.debug(
-            'Check response (recoverable) in json: {} by {}'.format(
-                shorted_text(obfuscate_passwords(json)),
-                repr(response)))
-
-    if not response:
-        return
-
-    if not isinstance(response, list) and not is_recoverable:
-        raise WrongTemplateDataException(
-            "Response (nonrecoverable) had to be list. "
-            "Type {} not supported. ".format(
-                type(response)))
+def _parse_response_stream(response, call, response_format):
+    """Parse streamed body, keep only parts used by translation/checks"""
+    paths = streaming.translation_paths(
+        call.get('response_translation', None),
+        call.get('translation_format', 'auto'))
+    for field in ['nonrecoverable_response', 'response_expectation']:
+        paths = streaming.merge_paths(
+            paths, streaming.expectation_paths(call.get(field)))
+    paginator = create_paginator(call)
+    if paginator:
+        for path in paginator.response_paths():
+            paths = streaming.add_path(paths, path)
+    logger.debug('Streamed response paths: %s',
+                 LazyLogText(paths, obfuscate=False))
+    try:
+        if response_format == 'json':
+            return streaming.parse_json_stream(
+                streaming.iter_text(response), paths)
+        json = streaming.parse_xml_stream(
+            response.iter_content(chunk_size=streaming.STREAM_CHUNK_SIZE),
+            paths)
+        logger.debug('XML transformed to dict: %s', LazyLogText(json))
+        # xml always has root element
+        return json, False
+    finally:
+        response.close()
 
-    if not isinstance(response, list) and is_recoverable:
-        raise WrongTemplateDataException(
-            "Response (recoverable) had to be list. "
-            "Type {} not supported. ".format(
-                type(response)))
 
-    if isinstance(response[0], list):
-        for item in response:
-            _check_response(json, item, is_recoverable)
-    else:
-        pattern = response.pop(-1)
-        for key in response:
+def _check_response(json, response, is_recoverable):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            'Check response (%s) in json: %s by %s',
+            'recoverable' if is_recoverable else 'nonrecoverable',
+            LazyLogText(json), repr(response))
 
-            try:
-                json = json[key]
-            except (TypeError, IndexError, KeyError) as e:
-                logger.debug(repr(e))
-                raise ExpectationException(
-                        'No key or index "{}" in json {}'.format(key, json))
-
-        if (
-            re.match(pattern, "{0}".format(json)) and
-            not is_recoverable
-        ):
-            raise NonRecoverableResponseException(
-                "Giving up... \n"
-                "Response value: "
-                "{} matches regexp:{} from nonrecoverable_response. ".format(
-                    json, pattern))
-        if (
-            not re.match(pattern, "{0}".format(json)) and
-            is_recoverable
-        ):
-            raise RecoverableResponseException(
-                "Trying one more time...\n"
-                "Response value:{} does not match regexp: {} "
-                "from response_expectation".format(
-                    json, pattern))
+    check_response(json, response, is_recoverable)
@@ -3,8 +3,13 @@
 import os
 import time
 import paramiko
+from functools import partial
 from six import StringIO
 
+from nativeedge_common_sdk._compat import text_type
+from nativeedge_common_sdk.filters import ObfuscationStream
+from nativeedge_terminal_sdk import ssh_pool
+
 
 class BaseConnection(object):
 
@@ -23,12 +28,32 @@ class BaseConnection(object):
         self.log_file_name = log_file_name
         self.conn = None
         self.buff = ""
+        # output/input => obfuscation stream for log
+        self._log_streams = {}
 
     # work with log
     def _write_to_log(self, text, output=True):
-        # write to log communication dump
+        # write to log communication dump, secrets are obfuscated
         if not self.log_file_name:
             return
+        stream = self._log_streams.get(output)
+        if stream is None:
+            stream = self._log_streams[output] = ObfuscationStream()
+        if not output:
+            prompt = self._log_streams.get(True)
+            if prompt is not None and prompt.waits_for_value():
+                # answer to `Password:` prompt of device has no key
+                stream.expect_value()
+        self._write_log_file(stream.feed(text), output)
+
+    def _flush_log(self):
+        # write text held by obfuscation
+        for output, stream in self._log_streams.items():
+            self._write_log_file(stream.flush(), output)
+
+    def _write_log_file(self, text, output):
+        if not text:
+            return
         if output:
             # we really want to see what server do before finish
             self.logger.debug(repr(text))
@@ -45,6 +70,12 @@ class BaseConnection(object):
 
     # connection function
     def _conn_send(self, message):
+        if isinstance(message, text_type):
+            try:
+                message.encode('ascii')
+            except UnicodeError:
+                # connection returns count of sent bytes, not symbols
+                message = message.encode('utf-8')
         curr_pos = 0
         while curr_pos < len(message):
             send_size = self.conn.send(message[curr_pos:])
@@ -75,6 +106,7 @@ class BaseConnection(object):
         return True
 
     def _conn_close(self):
+        self._flush_log()
         try:
             if self.conn:
                 # sometime code can't close in time
@@ -85,28 +117,59 @@ class BaseConnection(object):
 
 
 class SSHConnection(BaseConnection):
-
-    def __init__(self, *args, **kwargs):
-        super(SSHConnection, self).__init__(*args, **kwargs)
+    """Connection over ssh client.
+
+    Pool is opt-in: with pool=ssh_pool.SSH_POOL (or other SSHPool) client
+    is taken from pool and is left open there after close for next
+    connection to same device, without pool client is closed with
+    connection.
+    """
+
+    # ssh client and pool of clients
+    ssh = None
+    pool = None
+    # pool key and factory of client, for more clients from pool
+    _ssh_source = None
+
+    def __init__(self, logger=None, log_file_name=None, pool=None):
+        super(SSHConnection, self).__init__(logger, log_file_name)
         self.ssh = None
+        # ssh_pool.SSHPool, ssh client is shared with other connections
+        self.pool = pool
+        self._ssh_source = None
 
     def _ssh_connect(self, ip, user, password, key_content, port,
                      allow_agent=False):
         """open ssh connection"""
-        self.ssh = paramiko.SSHClient()
-        self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        if self.pool is not None:
+            self._ssh_source = (
+                ssh_pool.client_key(ip, port, user, password, key_content,
+                                    allow_agent),
+                partial(self._ssh_client, ip, user, password, key_content,
+                        port, allow_agent))
+            self.ssh = self.pool.acquire(*self._ssh_source)
+        else:
+            self.ssh = self._ssh_client(ip, user, password, key_content,
+                                        port, allow_agent)
+
+    @staticmethod
+    def _ssh_client(ip, user, password, key_content, port, allow_agent):
+        """open new ssh client"""
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
         # cisco required allow_agent equal to False
         if key_content:
             key = paramiko.RSAKey.from_private_key(
                 StringIO(key_content)
             )
-            self.ssh.connect(ip, username=user, pkey=key, port=port, timeout=5,
-                             allow_agent=allow_agent)
+            ssh.connect(ip, username=user, pkey=key, port=port, timeout=5,
+                        allow_agent=allow_agent)
         else:
-            self.ssh.connect(ip, username=user, password=password, port=port,
-                             timeout=5, allow_agent=allow_agent,
-                             look_for_keys=False)
+            ssh.connect(ip, username=user, password=password, port=port,
+                        timeout=5, allow_agent=allow_agent,
+                        look_for_keys=False)
+        return ssh
 
     def reuse_connection(self, ssh, conn):
         """Reuse already established connection"""
@@ -117,7 +180,11 @@ class SSHConnection(BaseConnection):
         """close connection"""
         self._conn_close()
         if self.ssh:
-            self.ssh.close()
+            if self.pool is not None:
+                # left open for other connections
+                self.pool.release(self.ssh)
+            else:
+                self.ssh.close()
             self.ssh = None
 
     def __del__(self):
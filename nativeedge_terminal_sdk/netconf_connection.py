@@ -1,6 +1,10 @@
 # Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import re
+from xml.etree import ElementTree
+
 from nativeedge_common_sdk import exceptions
+from nativeedge_common_sdk._compat import text_type
 from nativeedge_terminal_sdk import base_connection
 
 # final of any package
@@ -9,6 +13,103 @@ NETCONF_1_0_END = "]]>]]>"
 NETCONF_1_0_CAPABILITY = 'urn:ietf:params:netconf:base:1.0'
 # package based communication
 NETCONF_1_1_CAPABILITY = 'urn:ietf:params:netconf:base:1.1'
+# size of one read from connection
+RECV_SIZE = 65536
+# "\n#" + 10 digits of chunk size (max 4294967295) + "\n"
+MAX_CHUNK_HEADER = 13
+MAX_CHUNK_SIZE = 4294967295
+# rpcs sent without waiting for reply
+PIPELINE_WINDOW = 16
+
+# start tag of root element, after xml declaration and comments
+_RE_CHUNK_SIZE = re.compile(br'[1-9][0-9]*\Z')
+_RE_ROOT_TAG = re.compile(r'<(?![?!])[^>]*>')
+_RE_MESSAGE_ID = re.compile(r'\smessage-id\s*=\s*(["\'])(.*?)\1', re.S)
+
+
+def message_id(xml):
+    """message-id attribute of rpc or rpc-reply, None if not set"""
+    if not isinstance(xml, text_type):
+        xml = xml.decode('utf-8', 'replace')
+    root = _RE_ROOT_TAG.search(xml)
+    if not root:
+        return None
+    found = _RE_MESSAGE_ID.search(root.group(0))
+    return found.group(2) if found else None
+
+
+def _name_matches(name, tag):
+    """name: local name, {namespace}name or *"""
+    if name == '*':
+        return True
+    if name.startswith('{'):
+        return name == tag
+    return tag.rsplit('}', 1)[-1] == name
+
+
+class ReplyParser(object):
+    """Incremental xml parser, returns elements matched by path.
+
+    path: names separated by "/" from root element
+    ("rpc-reply/data/interfaces/interface") or, with leading "//" or without
+    "/", on any level ("//interfaces/interface", "interface"). Name is local
+    name (any namespace), "{namespace}name" or "*".
+
+    Matched elements are detached from tree, other elements are dropped
+    after parse, so only current matched element is kept in memory.
+    """
+
+    def __init__(self, path):
+        self.anywhere = path.startswith('//') or '/' not in path
+        self.names = [name for name in path.split('/') if name]
+        if not self.names:
+            raise exceptions.NonRecoverableError(
+                "Empty path: {}".format(repr(path)))
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._elements = []
+        # depth of matched element
+        self._matched = None
+
+    def _match(self):
+        names = self.names
+        elements = self._elements
+        if len(elements) < len(names) or \
+                (not self.anywhere and len(elements) != len(names)):
+            return False
+        offset = len(elements) - len(names)
+        return all(
+            _name_matches(name, elements[offset + idx].tag)
+            for idx, name in enumerate(names))
+
+    def _events(self):
+        result = []
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._elements.append(element)
+                if self._matched is None and self._match():
+                    self._matched = len(self._elements)
+                continue
+            depth = len(self._elements)
+            self._elements.pop()
+            if self._matched is not None and depth > self._matched:
+                # part of matched element
+                continue
+            if depth == self._matched:
+                self._matched = None
+                result.append(element)
+            if self._elements:
+                # drop processed element from parent
+                self._elements[-1].remove(element)
+        return result
+
+    def feed(self, data):
+        """parse part of xml, return list of matched elements"""
+        self._parser.feed(data)
+        return self._events()
+
+    def close(self):
+        self._parser.close()
+        return self._events()
 
 
 class NetConfConnection(base_connection.SSHConnection):
@@ -22,6 +123,9 @@ class NetConfConnection(base_connection.SSHConnection):
 
     current_level = NETCONF_1_0_CAPABILITY
 
+    # ssh client is owned by other connection (see open_channel)
+    shared_ssh = False
+
     def connect(
         self, ip, user, hello_string, password=None, key_content=None,
         port=830
@@ -34,73 +138,247 @@ class NetConfConnection(base_connection.SSHConnection):
         capabilities = self.send(hello_string)
         return capabilities
 
+    def open_channel(self, hello_string):
+        """open one more NETCONF session on same ssh transport, sessions
+        can be used from different threads. With pool session is counted
+        as pool user, so transport is not closed under it and client with
+        max_sessions users is not used. Without pool returned connection
+        uses same ssh client, which is closed with this connection. Client
+        not connected by pool (reused connection) is shared same way."""
+        ssh = self.ssh
+        pool = self.pool if self._ssh_source is not None else None
+        if pool is not None:
+            ssh = pool.acquire(*self._ssh_source)
+        try:
+            conn = ssh.get_transport().open_session()
+        except Exception:
+            if pool is not None:
+                pool.release(ssh)
+            raise
+        log_file_name = None
+        if self.log_file_name:
+            log_file_name = "{}.{}".format(self.log_file_name, conn.get_id())
+        channel = self.__class__(self.logger, log_file_name, pool=pool)
+        channel.reuse_connection(ssh, conn)
+        channel._ssh_source = self._ssh_source
+        channel.shared_ssh = pool is None
+        conn.invoke_subsystem('netconf')
+        # hello is always sent with 1.0 framing
+        channel.send(hello_string)
+        channel.current_level = self.current_level
+        return channel
+
     def send(self, xml):
         """send xml string by connection"""
+        self._send(xml)
+        return self._recv()
+
+    def _send(self, xml):
         if self.current_level == NETCONF_1_1_CAPABILITY:
             self._send_1_1(xml)
+        else:
+            self._send_1_0(xml)
+
+    def _recv(self):
+        if self.current_level == NETCONF_1_1_CAPABILITY:
             return self._recv_1_1()
+        return self._recv_1_0()
+
+    def send_pipelined(self, xmls, window=PIPELINE_WINDOW):
+        """send rpcs back to back, up to window rpcs wait for reply at
+        same time. Replies are matched to rpcs by message-id, reply
+        without known message-id (rpc-error) is used for oldest rpc.
+        Return list of replies in order of rpcs."""
+        if window < 1:
+            raise exceptions.NonRecoverableError(
+                "Pipeline window had to be positive: {}".format(window))
+        replies = []
+        # (message-id, position in replies) of rpcs without reply
+        pending = []
+
+        def _recv_reply():
+            reply = self._recv()
+            if not reply and self.conn.closed:
+                raise exceptions.NonRecoverableError(
+                    "connection closed, {} replies not received".format(
+                        len(pending)))
+            reply_id = message_id(reply)
+            for idx, (rpc_id, position) in enumerate(pending):
+                if rpc_id is not None and rpc_id == reply_id:
+                    break
+            else:
+                idx, position = 0, pending[0][1]
+            del pending[idx]
+            replies[position] = reply
+
+        for xml in xmls:
+            if len(pending) >= window:
+                _recv_reply()
+            pending.append((message_id(xml), len(replies)))
+            replies.append(None)
+            self._send(xml)
+        while pending:
+            _recv_reply()
+        return replies
+
+    def send_iter(self, xml, path):
+        """send xml string by connection, yield elements of reply matched
+        by path (see ReplyParser) while reply is received"""
+        if self.current_level == NETCONF_1_1_CAPABILITY:
+            self._send_1_1(xml)
+            parts = self._iter_1_1()
         else:
             self._send_1_0(xml)
-            return self._recv_1_0()
+            parts = self._iter_1_0()
+        parser = ReplyParser(path)
+        received = False
+        try:
+            for part in parts:
+                received = True
+                for element in parser.feed(part):
+                    yield element
+            if received:
+                for element in parser.close():
+                    yield element
+        finally:
+            # read rest of reply, connection is ready for next message
+            for _ in parts:
+                pass
 
     def _send_1_0(self, xml):
         """send xml string with NETCONF_1_0_END by connection"""
         if xml:
-            message = xml + NETCONF_1_0_END
+            if isinstance(xml, text_type):
+                message = xml + NETCONF_1_0_END
+            else:
+                message = xml + NETCONF_1_0_END.encode()
             self._conn_send(message)
 
-    def _recv_1_0(self):
-        """recv xml string with NETCONF_1_0_END by connection"""
-        while self.buff.find(NETCONF_1_0_END) == -1:
-            self.buff += self._conn_recv(8192)
-            if self.conn.closed:
+    def _take_buff(self):
+        """move saved data to bytearray, return is it text and bytearray"""
+        text = isinstance(self.buff, text_type)
+        return text, bytearray(
+            self.buff.encode('utf-8') if text else self.buff)
+
+    def _save_buff(self, buff, text):
+        """save data received after message"""
+        self.buff = bytes(buff)
+        if text:
+            self.buff = self.buff.decode('utf-8')
+
+    def _iter_1_0(self):
+        """yield parts of message with NETCONF_1_0_END by connection"""
+        text, buff = self._take_buff()
+        end = NETCONF_1_0_END.encode()
+        package_end = buff.find(end)
+        while package_end == -1:
+            # only new data and possible start of end marker are checked
+            checked = max(0, len(buff) - len(end) + 1)
+            if checked:
+                yield bytes(buff[:checked])
+                del buff[:checked]
+            text = isinstance(self._recv_more(buff, RECV_SIZE), text_type)
+            package_end = buff.find(end)
+            if package_end == -1 and self.conn.closed:
                 break
-        package_end = self.buff.find(NETCONF_1_0_END)
         # we have already closed connection
         if package_end == -1:
-            package_end = len(self.buff)
-        response = self.buff[:package_end]
-        self.buff = self.buff[package_end + len(NETCONF_1_0_END):]
-        return response
+            package_end = len(buff)
+        if package_end:
+            yield bytes(buff[:package_end])
+        self._save_buff(buff[package_end + len(end):], text)
+
+    def _recv_1_0(self):
+        """recv xml string with NETCONF_1_0_END by connection"""
+        return b"".join(self._iter_1_0()).decode('utf-8', 'replace')
 
     def _send_1_1(self, xml):
         """send xml string as package by connection"""
         if xml:
-            message = "\n#{0}\n".format(len(xml))
-            message += xml
-            message += "\n##\n"
+            if isinstance(xml, text_type):
+                # chunk size is in octets
+                message = "\n#{0}\n".format(len(xml.encode('utf-8')))
+                message += xml
+                message += "\n##\n"
+            else:
+                message = b"\n#" + str(len(xml)).encode() + b"\n"
+                message += xml + b"\n##\n"
             self._conn_send(message)
 
-    def _recv_1_1(self):
-        """send xml string as package by connection"""
-        get_everything = False
-        response = ""
-        while not get_everything:
-            if len(self.buff) < 2:
-                self.buff += self._conn_recv(2)
-            # skip new line
-            if self.buff[:2] != "\n#":
-                # We have already closed connection
-                # caller shoud stop to ask new messages
-                if not self.buff and self.conn.closed:
-                    return ""
+    def _recv_more(self, buff, size):
+        """append received data to bytearray, return received data"""
+        data = self._conn_recv(size)
+        if isinstance(data, text_type):
+            buff += data.encode('utf-8')
+        else:
+            buff += data
+        return data
+
+    def _iter_1_1(self):
+        """yield parts of chunked (RFC 6242) message by connection"""
+        text, buff = self._take_buff()
+        started = False
+        while True:
+            # chunk header: "\n#<size>\n" or end of message: "\n##\n"
+            while len(buff) < 2:
+                data = self._recv_more(buff, RECV_SIZE)
+                text = isinstance(data, text_type)
+                if not data and self.conn.closed:
+                    if started or buff:
+                        raise exceptions.NonRecoverableError(
+                            "connection closed")
+                    # We have already closed connection
+                    # caller shoud stop to ask new messages
+                    self.buff = "" if text else b""
+                    return
+            if buff[:2] != b"\n#":
                 raise exceptions.NonRecoverableError("no start")
-            self.buff = self.buff[2:]
-            # get package length
-            while self.buff.find("\n") == -1:
-                self.buff += self._conn_recv(20)
-            if self.buff[:2] == "#\n":
-                get_everything = True
-                self.buff = self.buff[2:]
+            header_end = buff.find(b"\n", 2)
+            while header_end == -1:
+                checked = len(buff)
+                if len(buff) > MAX_CHUNK_HEADER:
+                    raise exceptions.NonRecoverableError("no chunk size")
+                text = self._recv_or_fail(buff, RECV_SIZE)
+                header_end = buff.find(b"\n", checked)
+            header = bytes(buff[2:header_end])
+            del buff[:header_end + 1]
+            if header == b"#":
                 break
-            length = int(self.buff[:self.buff.find("\n")])
-            self.buff = self.buff[self.buff.find("\n") + 1:]
-            # load current package
-            while length > len(self.buff):
-                self.buff += self._conn_recv(length - len(self.buff))
-            response += self.buff[:length]
-            self.buff = self.buff[length:]
-        return response
+            # RFC 6242: chunk-size = 1*DIGIT1 0*DIGIT, up to 4294967295
+            if not _RE_CHUNK_SIZE.match(header) or \
+                    int(header) > MAX_CHUNK_SIZE:
+                raise exceptions.NonRecoverableError(
+                    "wrong chunk size: {}".format(repr(header)))
+            length = int(header)
+            started = True
+            # current chunk, yielded as soon as part is received
+            while length:
+                if not buff:
+                    text = self._recv_or_fail(buff, RECV_SIZE)
+                part = bytes(buff[:length])
+                del buff[:len(part)]
+                length -= len(part)
+                yield part
+        self._save_buff(buff, text)
+
+    def _recv_1_1(self):
+        """recv chunked (RFC 6242) xml string by connection"""
+        return b"".join(self._iter_1_1()).decode('utf-8', 'replace')
+
+    def _recv_or_fail(self, buff, size):
+        """recv data in the middle of message, return is it text"""
+        data = self._recv_more(buff, size)
+        if not data and self.conn.closed:
+            raise exceptions.NonRecoverableError("connection closed")
+        return isinstance(data, text_type)
+
+    def _ssh_close(self):
+        """close connection, shared ssh client is left open"""
+        if self.shared_ssh:
+            self._conn_close()
+            self.ssh = None
+        else:
+            super(NetConfConnection, self)._ssh_close()
 
     def close(self, goodbye_string=None):
         """send xml string by link and close connection"""
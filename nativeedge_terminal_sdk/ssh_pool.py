@@ -0,0 +1,178 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import time
+import threading
+
+from nativeedge_common_sdk.caching import content_hash
+
+# close clients without users after 5 minutes
+DEFAULT_IDLE_TIMEOUT = 300
+# interval of keepalive packets, dead transports are found by paramiko
+DEFAULT_KEEPALIVE = 30
+# sessions on one transport, default MaxSessions of OpenSSH
+DEFAULT_MAX_SESSIONS = 10
+# idle clients kept open
+DEFAULT_MAXSIZE = 32
+
+
+def client_key(ip, port, user, password=None, key_content=None,
+               allow_agent=False):
+    """Pool key of client, credentials are kept only as digest"""
+    if key_content:
+        credentials = 'key:' + content_hash(key_content)
+    elif password:
+        credentials = 'password:' + content_hash(password)
+    else:
+        credentials = None
+    return (ip, int(port), user, credentials, bool(allow_agent))
+
+
+def is_alive(client):
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+class _Entry(object):
+
+    __slots__ = ('key', 'client', 'users', 'last_used')
+
+    def __init__(self, key, client):
+        self.key = key
+        self.client = client
+        self.users = 1
+        self.last_used = time.time()
+
+
+class SSHPool(object):
+    """Thread safe pool of ssh clients, shared by connections to same device.
+
+    Connection takes client by acquire() and opens own channel (session,
+    shell or subsystem) on its transport. Client is left open after
+    release() and is reused by next connection with same host, port, user
+    and credentials, so key exchange is done once. Clients with inactive
+    transport are replaced, clients without users longer than
+    idle_timeout are closed.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 keepalive=DEFAULT_KEEPALIVE,
+                 max_sessions=DEFAULT_MAX_SESSIONS,
+                 maxsize=DEFAULT_MAXSIZE):
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.max_sessions = max_sessions
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # key => list of entries
+        self._entries = {}
+        # id(client) => entry
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def _remove(self, entry):
+        self._clients.pop(id(entry.client), None)
+        entries = self._entries.get(entry.key, [])
+        if entry in entries:
+            entries.remove(entry)
+        if not entries:
+            self._entries.pop(entry.key, None)
+
+    def _evict(self):
+        """remove dead, expired and extra idle entries, return clients
+        for close"""
+        now = time.time()
+        idle = []
+        closed = []
+        for entry in list(self._clients.values()):
+            if entry.users:
+                continue
+            if now - entry.last_used > self.idle_timeout or \
+                    not is_alive(entry.client):
+                self._remove(entry)
+                closed.append(entry.client)
+            else:
+                idle.append(entry)
+        # least recently used first
+        idle.sort(key=lambda entry: entry.last_used)
+        for entry in idle[:max(len(idle) - self.maxsize, 0)]:
+            self._remove(entry)
+            closed.append(entry.client)
+        return closed
+
+    @staticmethod
+    def _close(clients):
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def _take(self, key):
+        for entry in self._entries.get(key, []):
+            if entry.users < self.max_sessions and is_alive(entry.client):
+                entry.users += 1
+                return entry.client
+        return None
+
+    def acquire(self, key, factory):
+        """Return live client for key or store result of factory()"""
+        with self._lock:
+            closed = self._evict()
+            client = self._take(key)
+            if client is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._close(closed)
+        if client is not None:
+            return client
+        # key exchange without lock
+        client = factory()
+        transport = client.get_transport()
+        if transport is not None and self.keepalive:
+            transport.set_keepalive(self.keepalive)
+        entry = _Entry(key, client)
+        with self._lock:
+            self._entries.setdefault(key, []).append(entry)
+            self._clients[id(client)] = entry
+        return client
+
+    def release(self, client):
+        """Return client to pool, client from other source is closed"""
+        with self._lock:
+            entry = self._clients.get(id(client))
+            if entry is not None and entry.client is client:
+                entry.users = max(entry.users - 1, 0)
+                entry.last_used = time.time()
+                closed = self._evict()
+            else:
+                closed = [client]
+        self._close(closed)
+
+    def clear(self):
+        """Close all clients"""
+        with self._lock:
+            closed = [entry.client for entry in self._clients.values()]
+            self._entries.clear()
+            self._clients.clear()
+            self.hits = 0
+            self.misses = 0
+        self._close(closed)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._clients),
+                'in_use': sum(
+                    1 for entry in self._clients.values() if entry.users),
+            }
+
+
+# process wide pool, used by connections created with pool=SSH_POOL
+SSH_POOL = SSHPool()
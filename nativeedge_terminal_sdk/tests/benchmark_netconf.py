@@ -0,0 +1,134 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+"""Compare NETCONF 1.1 reply decoders on fake server over real ssh.
+
+Run: python -m nativeedge_terminal_sdk.tests.benchmark_netconf
+"""
+
+from __future__ import print_function
+import time
+import socket
+import threading
+
+import paramiko
+
+from nativeedge_common_sdk import exceptions
+from nativeedge_terminal_sdk import netconf_connection
+from nativeedge_terminal_sdk.tests import fake_server
+
+# size of chunks in reply, as sent by devices
+CHUNK_SIZE = 8192
+SIZES = (1024 * 1024, 8 * 1024 * 1024, 32 * 1024 * 1024)
+
+
+class StrConnection(netconf_connection.NetConfConnection):
+    """Connection with text recv and _recv_1_1 before bytearray decoder"""
+
+    def _conn_recv(self, size):
+        return super(StrConnection, self)._conn_recv(size).decode('utf-8')
+
+    def _recv_1_1(self):
+        get_everything = False
+        response = ""
+        while not get_everything:
+            if len(self.buff) < 2:
+                self.buff += self._conn_recv(2)
+            # skip new line
+            if self.buff[:2] != "\n#":
+                if not self.buff and self.conn.closed:
+                    return ""
+                raise exceptions.NonRecoverableError("no start")
+            self.buff = self.buff[2:]
+            # get package length
+            while self.buff.find("\n") == -1:
+                self.buff += self._conn_recv(20)
+            if self.buff[:2] == "#\n":
+                get_everything = True
+                self.buff = self.buff[2:]
+                break
+            length = int(self.buff[:self.buff.find("\n")])
+            self.buff = self.buff[self.buff.find("\n") + 1:]
+            # load current package
+            while length > len(self.buff):
+                self.buff += self._conn_recv(length - len(self.buff))
+            response += self.buff[:length]
+            self.buff = self.buff[length:]
+        return response
+
+
+def _reply(size):
+    item = '<interface><name>eth{}</name><mtu>1500</mtu></interface>'
+    body = []
+    length = 0
+    while length < size:
+        body.append(item.format(len(body)))
+        length += len(body[-1])
+    return '<rpc-reply><data>{}</data></rpc-reply>'.format(''.join(body))
+
+
+def _framed(reply):
+    parts = []
+    for pos in range(0, len(reply), CHUNK_SIZE):
+        chunk = reply[pos:pos + CHUNK_SIZE]
+        parts.append('\n#{}\n{}'.format(len(chunk), chunk))
+    parts.append('\n##\n')
+    return ''.join(parts)
+
+
+def _serve(sock, messages):
+    connection = fake_server.start_server(sock)
+    for message in messages:
+        connection._conn_send(message)
+    # wait for client
+    connection.conn.recv(1)
+    connection._ssh_close()
+
+
+def _client(port, connection_class):
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect('127.0.0.1', port=port, username=fake_server.netconf_user,
+                password=fake_server.netconf_password,
+                allow_agent=False, look_for_keys=False)
+    chan = ssh.get_transport().open_session()
+    chan.invoke_subsystem('netconf')
+    connection = connection_class()
+    connection.reuse_connection(ssh, chan)
+    connection.current_level = netconf_connection.NETCONF_1_1_CAPABILITY
+    return connection
+
+
+def run(connection_class, replies):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(1)
+    server = threading.Thread(
+        target=_serve, args=(sock, [_framed(reply) for reply in replies]))
+    server.start()
+    connection = _client(sock.getsockname()[1], connection_class)
+    timings = []
+    for reply in replies:
+        start = time.time()
+        received = connection._recv_1_1()
+        timings.append(time.time() - start)
+        assert received == reply
+    connection._conn_send('.')
+    server.join()
+    connection._ssh_close()
+    sock.close()
+    return timings
+
+
+def main():
+    replies = [_reply(size) for size in SIZES]
+    for name, connection_class in (
+            ('str decoder', StrConnection),
+            ('bytearray decoder',
+             netconf_connection.NetConfConnection)):
+        for size, timing in zip(SIZES, run(connection_class, replies)):
+            print('{}: {} MiB reply in {:.3f}s'.format(
+                name, size // (1024 * 1024), timing))
+
+
+if __name__ == '__main__':
+    main()
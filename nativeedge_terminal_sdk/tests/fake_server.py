@@ -5,8 +5,6 @@ import socket
 import sys
 import paramiko
 import xmltodict
-from six import StringIO
-from Crypto.PublicKey import RSA
 from nativeedge_terminal_sdk import netconf_connection
 
 # configs
@@ -16,14 +14,6 @@ netconf_password = "netconf"
 netconf_port = 2200
 netconf_host = "localhost"
 
-print("Netconf started on {}:{} with credentials {}:{} with {} version."
-      .format(netconf_host, netconf_port, netconf_user, netconf_password,
-              "1.1" if debug_1_1 else "1.0"))
-
-key = RSA.generate(2048)
-privatekey = key.exportKey()
-host_key = paramiko.RSAKey.from_private_key(StringIO(privatekey))
-
 
 class Server(paramiko.ServerInterface):
 
@@ -52,95 +42,116 @@ class Server(paramiko.ServerInterface):
         return False
 
 
-# now connect
-try:
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    sock.bind((netconf_host, netconf_port))
-except Exception as e:
-    print("Exception: " + repr(e))
-    sys.exit(1)
-
-try:
-    sock.listen(100)
-    print("Listening for connection ...")
+def start_server(sock, username=netconf_user, password=netconf_password):
+    """Accept ssh connection on listened socket, return netconf channel"""
     client, addr = sock.accept()
-except Exception as e:
-    print("Exception: " + repr(e))
-    sys.exit(1)
+    print("Got a connection!")
 
-print("Got a connection!")
-
-transport = paramiko.Transport(client)
-transport.add_server_key(host_key)
-server = Server(netconf_user, netconf_password)
-try:
+    transport = paramiko.Transport(client)
+    transport.add_server_key(paramiko.RSAKey.generate(2048))
+    server = Server(username, password)
     transport.start_server(server=server)
-except paramiko.SSHException:
-    print("SSH negotiation failed.")
-    sys.exit(1)
-
-# wait for auth
-chan = transport.accept(20)
-if chan is None:
-    print("No channel.")
-    sys.exit(1)
-print("Authenticated!")
-
-connection = netconf_connection.NetConfConnection()
-connection.reuse_connection(transport, chan)
-capabilities = connection._recv_1_0()
-print("Recv 1.0:" + capabilities)
-
-if debug_1_1:
-    hello_message = (
-        '<?xml version="1.0" encoding="UTF-8"?>'
-        '<rfc6020:hello'
-        ' xmlns:rfc6020="urn:ietf:params:xml:ns:netconf:base:1.0">'
-        '<rfc6020:capabilities>'
-        '<rfc6020:capability'
-        '>urn:ietf:params:netconf:base:1.0<'
-        '/rfc6020:capability>'
-        '<rfc6020:capability'
-        '>urn:ietf:params:netconf:base:1.1<'
-        '/rfc6020:capability>'
-        '</rfc6020:capabilities>'
-        '</rfc6020:hello>')
-else:
-    hello_message = (
-        '<?xml version="1.0" encoding="UTF-8"?>'
-        '<rfc6020:hello'
-        ' xmlns:rfc6020="urn:ietf:params:xml:ns:netconf:base:1.0">'
-        '<rfc6020:capabilities>'
-        '<rfc6020:capability'
-        '>urn:ietf:params:netconf:base:1.0<'
-        '/rfc6020:capability>'
-        '</rfc6020:capabilities>'
-        '</rfc6020:hello>')
-
-connection._send_1_0(hello_message)
-
-capabilities = xmltodict.parse(capabilities, process_namespaces=True).get(
-    'urn:ietf:params:xml:ns:netconf:base:1.0:hello', {}).get(
-        'urn:ietf:params:xml:ns:netconf:base:1.0:capabilities', {}).get(
-            'urn:ietf:params:xml:ns:netconf:base:1.0:capability', [])
-
-version_1_1 = 'urn:ietf:params:netconf:base:1.1' in capabilities and debug_1_1
-print("Use 1.1 version: {}".format(repr(version_1_1)))
-
-while not connection.conn.closed:
-    if version_1_1:
-        print("Recv 1.1: " + connection._recv_1_1())
+
+    # wait for auth
+    chan = transport.accept(20)
+    if chan is None:
+        raise paramiko.SSHException("No channel.")
+    print("Authenticated!")
+
+    connection = netconf_connection.NetConfConnection()
+    connection.reuse_connection(transport, chan)
+    return connection
+
+
+def hello(connection, use_1_1=debug_1_1):
+    """Exchange hello messages, return is 1.1 version used"""
+    capabilities = connection._recv_1_0()
+    print("Recv 1.0:" + capabilities)
+
+    if use_1_1:
+        hello_message = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rfc6020:hello'
+            ' xmlns:rfc6020="urn:ietf:params:xml:ns:netconf:base:1.0">'
+            '<rfc6020:capabilities>'
+            '<rfc6020:capability'
+            '>urn:ietf:params:netconf:base:1.0<'
+            '/rfc6020:capability>'
+            '<rfc6020:capability'
+            '>urn:ietf:params:netconf:base:1.1<'
+            '/rfc6020:capability>'
+            '</rfc6020:capabilities>'
+            '</rfc6020:hello>')
     else:
-        print("Recv 1.0: " + connection._recv_1_0())
-    message_for_send = (
-        '<?xml version="1.0" encoding="UTF-8"?>'
-        '<rpc-reply message-id="101"'
-        ' xmlns="urn:ietf:params:xml:ns:netconf:base:1.0">'
-        '<ok/>'
-        '</rpc-reply>')
-    if not connection.conn.closed:
+        hello_message = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rfc6020:hello'
+            ' xmlns:rfc6020="urn:ietf:params:xml:ns:netconf:base:1.0">'
+            '<rfc6020:capabilities>'
+            '<rfc6020:capability'
+            '>urn:ietf:params:netconf:base:1.0<'
+            '/rfc6020:capability>'
+            '</rfc6020:capabilities>'
+            '</rfc6020:hello>')
+
+    connection._send_1_0(hello_message)
+
+    capabilities = xmltodict.parse(
+        capabilities, process_namespaces=True).get(
+        'urn:ietf:params:xml:ns:netconf:base:1.0:hello', {}).get(
+            'urn:ietf:params:xml:ns:netconf:base:1.0:capabilities', {}).get(
+                'urn:ietf:params:xml:ns:netconf:base:1.0:capability', [])
+
+    version_1_1 = 'urn:ietf:params:netconf:base:1.1' in capabilities and \
+        use_1_1
+    print("Use 1.1 version: {}".format(repr(version_1_1)))
+    return version_1_1
+
+
+def serve(connection, version_1_1, reply=None):
+    """Answer to each message by reply"""
+    if reply is None:
+        reply = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rpc-reply message-id="101"'
+            ' xmlns="urn:ietf:params:xml:ns:netconf:base:1.0">'
+            '<ok/>'
+            '</rpc-reply>')
+    while not connection.conn.closed:
         if version_1_1:
-            connection._send_1_1(message_for_send)
+            print("Recv 1.1: " + connection._recv_1_1())
         else:
-            connection._send_1_0(message_for_send)
+            print("Recv 1.0: " + connection._recv_1_0())
+        if not connection.conn.closed:
+            if version_1_1:
+                connection._send_1_1(reply)
+            else:
+                connection._send_1_0(reply)
+
+
+def main():
+    print("Netconf started on {}:{} with credentials {}:{} with {} version."
+          .format(netconf_host, netconf_port, netconf_user,
+                  netconf_password, "1.1" if debug_1_1 else "1.0"))
+    # now connect
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((netconf_host, netconf_port))
+        sock.listen(100)
+        print("Listening for connection ...")
+    except Exception as e:
+        print("Exception: " + repr(e))
+        sys.exit(1)
+
+    try:
+        connection = start_server(sock)
+    except Exception as e:
+        print("Exception: " + repr(e))
+        sys.exit(1)
+
+    serve(connection, hello(connection))
+
+
+if __name__ == '__main__':
+    main()
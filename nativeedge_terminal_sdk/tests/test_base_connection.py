@@ -1,10 +1,13 @@
 # Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import os
 import six
 import mock
+import tempfile
 import unittest
 
 import nativeedge_terminal_sdk.base_connection as base_connection
+from nativeedge_terminal_sdk import ssh_pool
 
 
 class SSHConnectionTest(unittest.TestCase):
@@ -117,15 +120,15 @@ class SSHConnectionTest(unittest.TestCase):
                 with mock.patch(
                         'builtins.open', fake_file
                 ):
-                    conn._write_to_log("Some_text")
+                    conn._write_to_log("Some_text\n")
             else:
                 # python 2
                 with mock.patch(
                         '__builtin__.open', fake_file
                 ):
-                    conn._write_to_log("Some_text")
+                    conn._write_to_log("Some_text\n")
             fake_file.assert_called_once_with('/proc/read_only_file', 'a+')
-            fake_file().write.assert_called_with('Some_text')
+            fake_file().write.assert_called_with('Some_text\n')
 
     def test_write_to_log_write_file_input(self):
         conn = base_connection.SSHConnection()
@@ -139,15 +142,15 @@ class SSHConnectionTest(unittest.TestCase):
                 with mock.patch(
                         'builtins.open', fake_file
                 ):
-                    conn._write_to_log("Some_text", False)
+                    conn._write_to_log("Some_text\n", False)
             else:
                 # python 2
                 with mock.patch(
                         '__builtin__.open', fake_file
                 ):
-                    conn._write_to_log("Some_text", False)
+                    conn._write_to_log("Some_text\n", False)
             fake_file.assert_called_once_with('/proc/read_only_file.in', 'a+')
-            fake_file().write.assert_called_with('Some_text')
+            fake_file().write.assert_called_with('Some_text\n')
             conn.logger.debug.assert_not_called()
 
     def test_write_to_log_cantcreate_dir(self):
@@ -165,6 +168,42 @@ class SSHConnectionTest(unittest.TestCase):
             "\'/proc/read_only\'\")"
         )
 
+    def test_write_to_log_obfuscated(self):
+        conn = base_connection.SSHConnection()
+        conn.logger = mock.Mock()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            conn.log_file_name = os.path.join(tmpdir, 'dump.log')
+            for chunk in [b"login ok\npass", b"word: SECRET", b"_VALUE\n$ "]:
+                conn._write_to_log(chunk)
+            with open(conn.log_file_name) as log_file:
+                # secret is held until end of line
+                self.assertEqual(log_file.read(),
+                                 "login ok\npassword: xxxxxxxxxxxxxxxx\n$ ")
+            conn._write_to_log("token:", False)
+            self.assertFalse(os.path.exists(conn.log_file_name + '.in'))
+            conn._conn_close()
+            with open(conn.log_file_name + '.in') as log_file:
+                self.assertEqual(log_file.read(), "token:xxxxxxxxxxxxxxxx")
+
+    def test_write_to_log_prompt(self):
+        conn = base_connection.SSHConnection()
+        conn.logger = mock.Mock()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            conn.log_file_name = os.path.join(tmpdir, 'dump.log')
+            conn._write_to_log("login: ")
+            conn._write_to_log("admin\n", False)
+            conn._write_to_log("\r\nPassword: ")
+            # answer is sent by parts
+            for chunk in ["SEC", "RET", "\n"]:
+                conn._write_to_log(chunk, False)
+            conn._write_to_log("\r\nrouter# ")
+            conn._write_to_log("show version\n", False)
+            conn._conn_close()
+            with open(conn.log_file_name + '.in') as log_file:
+                self.assertEqual(
+                    log_file.read(),
+                    "admin\nxxxxxxxxxxxxxxxx\nshow version\n")
+
     def test_reuse_connection(self):
         "Check resuse exteranl connection with close on delete"
         conn = base_connection.SSHConnection()
@@ -183,6 +222,25 @@ class SSHConnectionTest(unittest.TestCase):
         conn_fake.close.assert_called_once_with()
         ssh_fake.close.assert_called_once_with()
 
+    def test_ssh_pool(self):
+        pool = ssh_pool.SSHPool()
+        ssh_mock = mock.MagicMock()
+        with mock.patch("paramiko.SSHClient",
+                        mock.MagicMock(return_value=ssh_mock)) as client:
+            first = base_connection.SSHConnection(pool=pool)
+            first._ssh_connect("ip", "user", "password", None, 22)
+            second = base_connection.SSHConnection(pool=pool)
+            second._ssh_connect("ip", "user", "password", None, 22)
+        client.assert_called_once_with()
+        self.assertIs(first.ssh, second.ssh)
+        first._ssh_close()
+        second._ssh_close()
+        # left open for next connection
+        ssh_mock.close.assert_not_called()
+        self.assertEqual(pool.stats()['size'], 1)
+        pool.clear()
+        ssh_mock.close.assert_called_once_with()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,7 @@ import mock
 import unittest
 
 import nativeedge_terminal_sdk.netconf_connection as netconf_connection
+from nativeedge_terminal_sdk import ssh_pool
 from nativeedge_common_sdk import exceptions
 
 
@@ -119,6 +120,220 @@ class NetConfConnectionTest(unittest.TestCase):
         netconf.conn.recv = mock.MagicMock(return_value=(""))
         self.assertEqual(netconf.send("ping"), "")
 
+    def test_recv_1_0_parts(self):
+        """check bytes reply with end marker split between parts"""
+        netconf = self.generate_all_mocks()
+        netconf.conn.closed = False
+        message = b"<rpc>\xc3\xa4</rpc>]]>]]><next/>]]>]]>"
+        parts = [message[pos:pos + 4] for pos in range(0, len(message), 4)]
+        netconf.conn.recv = mock.MagicMock(side_effect=parts)
+        self.assertEqual(netconf._recv_1_0(), u"<rpc>\xe4</rpc>")
+        self.assertEqual(netconf.buff, b"<")
+        self.assertEqual(netconf._recv_1_0(), "<next/>")
+        self.assertEqual(netconf.buff, b"")
+
+    def test_send_bytes(self):
+        netconf = self.generate_all_mocks()
+        netconf._send_1_1(u"\xe4")
+        netconf.conn.send.assert_called_with(b"\n#2\n\xc3\xa4\n##\n")
+        netconf._send_1_1(b"ping")
+        netconf.conn.send.assert_called_with(b"\n#4\nping\n##\n")
+        netconf._send_1_0(b"ping")
+        netconf.conn.send.assert_called_with(b"ping]]>]]>")
+
+    def test_recv_1_1_parts(self):
+        """check chunked reply received by small parts"""
+        netconf = self.generate_all_mocks()
+        netconf.conn.closed = False
+        message = (b"\n#6\n<rpc>\xc3\n#7\n\xa4</rpc>\n##\n"
+                   b"\n#4\nnext\n##\n")
+        parts = [message[pos:pos + 3] for pos in range(0, len(message), 3)]
+        netconf.conn.recv = mock.MagicMock(side_effect=parts)
+        self.assertEqual(netconf._recv_1_1(), u"<rpc>\xe4</rpc>")
+        self.assertEqual(netconf._recv_1_1(), "next")
+        self.assertEqual(netconf.buff, b"")
+        # connection closed in the middle of message
+        netconf.conn.closed = True
+        netconf.conn.recv = mock.MagicMock(side_effect=[b"\n#10\nabc", b""])
+        with self.assertRaises(exceptions.NonRecoverableError):
+            netconf._recv_1_1()
+        # wrong chunk size
+        for header in ["abc", "-3", "0", "00", "+5", " 7", "1_0", "07",
+                       "4294967296"]:
+            netconf.buff = "\n#{}\nabcdefghij\n##\n".format(header)
+            with self.assertRaises(exceptions.NonRecoverableError):
+                netconf._recv_1_1()
+
+    def test_reply_parser(self):
+        reply = (b'<rpc-reply xmlns="urn:ietf:params:xml:ns:netconf:base:1.0">'
+                 b'<data><interfaces xmlns="urn:if">'
+                 b'<interface><name>eth0</name></interface>'
+                 b'<interface><name>eth1</name></interface>'
+                 b'</interfaces><name>other</name></data></rpc-reply>')
+        for path, names in [
+            ('rpc-reply/data/interfaces/interface', ['eth0', 'eth1']),
+            ('//interface', ['eth0', 'eth1']),
+            ('{urn:if}interface', ['eth0', 'eth1']),
+            ('{urn:other}interface', []),
+            ('/data/interfaces/interface', []),
+            ('name', ['eth0', 'eth1', 'other']),
+            ('data/name', []),
+            ('rpc-reply/data/name', ['other']),
+            ('//data/name', ['other']),
+        ]:
+            parser = netconf_connection.ReplyParser(path)
+            elements = []
+            for pos in range(len(reply)):
+                elements += parser.feed(reply[pos:pos + 1])
+            elements += parser.close()
+            self.assertEqual(
+                [element.findtext('{urn:if}name') or element.text
+                 for element in elements], names, path)
+        with self.assertRaises(exceptions.NonRecoverableError):
+            netconf_connection.ReplyParser('/')
+
+    def test_send_iter(self):
+        netconf = self.generate_all_mocks()
+        netconf.conn.closed = False
+        netconf.current_level = netconf_connection.NETCONF_1_1_CAPABILITY
+        reply = b"<rpc-reply><a>1</a><a>2</a><a>3</a></rpc-reply>"
+        message = (b"\n#" + str(len(reply)).encode() + b"\n" + reply +
+                   b"\n##\n\n#4\nnext\n##\n")
+        parts = [message[pos:pos + 5] for pos in range(0, len(message), 5)]
+        netconf.conn.recv = mock.MagicMock(side_effect=parts)
+        elements = netconf.send_iter("ping", "a")
+        self.assertEqual(next(elements).text, "1")
+        # rest of reply is skipped on close
+        elements.close()
+        self.assertEqual(netconf.send("ping"), "next")
+        # 1.0
+        netconf.current_level = netconf_connection.NETCONF_1_0_CAPABILITY
+        netconf.conn.recv = mock.MagicMock(
+            side_effect=[reply[:20], reply[20:] + b"]]>]]>"])
+        self.assertEqual(
+            [element.text for element in netconf.send_iter("ping", "a")],
+            ["1", "2", "3"])
+
+    def test_message_id(self):
+        self.assertEqual(netconf_connection.message_id(
+            '<?xml version="1.0"?><!-- a > b -->\n<nc:rpc xmlns:nc="urn:x"'
+            ' message-id="101"><get message-id="1"/></nc:rpc>'), "101")
+        self.assertEqual(netconf_connection.message_id(
+            b"<rpc-reply message-id='a b'/>"), "a b")
+        self.assertIsNone(netconf_connection.message_id(
+            '<rpc-reply><rpc-error message-id="1"/></rpc-reply>'))
+        self.assertIsNone(netconf_connection.message_id(''))
+
+    def test_send_pipelined(self):
+        netconf = self.generate_all_mocks()
+        netconf.current_level = netconf_connection.NETCONF_1_1_CAPABILITY
+        events = []
+        netconf.conn.send = mock.MagicMock(
+            side_effect=lambda message: events.append('send') or len(
+                message))
+
+        def _reply(message_id):
+            if message_id:
+                reply = '<rpc-reply message-id="{}"/>'.format(message_id)
+            else:
+                reply = '<rpc-reply><rpc-error/></rpc-reply>'
+            return '\n#{}\n{}\n##\n'.format(len(reply), reply)
+
+        replies = [_reply("2"), _reply("1"), _reply(None), _reply("4")]
+        netconf.conn.recv = mock.MagicMock(
+            side_effect=lambda size: events.append('recv') or replies.pop(0))
+        self.assertEqual(
+            netconf.send_pipelined([
+                '<rpc message-id="{}"/>'.format(idx)
+                for idx in range(1, 5)], window=2), [
+                '<rpc-reply message-id="1"/>',
+                '<rpc-reply message-id="2"/>',
+                '<rpc-reply><rpc-error/></rpc-reply>',
+                '<rpc-reply message-id="4"/>'])
+        self.assertEqual(events, [
+            'send', 'send', 'recv', 'send', 'recv', 'send', 'recv', 'recv'])
+        # closed before all replies
+        netconf.conn.recv = mock.MagicMock(side_effect=[_reply("1"), ""])
+        with self.assertRaises(exceptions.NonRecoverableError):
+            netconf.send_pipelined(['<rpc message-id="1"/>',
+                                    '<rpc message-id="2"/>'])
+        with self.assertRaises(exceptions.NonRecoverableError):
+            netconf.send_pipelined([], window=0)
+
+    def test_open_channel(self):
+        netconf = self.generate_all_mocks()
+        netconf.current_level = netconf_connection.NETCONF_1_1_CAPABILITY
+        conn = mock.Mock()
+        conn.send = mock.MagicMock(return_value=256)
+        conn.recv = mock.MagicMock(
+            return_value="<hello/>" + netconf_connection.NETCONF_1_0_END)
+        netconf.ssh.get_transport().open_session = mock.MagicMock(
+            return_value=conn)
+        channel = netconf.open_channel("<hello/>")
+        conn.invoke_subsystem.assert_called_with('netconf')
+        conn.send.assert_called_with(
+            "<hello/>" + netconf_connection.NETCONF_1_0_END)
+        self.assertEqual(channel.current_level,
+                         netconf_connection.NETCONF_1_1_CAPABILITY)
+        self.assertIs(channel.ssh, netconf.ssh)
+        # ssh client is closed only by owner
+        channel.close()
+        conn.close.assert_called_with()
+        ssh = netconf.ssh
+        ssh.close.assert_not_called()
+        netconf.close()
+        ssh.close.assert_called_with()
+
+    def test_open_channel_pool(self):
+        pool = ssh_pool.SSHPool(max_sessions=2)
+        clients = []
+
+        def _client():
+            client = mock.MagicMock()
+            conn = client.get_transport().open_session()
+            conn.send = mock.MagicMock(return_value=256)
+            conn.recv = mock.MagicMock(
+                return_value="<hello/>" + netconf_connection.NETCONF_1_0_END)
+            clients.append(client)
+            return client
+
+        with mock.patch("paramiko.SSHClient", _client):
+            netconf = netconf_connection.NetConfConnection(pool=pool)
+            netconf.connect("ip", "user", "<hello/>", "password")
+            channel = netconf.open_channel("<hello/>")
+            self.assertIs(channel.ssh, clients[0])
+            # transport has max_sessions users, other client is opened
+            other = netconf.open_channel("<hello/>")
+            self.assertIs(other.ssh, clients[1])
+        self.assertEqual(pool.stats()['in_use'], 2)
+        # transport is not closed under open channel
+        netconf.close()
+        channel.close()
+        other.close()
+        clients[0].close.assert_not_called()
+        clients[1].close.assert_not_called()
+        self.assertEqual(pool.stats()['in_use'], 0)
+        pool.clear()
+        clients[0].close.assert_called_once_with()
+
+    def test_open_channel_reused_pool(self):
+        pool = ssh_pool.SSHPool(max_sessions=2)
+        ssh = mock.MagicMock()
+        conn = ssh.get_transport().open_session()
+        conn.send = mock.MagicMock(return_value=256)
+        conn.recv = mock.MagicMock(
+            return_value="<hello/>" + netconf_connection.NETCONF_1_0_END)
+        netconf = netconf_connection.NetConfConnection(pool=pool)
+        netconf.reuse_connection(ssh, mock.Mock())
+        # client is not from pool, channel shares it
+        channel = netconf.open_channel("<hello/>")
+        self.assertIs(channel.ssh, ssh)
+        self.assertIsNone(channel.pool)
+        self.assertEqual(pool.stats()['in_use'], 0)
+        channel.close()
+        conn.close.assert_called_with()
+        ssh.close.assert_not_called()
+
     def test_close(self):
         netconf = self.generate_all_mocks()
 
@@ -0,0 +1,100 @@
+# Copyright © 2024 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import mock
+import unittest
+
+from nativeedge_terminal_sdk import ssh_pool
+
+
+class SSHPoolTest(unittest.TestCase):
+
+    def _client(self, active=True):
+        client = mock.Mock()
+        client.get_transport().is_active = mock.Mock(return_value=active)
+        return client
+
+    def test_client_key(self):
+        key = ssh_pool.client_key("ip", "22", "user", password="secret")
+        self.assertEqual(key[:3], ("ip", 22, "user"))
+        self.assertNotIn("secret", str(key))
+        self.assertEqual(
+            key, ssh_pool.client_key("ip", 22, "user", password="secret"))
+        self.assertNotEqual(
+            key, ssh_pool.client_key("ip", 22, "user", password="other"))
+        self.assertNotEqual(
+            key, ssh_pool.client_key("ip", 22, "user", key_content="secret"))
+
+    def test_acquire_release(self):
+        pool = ssh_pool.SSHPool(keepalive=10)
+        client = self._client()
+        factory = mock.Mock(return_value=client)
+        self.assertIs(pool.acquire("key", factory), client)
+        client.get_transport().set_keepalive.assert_called_with(10)
+        # shared by connections in use
+        self.assertIs(pool.acquire("key", factory), client)
+        pool.release(client)
+        pool.release(client)
+        # idle client is reused
+        self.assertIs(pool.acquire("key", factory), client)
+        factory.assert_called_once_with()
+        self.assertEqual(pool.stats(), {
+            'hits': 2, 'misses': 1, 'size': 1, 'in_use': 1})
+        # other key
+        other = self._client()
+        self.assertIs(pool.acquire("other", lambda: other), other)
+        self.assertEqual(len(pool), 2)
+        client.close.assert_not_called()
+        pool.clear()
+        client.close.assert_called_with()
+        other.close.assert_called_with()
+        self.assertEqual(len(pool), 0)
+
+    def test_release_unknown(self):
+        pool = ssh_pool.SSHPool()
+        client = self._client()
+        pool.release(client)
+        client.close.assert_called_with()
+
+    def test_dead_transport(self):
+        pool = ssh_pool.SSHPool()
+        dead = self._client()
+        pool.acquire("key", lambda: dead)
+        dead.get_transport().is_active.return_value = False
+        client = self._client()
+        self.assertIs(pool.acquire("key", lambda: client), client)
+        # dead client is closed after release
+        pool.release(dead)
+        dead.close.assert_called_with()
+        self.assertEqual(len(pool), 1)
+
+    def test_max_sessions(self):
+        pool = ssh_pool.SSHPool(max_sessions=2)
+        clients = [self._client(), self._client()]
+        factory = mock.Mock(side_effect=clients)
+        acquired = [pool.acquire("key", factory) for _ in range(4)]
+        self.assertEqual(acquired, [clients[0], clients[0],
+                                    clients[1], clients[1]])
+        pool.release(clients[0])
+        self.assertIs(pool.acquire("key", factory), clients[0])
+
+    def test_evict(self):
+        pool = ssh_pool.SSHPool(idle_timeout=60, maxsize=1)
+        clients = [self._client() for _ in range(3)]
+        with mock.patch('time.time', mock.Mock(return_value=100)):
+            for idx, client in enumerate(clients):
+                pool.acquire(idx, lambda: client)
+            pool.release(clients[0])
+            self.assertEqual(len(pool), 3)
+            pool.release(clients[1])
+            # only one idle client is kept
+            clients[0].close.assert_called_with()
+            self.assertEqual(len(pool), 2)
+        with mock.patch('time.time', mock.Mock(return_value=161)):
+            pool.release(clients[2])
+        clients[1].close.assert_called_with()
+        clients[2].close.assert_not_called()
+        self.assertEqual(len(pool), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
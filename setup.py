@@ -60,5 +60,8 @@ setup(
     license='Apache License 2.0',
     # url="https://github.com/fusion-e/nativeedge-plugins-sdk",
     packages=find_packages(),
-    install_requires=install_requires
+    install_requires=install_requires,
+    extras_require={
+        'async': ['aiohttp'],  # rest process_async
+    }
 )